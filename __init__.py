@@ -1,8 +1,12 @@
 """ This Module contains a ColorPicker that can be used as a standalone application or as a TUI control.
+
+Curses is only loaded when the ColorPicker is used, so the commands that don't show the picker start without it.
 """
 
 
-from unicguard import UnicursesGuard
+import importlib
+import importlib.util
+import sys
 
 
 # Constants ##########################################################################################################################################
@@ -18,16 +22,96 @@ from functions import *
 
 
 # Class ##############################################################################################################################################
-from color_picker import ColorPicker
+def __getattr__(name:str):
+  # ColorPicker is imported on first access because it loads curses
+  if name == "ColorPicker":
+    from color_picker import ColorPicker
+    return ColorPicker
+  raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+# Commands ###########################################################################################################################################
+COMMANDS = { # command: (module, function)
+  "render": ("render", "main"), # render a PPM or PGM image as ANSI art
+  "--serve": ("service", "main"), # answer color queries as JSON lines
+  "escape": ("commands", "escape_main"), # print the escape sequence of a color
+  "convert": ("commands", "convert_main"), # convert between color values and 24bit colors
+  "palette": ("commands", "palette_main"), # list all 256 colors
+  "truecolor": ("true_color_picker", "main"), # pick a color of the 24bit color range
+  "colorize": ("colorize", "main"), # color the matches of regular expressions in a stream
+  "downsample": ("downsample", "main"), # rewrite 24bit colors in a stream to the 256-color range
+  "palette-file": ("palette_file", "main"), # write the binary palette file for other processes and print its path
+  "probe": ("probe", "main"), # ask the terminal for its colors and capabilities
+}
+
 
+def _finish_profile(profiler):
+  # the report is printed after the terminal is restored
+  if profiler is None:
+    return
+  if profiler.trace_path:
+    profiler.write_trace()
+  print(profiler.report(), file=sys.stderr)
 
-def main():
+
+def main(argv:list[str]|None=None) -> int:
   """ Main function that runs the ColorPicker as a standalone application.
+  If the first argument is the name of a command, the main function of that command's module is run instead.
+
+  Args:
+    argv: The command line arguments without the program name. Default is sys.argv[1:].
+
+  Returns:
+    The exit code.
   """
+  if argv is None:
+    argv = sys.argv[1:]
+  if argv and argv[0] in COMMANDS:
+    module, function = COMMANDS[argv[0]]
+    return getattr(importlib.import_module(module), function)(argv[1:])
+  import argparse
+  parser = argparse.ArgumentParser(prog="ncolorpicker", description="Pick a color of the 256 color palette.", epilog="commands: " + ", ".join(COMMANDS))
+  parser.add_argument("--backend", choices=["auto", "curses", "ansi"], default="auto",
+                      help="draw with curses or write ANSI escape sequences directly (default: curses if it is installed)")
+  parser.add_argument("--fps", type=float, default=FRAME_RATE,
+                      help="the maximum number of frames per second, 0 draws after every key (default: %(default)s)")
+  parser.add_argument("--profile", metavar="TRACE", help="measure the frames and write a trace in the Chrome trace event format")
+  parser.add_argument("--profile-overlay", action="store_true", help="show the numbers of the last frame below the title")
+  parser.add_argument("--no-probe", action="store_true", help="assume the xterm colors instead of asking the terminal (see 'ncolorpicker probe')")
+  args = parser.parse_args(argv)
+  palette = None
+  if not args.no_probe:
+    # only the first start in a terminal asks it, later starts read the cached result
+    from probe import probe_terminal, supports_256_colors, palette_rgb
+    result = probe_terminal()
+    if supports_256_colors(result):
+      palette = palette_rgb(result)
+    else:
+      print("ncolorpicker: warning: the terminal reports only %i colors, the xterm values of the 256 colors are assumed." % result["colors"], file=sys.stderr)
+  profiler = None
+  if args.profile or args.profile_overlay:
+    from profiler import FrameProfiler
+    profiler = FrameProfiler(args.profile, args.profile_overlay)
+  backend = args.backend
+  if backend == "auto":
+    backend = "curses" if importlib.util.find_spec("unicurses") else "ansi"
+  from color_picker import ColorPicker
+  if backend == "ansi":
+    from terminal import Terminal
+    from ansi_screen import AnsiScreen
+    with Terminal() as terminal:
+      screen = AnsiScreen(terminal)
+      color_picker = ColorPicker(screen, curses=screen.curses, profiler=profiler, palette=palette)
+      color_picker.run(frame_rate=args.fps)
+    _finish_profile(profiler)
+    return 0
+  from unicguard import UnicursesGuard
   with UnicursesGuard() as stdscr:
-    color_picker = ColorPicker(stdscr)
-    color_picker.run()
+    color_picker = ColorPicker(stdscr, profiler=profiler, palette=palette)
+    color_picker.run(frame_rate=args.fps)
+  _finish_profile(profiler)
+  return 0
 
 
 if __name__ == "__main__":
-  main()
+  sys.exit(main())
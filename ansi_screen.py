@@ -0,0 +1,251 @@
+""" This module contains a screen that writes ANSI escape sequences directly to the terminal instead of using curses.
+
+The AnsiScreen has the same methods as a curses window that the ColorPicker uses and AnsiCurses provides the part of the
+curses module it needs (init_pair, color_pair, the attributes and the key codes), so the ColorPicker can run without curses:
+
+  with Terminal() as terminal:
+    screen = AnsiScreen(terminal)
+    color_picker = ColorPicker(screen, curses=screen.curses)
+    color_picker.run()
+
+Everything written with addstr is kept in a grid of cells. On refresh each changed line of the grid is turned into text
+with the escape sequences of functions.escape_table, compared to the line shown on the terminal and only the lines that
+differ are written, all together with a single write.
+"""
+
+
+import time
+
+from constants import COLOR_MAX
+from functions import escape_table, RESET
+from terminal import Terminal, KEY_DOWN, KEY_UP, KEY_LEFT, KEY_RIGHT, KEY_HOME, KEY_BACKSPACE, KEY_NPAGE, KEY_PPAGE, KEY_ENTER, KEY_END, KEY_RESIZE
+
+
+DIM = "\033[2m"
+REVERSE = "\033[7m"
+CLEAR_LINE = "\033[K"
+
+
+class AnsiCurses(object):
+  """The part of the curses module used by the ColorPicker. The values of the attributes and key codes are the same as in curses.
+  """
+
+  KEY_DOWN = KEY_DOWN
+  KEY_UP = KEY_UP
+  KEY_LEFT = KEY_LEFT
+  KEY_RIGHT = KEY_RIGHT
+  KEY_HOME = KEY_HOME
+  KEY_BACKSPACE = KEY_BACKSPACE
+  KEY_NPAGE = KEY_NPAGE
+  KEY_PPAGE = KEY_PPAGE
+  KEY_ENTER = KEY_ENTER
+  KEY_END = KEY_END
+  KEY_RESIZE = KEY_RESIZE
+  A_NORMAL = 0
+  A_REVERSE = 1 << 18
+  A_DIM = 1 << 20
+  A_COLOR = 0xff << 8
+  COLORS = COLOR_MAX
+  COLOR_PAIRS = COLOR_MAX
+
+  def __init__(self):
+    self.pairs = {} # pair: (foreground, background)
+    self._escapes = {} # attr: escape sequence
+
+  def init_pair(self, pair:int, foreground:int, background:int):
+    self.pairs[pair] = (foreground, background)
+    self._escapes.clear()
+
+  def color_pair(self, pair:int) -> int:
+    return pair << 8
+
+  COLOR_PAIR = color_pair
+
+  def pair_number(self, attr:int) -> int:
+    return (attr & self.A_COLOR) >> 8
+
+  def escape(self, attr:int) -> str:
+    """The escape sequence that switches to an attribute. The sequences are cached until a pair is changed.
+
+    Args:
+      attr: The attribute as combination of a color pair, A_REVERSE and A_DIM.
+
+    Returns:
+      The escape sequence starting with a reset of all attributes.
+    """
+    escape = self._escapes.get(attr)
+    if escape is None:
+      parts = [RESET]
+      if attr & self.A_DIM:
+        parts.append(DIM)
+      if attr & self.A_REVERSE:
+        parts.append(REVERSE)
+      pair = self.pairs.get(self.pair_number(attr))
+      if pair is not None:
+        foreground, background = pair
+        if 0 <= foreground < COLOR_MAX:
+          parts.append(escape_table(True, False)[foreground])
+        if 0 <= background < COLOR_MAX:
+          parts.append(escape_table(False, True)[background])
+      escape = "".join(parts)
+      self._escapes[attr] = escape
+    return escape
+
+
+class AnsiScreen(object):
+  """A window that keeps the written text in a grid and writes the changed lines to the terminal on refresh.
+
+  After each refresh the cost of the frame is stored in stats:
+    - lines: The number of lines written.
+    - bytes: The number of bytes written.
+    - seconds: The time needed to create and write the frame.
+
+  Args:
+    terminal: The terminal to write to and read the keys from.
+    curses: The AnsiCurses with the color pairs. A new one is created by default.
+  """
+
+  terminal:Terminal
+  curses:AnsiCurses
+
+  def __init__(self, terminal:Terminal, curses:AnsiCurses|None=None):
+    self.terminal = terminal
+    self.curses = curses or AnsiCurses()
+    self.stats = {"lines": 0, "bytes": 0, "seconds": 0.0}
+    self.y = 0
+    self.x = 0
+    self.attr = 0
+    self._timeout = None
+    self._resize()
+
+  def _resize(self):
+    self.height, self.width = self.terminal.size()
+    self._chars = [[" "] * self.width for _ in range(self.height)]
+    self._attrs = [[0] * self.width for _ in range(self.height)]
+    self._lines = [None] * self.height # the lines shown on the terminal
+    self._dirty = set(range(self.height))
+
+  def getmaxyx(self) -> tuple[int,int]:
+    return self.height, self.width
+
+  def move(self, y:int, x:int):
+    self.y = y
+    self.x = x
+
+  def attron(self, attr:int):
+    self.attr |= attr
+
+  def attroff(self, attr:int):
+    self.attr &= ~attr
+
+  def attrset(self, attr:int):
+    self.attr = attr
+
+  def addstr(self, *args):
+    """Writes text at the cursor like the curses addstr.
+    Can be called as addstr(text), addstr(text, attr), addstr(y, x, text) or addstr(y, x, text, attr).
+    A newline clears the rest of the line and moves the cursor to the start of the next line.
+    Text outside of the screen is cut off.
+    """
+    if len(args) >= 3:
+      self.y, self.x = args[0], args[1]
+      args = args[2:]
+    text = args[0]
+    attr = (args[1] if len(args) > 1 else 0) | self.attr
+    lines = text.split("\n")
+    for i, line in enumerate(lines):
+      if i > 0:
+        self._clear_to_end()
+        self.y += 1
+        self.x = 0
+      self._put(line, attr)
+
+  def _put(self, text:str, attr:int):
+    y, x = self.y, self.x
+    self.x = x + len(text)
+    if not 0 <= y < self.height or x >= self.width or not text:
+      return
+    if x < 0:
+      text = text[-x:]
+      x = 0
+    end = min(self.width, x + len(text))
+    self._chars[y][x:end] = text[:end - x]
+    self._attrs[y][x:end] = [attr] * (end - x)
+    self._dirty.add(y)
+
+  def _clear_to_end(self):
+    y, x = self.y, max(0, self.x)
+    if 0 <= y < self.height and x < self.width:
+      self._chars[y][x:] = [" "] * (self.width - x)
+      self._attrs[y][x:] = [0] * (self.width - x)
+      self._dirty.add(y)
+
+  def clrtoeol(self):
+    self._clear_to_end()
+
+  def clear(self):
+    """Clears the grid. The next refresh writes every line.
+    """
+    self._resize()
+    self.y = self.x = 0
+
+  erase = clear
+
+  def _line(self, y:int) -> str:
+    chars = self._chars[y]
+    attrs = self._attrs[y]
+    end = self.width
+    while end > 0 and attrs[end - 1] == 0 and chars[end - 1] == " ":
+      end -= 1 # the end of the line is cleared instead of written
+    escape = self.curses.escape
+    parts = []
+    start = 0
+    for x in range(1, end + 1):
+      if x == end or attrs[x] != attrs[start]:
+        parts.append(escape(attrs[start]))
+        parts.append("".join(chars[start:x]))
+        start = x
+    parts.append(RESET + CLEAR_LINE)
+    return "".join(parts)
+
+  def refresh(self):
+    """Writes the changed lines to the terminal with a single write.
+    """
+    start = time.perf_counter()
+    output = []
+    for y in sorted(self._dirty):
+      line = self._line(y)
+      if line != self._lines[y]:
+        self._lines[y] = line
+        output.append("\033[%d;1H%s" % (y + 1, line))
+    self._dirty.clear()
+    data = "".join(output).encode()
+    if data:
+      self.terminal.write(data)
+    self.stats = {"lines": len(output), "bytes": len(data), "seconds": time.perf_counter() - start}
+
+  def nodelay(self, flag:bool):
+    """If flag is True, getch() returns -1 instead of waiting for a key.
+    """
+    self._timeout = 0 if flag else None
+
+  def timeout(self, delay:int):
+    """Sets how long getch() waits for a key in milliseconds. A negative delay waits until a key is pressed.
+    """
+    self._timeout = None if delay < 0 else delay / 1000
+
+  def filenos(self) -> list[int]:
+    """The file descriptors to wait for before calling getch(), for example with an event loop.
+    """
+    return self.terminal.filenos()
+
+  def getch(self) -> int:
+    """Reads the next key. The grid is resized when the terminal was resized.
+
+    Returns:
+      The key code or -1 if no key was pressed within the timeout.
+    """
+    key = self.terminal.getch(self._timeout)
+    if key == KEY_RESIZE:
+      self._resize()
+    return key
@@ -0,0 +1,87 @@
+""" Benchmark of the colorize command on a generated log.
+
+The throughput of the Colorizer is compared to a simple script that checks every rule on every line,
+like the scripts usually used to color logs.
+
+Usage:
+  python3 benchmarks/bench_colorize.py [megabytes]
+"""
+
+import io
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from colorize import Colorizer
+from functions import colored_256
+
+
+RULES = [("ERROR", 196), ("WARN(ING)?", 214), ("DEBUG", 244), (r"\d+ms", 75), ("user=[a-z]+", 46)]
+
+
+class _NullWriter(object):
+
+  def __init__(self):
+    self.size = 0
+
+  def write(self, data:bytes):
+    self.size += len(data)
+
+  def flush(self):
+    pass
+
+
+def generate_log(size:int) -> bytes:
+  """Generates log lines with a mix of levels, durations and user names.
+  """
+  random.seed(0)
+  levels = ["INFO"] * 6 + ["DEBUG"] * 2 + ["WARN", "ERROR"]
+  users = ["alice", "bob", "carol", "dave"]
+  lines = []
+  total = 0
+  while total < size:
+    line = "2024-05-01T12:%02d:%02d.%03dZ %-5s [worker-%d] request user=%s path=/api/v1/items/%d took %dms\n" % (
+      random.randrange(60), random.randrange(60), random.randrange(1000), random.choice(levels), random.randrange(8),
+      random.choice(users), random.randrange(100000), random.randrange(2000)
+    )
+    lines.append(line)
+    total += len(line)
+  return "".join(lines).encode()
+
+
+def naive(data:bytes, rules:list[tuple[str,int]]) -> int:
+  """Colors line by line with a separate search for each rule.
+  """
+  compiled = [(re.compile(pattern), color) for pattern, color in rules]
+  size = 0
+  for line in data.decode().splitlines(True):
+    for regex, color in compiled:
+      line = regex.sub(lambda m: colored_256(color, m.group()), line)
+    size += len(line)
+  return size
+
+
+def measure(name:str, function, size:int):
+  start = time.perf_counter()
+  function()
+  seconds = time.perf_counter() - start
+  print("%-28s %8.1f MB/s" % (name, size / seconds / 1e6))
+
+
+def main():
+  megabytes = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+  data = generate_log(megabytes * 1000 * 1000)
+  size = len(data)
+  for count in (1, len(RULES)):
+    colorizer = Colorizer(RULES[:count])
+    measure("colorize, %d rule%s" % (count, "s" if count > 1 else ""), lambda: colorizer.stream(io.BytesIO(data), _NullWriter()), size)
+  sample = data[:size // 8]
+  measure("per line and rule, %d rules" % len(RULES), lambda: naive(sample, RULES), len(sample))
+
+
+if __name__ == "__main__":
+  main()
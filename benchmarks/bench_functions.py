@@ -0,0 +1,50 @@
+""" Benchmark of coloring many segments with colored_256 compared to write_colored.
+
+Usage:
+  python3 benchmarks/bench_functions.py [segments]
+"""
+
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from functions import colored_256, write_colored
+
+
+def main():
+  count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+  random.seed(0)
+  # log like segments: runs of the same color are common
+  segments = []
+  color = 7
+  for i in range(count):
+    if random.random() < 0.3:
+      color = random.choice([7, 196, 214, 46, 75])
+    segments.append((color, "segment %d " % (i % 100)))
+
+  start = time.perf_counter()
+  out = io.StringIO()
+  out.write("".join(colored_256(c, text) for c, text in segments))
+  single = time.perf_counter() - start
+
+  start = time.perf_counter()
+  out = io.StringIO()
+  write_colored(segments, out)
+  bulk_text = time.perf_counter() - start
+
+  start = time.perf_counter()
+  buffer = bytearray()
+  write_colored(segments, buffer)
+  bulk_bytes = time.perf_counter() - start
+
+  print("colored_256 + join:      %6.2f M segments/s" % (count / single / 1e6))
+  print("write_colored StringIO:  %6.2f M segments/s" % (count / bulk_text / 1e6))
+  print("write_colored bytearray: %6.2f M segments/s" % (count / bulk_bytes / 1e6))
+
+
+if __name__ == "__main__":
+  main()
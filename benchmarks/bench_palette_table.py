@@ -0,0 +1,58 @@
+""" Microbenchmark comparing the per-frame color calculations of the color picker with the lookups in the precalculated palette table.
+
+Usage:
+  python3 benchmarks/bench_palette_table.py [frames]
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calculations import color_range, brightness_range, brightness, calc_color_256, palette_table
+
+
+def frame_calculated(field):
+  """ Calculates every cell like the color picker did for each frame. (init, display, selection)
+  """
+  total = 0
+  for _ in range(4):
+    for line in field:
+      for m1,m2,r,g,b in line:
+        r = brightness(r, m1, m2)
+        g = brightness(g, m1, m2)
+        b = brightness(b, m1, m2)
+        total += calc_color_256(r, g, b)
+  return total
+
+
+def frame_table(table):
+  """ Reads every cell from the palette table the same number of times.
+  """
+  total = 0
+  for _ in range(4):
+    for line in table[1:-1]:
+      for color, _, _, _ in line:
+        total += color
+  return total
+
+
+def main():
+  frames = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+  field = [[(m1,m2,r,g,b) for r,g,b in color_range()] for m1,m2 in brightness_range()]
+  table = palette_table(field)
+  assert frame_calculated(field) == frame_table(table)
+
+  build = timeit.timeit(lambda: palette_table(field), number=100) / 100
+  calculated = timeit.timeit(lambda: frame_calculated(field), number=frames) / frames
+  looked_up = timeit.timeit(lambda: frame_table(table), number=frames) / frames
+
+  print("table build (once):   %8.1f us" % (build * 1e6))
+  print("calculated per frame: %8.1f us" % (calculated * 1e6))
+  print("table per frame:      %8.1f us" % (looked_up * 1e6))
+  print("speedup:              %8.1fx" % (calculated / looked_up))
+
+
+if __name__ == "__main__":
+  main()
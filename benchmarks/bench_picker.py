@@ -0,0 +1,326 @@
+""" Benchmark suite of the color picker drawing, the input handling and the calculations.
+
+The ColorPicker is driven against the FakeScreen, so no terminal is needed. Each benchmark reports the median wall time
+per iteration, the number of curses calls per iteration (writes for the AnsiScreen, with the written bytes as chars)
+and the memory allocated by one iteration (measured in a separate
+run with tracemalloc, so it does not slow down the timing).
+
+The results can be saved as JSON and two saved runs can be compared. The fastest measurement is compared, because it is
+the least affected by other processes. The exit code of the comparison is 1 if any benchmark got slower or allocates
+more than the threshold, or if it makes more curses calls than before.
+
+Usage:
+  python3 benchmarks/bench_picker.py [--output results.json] [--repeat 7] [--only draw_full,draw_full_64_pairs]
+  python3 benchmarks/bench_picker.py --compare old.json new.json [--threshold 0.1]
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_screen import FakeCurses, FakeScreen, FakeTerminal
+from ansi_screen import AnsiScreen
+from calculations import brightness, brightness_range, calc_color_256, color_range, palette_table, ColorField
+from color_picker import ColorPicker
+from functions import colored_256
+from pairs import PairAllocator
+
+
+# a scripted session: moving through all sections, typing a hex color and resizing
+KEY_SCRIPT = (
+  [FakeCurses.KEY_RIGHT] * 12 + [FakeCurses.KEY_DOWN] * 6 + [FakeCurses.KEY_LEFT] * 5 + [FakeCurses.KEY_UP] * 9 +
+  [ord(c) for c in "#ff8800"] + [FakeCurses.KEY_DOWN] * 8 + [ord('#'), ord('1'), ord('2'), ord('3'), 10] +
+  [FakeCurses.KEY_RESIZE] + [FakeCurses.KEY_RIGHT] * 20
+)
+
+
+class Case(object):
+  """A single benchmark.
+
+  Args:
+    name: The name used in the results.
+    setup: Creates the state for one iteration. Called outside of the measurement.
+    run: Runs one iteration with the state created by setup.
+    number: The number of iterations for each measurement.
+  """
+
+  def __init__(self, name:str, setup, run, number:int):
+    self.name = name
+    self.setup = setup
+    self.run = run
+    self.number = number
+
+
+def _picker(keys:list[int]=()) -> tuple[ColorPicker,FakeScreen]:
+  random.seed(0) # the title colors are random, the seed keeps the number of curses calls the same for each run
+  screen = FakeScreen(keys)
+  picker = ColorPicker(screen, curses=FakeCurses)
+  return picker, screen
+
+
+def _ansi_picker() -> tuple[ColorPicker,FakeTerminal]:
+  random.seed(0)
+  terminal = FakeTerminal()
+  screen = AnsiScreen(terminal)
+  picker = ColorPicker(screen, curses=screen.curses)
+  return picker, terminal
+
+
+def _setup_ansi_full():
+  picker, terminal = _ansi_picker()
+  picker.screen.clear()
+  picker.invalidate()
+  return picker, terminal
+
+
+def _setup_ansi_incremental():
+  picker, terminal = _ansi_picker()
+  picker.draw()
+  picker.handle_input(FakeCurses.KEY_RIGHT)
+  return picker, terminal
+
+
+def _setup_ansi_script():
+  picker, terminal = _ansi_picker()
+  picker.draw()
+  return picker, terminal
+
+
+def _setup_full():
+  picker, screen = _picker()
+  picker.invalidate()
+  return picker, screen
+
+
+def _run_draw(state):
+  picker, _ = state
+  picker.draw()
+
+
+def _setup_incremental():
+  picker, screen = _picker()
+  picker.draw()
+  picker.handle_input(FakeCurses.KEY_RIGHT)
+  return picker, screen
+
+
+def _setup_script():
+  picker, screen = _picker()
+  picker.draw()
+  return picker, screen
+
+
+def _run_script(state):
+  picker, _ = state
+  for key in KEY_SCRIPT:
+    picker.handle_input(key)
+    picker.draw()
+
+
+def _setup_pairs_64():
+  # a terminal with 64 pairs, so a full frame changes pairs it used before
+  picker, screen = _picker()
+  picker.pairs = PairAllocator(FakeCurses, limit=64)
+  picker.draw()
+  picker.invalidate()
+  FakeCurses.reset()
+  return picker, screen
+
+
+def _run_generators(_):
+  total = 0
+  for m1, m2 in brightness_range(64):
+    for r, g, b in color_range(63):
+      total += brightness(r, m1, m2, 63)
+  return total
+
+
+def _run_color_field(_):
+  total = 0
+  for line in ColorField(64):
+    for m1, m2, r, g, b in line:
+      total += brightness(r, m1, m2, 63)
+  return total
+
+
+def _run_palette_table(_):
+  return palette_table(ColorField())
+
+
+def _run_calc_color_256(_):
+  total = 0
+  for r in range(6):
+    for g in range(6):
+      for b in range(6):
+        total += calc_color_256(r, g, b)
+  return total
+
+
+def _run_colored_256(_):
+  return "".join([colored_256(color, "text", foreground=color & 1 == 0, background=color & 2 == 0) for color in range(256)] * 100)
+
+
+CASES = [
+  Case("draw_full", _setup_full, _run_draw, 50),
+  Case("draw_incremental", _setup_incremental, _run_draw, 500),
+  Case("key_script", _setup_script, _run_script, 5),
+  Case("ansi_draw_full", _setup_ansi_full, _run_draw, 50),
+  Case("ansi_draw_incremental", _setup_ansi_incremental, _run_draw, 500),
+  Case("ansi_key_script", _setup_ansi_script, _run_script, 5),
+  Case("draw_full_64_pairs", _setup_pairs_64, _run_draw, 50),
+  Case("generators_64", lambda: None, _run_generators, 1),
+  Case("color_field_64", lambda: None, _run_color_field, 1),
+  Case("palette_table", lambda: None, _run_palette_table, 20),
+  Case("calc_color_256", lambda: None, _run_calc_color_256, 1000),
+  Case("colored_256", lambda: None, _run_colored_256, 20),
+]
+
+
+def measure(case:Case, repeat:int) -> dict:
+  """Runs a benchmark several times.
+
+  Args:
+    case: The benchmark.
+    repeat: The number of measurements. The median is reported.
+
+  Returns:
+    The results as dictionary.
+  """
+  case.run(case.setup()) # warm up
+  times = []
+  calls = {}
+  chars = 0
+  for _ in range(repeat):
+    states = [case.setup() for _ in range(case.number)]
+    for state in states:
+      if isinstance(state, tuple):
+        state[1].reset()
+    FakeCurses.calls.clear()
+    start = time.perf_counter()
+    for state in states:
+      case.run(state)
+    times.append((time.perf_counter() - start) / case.number)
+    calls = {}
+    chars = 0
+    for state in states:
+      if isinstance(state, tuple):
+        for name, count in state[1].calls.items():
+          calls[name] = calls.get(name, 0) + count
+        chars += state[1].chars
+    for name, count in FakeCurses.calls.items():
+      calls[name] = calls.get(name, 0) + count
+  calls = {name: count / case.number for name, count in sorted(calls.items())}
+
+  state = case.setup()
+  tracemalloc.start()
+  case.run(state)
+  _, peak = tracemalloc.get_traced_memory()
+  snapshot = tracemalloc.take_snapshot()
+  tracemalloc.stop()
+  blocks = sum(stat.count for stat in snapshot.statistics("filename"))
+
+  return {
+    "wall_ms": statistics.median(times) * 1000,
+    "wall_ms_min": min(times) * 1000,
+    "calls": calls,
+    "curses_calls": sum(calls.values()),
+    "chars": chars / case.number,
+    "alloc_peak_bytes": peak,
+    "alloc_blocks_retained": blocks,
+  }
+
+
+def run(repeat:int, only:list[str]|None=None) -> dict:
+  """Runs the benchmarks.
+
+  Args:
+    repeat: The number of measurements of each benchmark.
+    only: The names of the benchmarks to run. Default is all.
+
+  Returns:
+    The results with some information about the environment.
+  """
+  results = {}
+  for case in CASES:
+    if only and case.name not in only:
+      continue
+    results[case.name] = measure(case, repeat)
+  return {
+    "python": platform.python_version(),
+    "platform": platform.platform(),
+    "repeat": repeat,
+    "benchmarks": results,
+  }
+
+
+def compare(old:dict, new:dict, threshold:float) -> list[str]:
+  """Compares two saved runs.
+
+  Args:
+    old: The results of the earlier run.
+    new: The results of the later run.
+    threshold: The relative increase of the time or the allocations that counts as regression. (0.1 = 10%)
+
+  Returns:
+    The regressions as text lines. Empty if there are none.
+  """
+  regressions = []
+  print("%-22s %12s %12s %8s %10s %10s %12s %12s" % ("benchmark", "old min ms", "new min ms", "change", "old calls", "new calls", "old alloc", "new alloc"))
+  for name, after in new["benchmarks"].items():
+    before = old["benchmarks"].get(name)
+    if before is None:
+      print("%-22s %12s %12.3f" % (name, "-", after["wall_ms_min"]))
+      continue
+    change = after["wall_ms_min"] / before["wall_ms_min"] - 1 if before["wall_ms_min"] else 0
+    print("%-22s %12.3f %12.3f %+7.1f%% %10i %10i %12i %12i" % (
+      name, before["wall_ms_min"], after["wall_ms_min"], change * 100,
+      before["curses_calls"], after["curses_calls"], before["alloc_peak_bytes"], after["alloc_peak_bytes"]
+    ))
+    if change > threshold:
+      regressions.append("%s: %.3f ms -> %.3f ms (%+.1f%%)" % (name, before["wall_ms_min"], after["wall_ms_min"], change * 100))
+    if after["curses_calls"] > before["curses_calls"]:
+      regressions.append("%s: %i -> %i curses calls" % (name, before["curses_calls"], after["curses_calls"]))
+    if after["alloc_peak_bytes"] > before["alloc_peak_bytes"] * (1 + threshold):
+      regressions.append("%s: %i -> %i bytes allocated" % (name, before["alloc_peak_bytes"], after["alloc_peak_bytes"]))
+  return regressions
+
+
+def main(argv:list[str]|None=None) -> int:
+  parser = argparse.ArgumentParser(description="Benchmark the color picker and the calculations.")
+  parser.add_argument("--output", default=None, help="save the results as JSON to this file")
+  parser.add_argument("--repeat", type=int, default=7, help="the number of measurements of each benchmark (default: 7)")
+  parser.add_argument("--only", default=None, help="comma separated names of the benchmarks to run")
+  parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), default=None, help="compare two saved results instead of running")
+  parser.add_argument("--threshold", type=float, default=0.1, help="relative slowdown counted as regression (default: 0.1)")
+  args = parser.parse_args(argv)
+
+  if args.compare:
+    with open(args.compare[0]) as f:
+      old = json.load(f)
+    with open(args.compare[1]) as f:
+      new = json.load(f)
+    regressions = compare(old, new, args.threshold)
+    for regression in regressions:
+      print("REGRESSION " + regression)
+    return 1 if regressions else 0
+
+  results = run(args.repeat, args.only.split(",") if args.only else None)
+  print("%-22s %12s %12s %12s %14s" % ("benchmark", "median ms", "min ms", "curses calls", "alloc bytes"))
+  for name, result in results["benchmarks"].items():
+    print("%-22s %12.3f %12.3f %12i %14i" % (name, result["wall_ms"], result["wall_ms_min"], result["curses_calls"], result["alloc_peak_bytes"]))
+  if args.output:
+    with open(args.output, "w") as f:
+      json.dump(results, f, indent=2)
+  return 0
+
+
+if __name__ == "__main__":
+  sys.exit(main())
@@ -0,0 +1,50 @@
+""" Benchmark of the nearest color search for single lookups and NumPy arrays.
+
+Usage:
+  python3 benchmarks/bench_quantize.py [pixels]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quantize import Quantizer, load_numpy
+
+
+def main():
+  pixels = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+  random.seed(0)
+  values = [(random.randrange(256), random.randrange(256), random.randrange(256)) for _ in range(100_000)]
+
+  quantizer = Quantizer()
+  start = time.perf_counter()
+  for r, g, b in values:
+    quantizer.nearest(r, g, b)
+  cold = time.perf_counter() - start
+  start = time.perf_counter()
+  for r, g, b in values:
+    quantizer.nearest(r, g, b)
+  warm = time.perf_counter() - start
+  print("single lookup (cold buckets): %6.2f us" % (cold / len(values) * 1e6))
+  print("single lookup (warm buckets): %6.2f us" % (warm / len(values) * 1e6))
+
+  np = load_numpy()
+  if np is None:
+    print("NumPy is not installed, skipping nearest_array()")
+    return
+  rgb = np.random.default_rng(0).integers(0, 256, size=(pixels, 3), dtype=np.uint8)
+  start = time.perf_counter()
+  quantizer.nearest_array(rgb[:1])
+  build = time.perf_counter() - start
+  start = time.perf_counter()
+  quantizer.nearest_array(rgb)
+  batch = time.perf_counter() - start
+  print("array table build:            %6.2f s" % build)
+  print("nearest_array:                %6.2f Mpixel/s" % (pixels / batch / 1e6))
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,80 @@
+""" Checks the import time and cold start time of the headless commands against a budget.
+
+Each command of the budget is started with "python -X importtime" to sum up the import time of the package modules
+and to make sure that no forbidden module (like curses) is imported. The cold start time is the median wall time of
+several runs. The exit code is 1 if any budget is exceeded, so this can be run in CI.
+
+Usage:
+  python3 benchmarks/bench_startup.py [budget.json]
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENTRY = os.path.join(ROOT, "__init__.py")
+
+
+def import_times(command:list[str]) -> dict[str,int]:
+  """Runs a command with -X importtime.
+
+  Returns:
+    The cumulative import time in microseconds of each top level import.
+  """
+  result = subprocess.run([sys.executable, "-X", "importtime", ENTRY, *command], capture_output=True, text=True, check=True)
+  times = {}
+  for line in result.stderr.splitlines():
+    if not line.startswith("import time:") or "|" not in line:
+      continue
+    _, cumulative, name = line[len("import time:"):].split("|")
+    if cumulative.strip().isdigit():
+      times[name[1:].rstrip()] = int(cumulative) # nested imports keep their indentation
+  return times
+
+
+def cold_start(command:list[str], runs:int) -> float:
+  """Runs a command several times.
+
+  Returns:
+    The median wall time in milliseconds.
+  """
+  durations = []
+  for _ in range(runs):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, ENTRY, *command], stdout=subprocess.DEVNULL, check=True)
+    durations.append((time.perf_counter() - start) * 1000)
+  return statistics.median(durations)
+
+
+def main() -> int:
+  path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, "benchmarks", "startup_budget.json")
+  with open(path) as f:
+    budget = json.load(f)
+  package = {name[:-3] for name in os.listdir(ROOT) if name.endswith(".py")}
+  # the time python itself needs to start, to report the cost of the package separately
+  baseline = statistics.median(
+    (lambda start: (subprocess.run([sys.executable, "-c", "pass"], check=True), time.perf_counter() - start)[1])(time.perf_counter()) * 1000
+    for _ in range(budget["runs"])
+  )
+  print("python startup: %7.1f ms" % baseline)
+  failed = False
+  for command in budget["commands"]:
+    times = import_times(command)
+    imported = {name.strip() for name in times}
+    own = sum(us for name, us in times.items() if name == name.lstrip() and name in package)
+    forbidden = sorted(imported & set(budget["forbidden_modules"]))
+    wall = cold_start(command, budget["runs"])
+    ok = own / 1000 <= budget["max_import_ms"] and wall <= budget["max_cold_start_ms"] and not forbidden
+    failed |= not ok
+    print("%-20s import %6.1f ms  cold start %6.1f ms  %s%s" % (
+      " ".join(command), own / 1000, wall, "ok" if ok else "OVER BUDGET", "  forbidden: " + ", ".join(forbidden) if forbidden else ""
+    ))
+  return 1 if failed else 0
+
+
+if __name__ == "__main__":
+  sys.exit(main())
@@ -0,0 +1,157 @@
+""" An in-memory screen and curses module for running the ColorPicker in benchmarks without a terminal.
+
+The FakeScreen records how often each curses function was called and how many characters were written,
+so benchmarks can report the number of curses calls next to the time.
+
+Example:
+  screen = FakeScreen(keys=[KEY_RIGHT, ord('q')])
+  picker = ColorPicker(screen, curses=FakeCurses)
+  picker.run()
+  print(screen.calls)
+"""
+
+from collections import Counter
+
+
+class FakeCurses(object):
+  """The part of the curses module used by the ColorPicker. The values are the same as in curses.
+  """
+
+  KEY_DOWN = 258
+  KEY_UP = 259
+  KEY_LEFT = 260
+  KEY_RIGHT = 261
+  KEY_HOME = 262
+  KEY_BACKSPACE = 263
+  KEY_NPAGE = 338
+  KEY_PPAGE = 339
+  KEY_ENTER = 343
+  KEY_END = 360
+  KEY_RESIZE = 410
+  A_NORMAL = 0
+  A_REVERSE = 1 << 18
+  A_DIM = 1 << 20
+  COLORS = 256
+  COLOR_PAIRS = 256
+  calls = Counter()
+  pairs = {}
+
+  @staticmethod
+  def init_pair(pair:int, foreground:int, background:int):
+    FakeCurses.calls["init_pair"] += 1
+    FakeCurses.pairs[pair] = (foreground, background)
+
+  @staticmethod
+  def color_pair(pair:int) -> int:
+    return pair << 8
+
+  COLOR_PAIR = color_pair
+
+  @staticmethod
+  def pair_number(attr:int) -> int:
+    return (attr >> 8) & 0xff
+
+  @staticmethod
+  def reset():
+    FakeCurses.calls.clear()
+    FakeCurses.pairs.clear()
+
+
+class FakeScreen(object):
+  """A window that records the calls instead of drawing.
+
+  Args:
+    keys: The key codes returned by getch(). When all keys are used, getch() returns exit_key or -1 if it should not wait.
+    exit_key: The key code returned when no keys are left. default: ord('q')
+  """
+
+  def __init__(self, keys:list[int]=(), exit_key:int=ord('q')):
+    self.keys = list(keys)
+    self.exit_key = exit_key
+    self.calls = Counter()
+    self.chars = 0
+    self.y = 0
+    self.x = 0
+    self.attr = 0
+    self.delay = None
+
+  def reset(self):
+    """Clears the recorded calls.
+    """
+    self.calls.clear()
+    self.chars = 0
+
+  def addstr(self, *args):
+    self.calls["addstr"] += 1
+    if len(args) >= 3 and isinstance(args[0], int):
+      self.y, self.x = args[0], args[1]
+      args = args[2:]
+    text = args[0]
+    self.chars += len(text)
+    self.x += len(text)
+
+  def attron(self, attr:int):
+    self.calls["attron"] += 1
+    self.attr |= attr
+
+  def attroff(self, attr:int):
+    self.calls["attroff"] += 1
+    self.attr &= ~attr
+
+  def move(self, y:int, x:int):
+    self.calls["move"] += 1
+    self.y, self.x = y, x
+
+  def refresh(self):
+    self.calls["refresh"] += 1
+
+  def clear(self):
+    self.calls["clear"] += 1
+
+  def nodelay(self, flag:bool):
+    self.delay = 0 if flag else None
+
+  def timeout(self, delay:int):
+    self.delay = None if delay < 0 else delay
+
+  def getch(self) -> int:
+    self.calls["getch"] += 1
+    if self.keys:
+      return self.keys.pop(0)
+    if self.delay is not None:
+      return -1 # no key pending without waiting
+    return self.exit_key
+
+  def getmaxyx(self) -> tuple[int,int]:
+    return 60, 100
+
+
+class FakeTerminal(object):
+  """A terminal for the AnsiScreen that records the writes instead of writing.
+
+  Args:
+    lines: The number of lines of the terminal.
+    columns: The number of columns of the terminal.
+  """
+
+  def __init__(self, lines:int=60, columns:int=100):
+    self.lines = lines
+    self.columns = columns
+    self.calls = Counter()
+    self.chars = 0
+
+  def reset(self):
+    """Clears the recorded writes.
+    """
+    self.calls.clear()
+    self.chars = 0
+
+  def size(self) -> tuple[int,int]:
+    return self.lines, self.columns
+
+  def write(self, data:bytes|str):
+    self.calls["write"] += 1
+    self.chars += len(data)
+
+  def getch(self, timeout:float|None=None) -> int:
+    return -1
@@ -3,6 +3,8 @@
 
 # Constants
 from constants import RGB_COLOR_COUNT, RGB_COLOR_START, RGB_MAX_VALUE, RGB_MIN_VALUE, RGB_SKIP_BLACK, RGB_SKIP_WHITE
+from constants import BASIC_COLOR_COUNT, GRAY_COLOR_START, COLOR_MAX
+from constants import BASIC_COLOR_RGB, RGB_LEVELS, GRAY_LEVEL_START, GRAY_LEVEL_STEP
 
 
 def brightness_range(full_color_range:int=RGB_COLOR_COUNT, skip_black:bool=RGB_SKIP_BLACK, skip_white:bool=RGB_SKIP_WHITE):
@@ -122,6 +124,190 @@ def color_range(max_value:int=RGB_MAX_VALUE, min_value:int=RGB_MIN_VALUE, yield_
     yield r, g, b
 
 
+def brightness_range_length(full_color_range:int=RGB_COLOR_COUNT, skip_black:bool=RGB_SKIP_BLACK, skip_white:bool=RGB_SKIP_WHITE) -> int:
+  """Calculates the number of values of the brightness_range without generating it.
+
+  Args:
+    full_color_range:int: The number of values for each color channel.
+    skip_black:bool: If True, the first value is skipped.
+    skip_white:bool: If True, the last value is skipped.
+
+  Returns:
+    The number of (dim-multiplier, bright-multiplier) tuples.
+  """
+  return (full_color_range - (1 if skip_black else 0)) + max(0, full_color_range - 1 - (1 if skip_white else 0))
+
+
+def brightness_at(index:int, full_color_range:int=RGB_COLOR_COUNT, skip_black:bool=RGB_SKIP_BLACK, skip_white:bool=RGB_SKIP_WHITE) -> tuple[float,float]:
+  """Calculates a single value of the brightness_range without generating the values before it.
+  The first values increase the dim-multiplier, the values after them increase the bright-multiplier.
+
+  Args:
+    index:int: The position in the brightness_range. (0 - brightness_range_length-1)
+    full_color_range:int: The number of values for each color channel.
+    skip_black:bool: If True, the first value is skipped.
+    skip_white:bool: If True, the last value is skipped.
+
+  Returns:
+    The brightness value as tuple. (dim-multiplier:float, bright-multiplier:float)
+  """
+  max_value = full_color_range - 1
+  start = 1 if skip_black else 0
+  dim_count = full_color_range - start
+  if index < dim_count:
+    return (start + index) / max_value, 0
+  return (1.0 if dim_count > 0 else 0), (index - dim_count + 1) / max_value
+
+
+def color_range_length(max_value:int=RGB_MAX_VALUE, yield_end:bool=True) -> int:
+  """Calculates the number of values of the color_range without generating it.
+
+  Args:
+    max_value:int: The maximum value for each color channel.
+    yield_end:bool: If True, the last color closing the loop is counted as well.
+
+  Returns:
+    The number of (Red, Green, Blue) tuples.
+  """
+  return 6 * max_value + (1 if yield_end else 0)
+
+
+def color_at(index:int, max_value:int=RGB_MAX_VALUE, min_value:int=RGB_MIN_VALUE) -> tuple[int,int,int]:
+  """Calculates a single value of the color_range without generating the values before it.
+  The color_range consists of 6 steps with max_value colors each, every step changes one channel.
+
+  Args:
+    index:int: The position in the color_range. (0 - color_range_length-1)
+    max_value:int: The maximum value for each color channel.
+    min_value:int: The minimum value for each color channel.
+
+  Returns:
+    The color value as tuple. (Red, Green, Blue)
+  """
+  length = max_value
+  step, t = divmod(index, length)
+  high, low = max_value, min_value
+  if step == 0:
+    return high, low + t, low
+  if step == 1:
+    return high - t, low + length, low
+  if step == 2:
+    return high - length, low + length, low + t
+  if step == 3:
+    return high - length, low + length - t, low + length
+  if step == 4:
+    return high - length + t, low, low + length
+  if step == 5:
+    return high, low, low + length - t
+  return high, low, low # the end of the loop is the first color again
+
+
+class ColorFieldRow(object):
+  """A single row of a ColorField. The cells are calculated when they are accessed.
+  """
+
+  __slots__ = ("dim_multiplier", "bright_multiplier", "_field")
+
+  def __init__(self, field:"ColorField", dim_multiplier:float, bright_multiplier:float):
+    self._field = field
+    self.dim_multiplier = dim_multiplier
+    self.bright_multiplier = bright_multiplier
+
+  def __len__(self) -> int:
+    return self._field.width
+
+  def __getitem__(self, col:int) -> tuple[float,float,int,int,int]:
+    field = self._field
+    if col < 0:
+      col += field.width
+    if not 0 <= col < field.width:
+      raise IndexError("field column out of range")
+    return (self.dim_multiplier, self.bright_multiplier, *color_at(col, field.max_value, field.min_value))
+
+  def __iter__(self):
+    m1, m2 = self.dim_multiplier, self.bright_multiplier
+    field = self._field
+    for col in range(field.width):
+      yield (m1, m2, *color_at(col, field.max_value, field.min_value))
+
+
+class ColorField(object):
+  """The field of the color picker as cross of the brightness_range and the color_range.
+  Instead of storing every cell, each cell is calculated from its row and column when it is accessed,
+  so creating the field takes the same time and memory for the 256-color range and the 24bit color range.
+
+  field[row][col] is the same tuple as in a list of lists created from the ranges:
+    [[(m1, m2, r, g, b) for r, g, b in color_range()] for m1, m2 in brightness_range()]
+
+  Example:
+    field = ColorField()
+    m1, m2, r, g, b = field[4][10]
+    for row in field:
+      for m1, m2, r, g, b in row:
+        ...
+  """
+
+  __slots__ = ("full_color_range", "max_value", "min_value", "skip_black", "skip_white", "height", "width")
+
+  def __init__(self, full_color_range:int=RGB_COLOR_COUNT, skip_black:bool=RGB_SKIP_BLACK, skip_white:bool=RGB_SKIP_WHITE, yield_end:bool=True):
+    """
+    Args:
+      full_color_range:int: The number of values for each color channel. Set this to 256 to use the full 24bit color range.
+      skip_black:bool: If True, the black row is skipped.
+      skip_white:bool: If True, the white row is skipped.
+      yield_end:bool: If True, the last column closing the loop of the colors is part of the field.
+    """
+    self.full_color_range = full_color_range
+    self.max_value = full_color_range - 1
+    self.min_value = RGB_MIN_VALUE
+    self.skip_black = skip_black
+    self.skip_white = skip_white
+    self.height = brightness_range_length(full_color_range, skip_black, skip_white)
+    self.width = color_range_length(self.max_value, yield_end)
+
+  def __len__(self) -> int:
+    return self.height
+
+  def __getitem__(self, row:int) -> ColorFieldRow:
+    if row < 0:
+      row += self.height
+    if not 0 <= row < self.height:
+      raise IndexError("field row out of range")
+    return ColorFieldRow(self, *brightness_at(row, self.full_color_range, self.skip_black, self.skip_white))
+
+  def __iter__(self):
+    for row in range(self.height):
+      yield self[row]
+
+  def cell(self, row:int, col:int) -> tuple[float,float,int,int,int]:
+    """Calculates a single cell without creating the row object.
+
+    Args:
+      row:int: The row of the cell.
+      col:int: The column of the cell.
+
+    Returns:
+      The cell as tuple. (dim-multiplier, bright-multiplier, Red, Green, Blue)
+    """
+    if not (0 <= row < self.height and 0 <= col < self.width):
+      raise IndexError("field cell out of range")
+    return (*brightness_at(row, self.full_color_range, self.skip_black, self.skip_white), *color_at(col, self.max_value, self.min_value))
+
+  def rgb(self, row:int, col:int) -> tuple[int,int,int]:
+    """Calculates the final color of a cell with the brightness of its row applied.
+
+    Args:
+      row:int: The row of the cell.
+      col:int: The column of the cell.
+
+    Returns:
+      The color value as tuple. (Red, Green, Blue)
+    """
+    m1, m2, r, g, b = self.cell(row, col)
+    max_value = self.max_value
+    return brightness(r, m1, m2, max_value), brightness(g, m1, m2, max_value), brightness(b, m1, m2, max_value)
+
+
 def brightness(value:int, dim_multiplier:float, bright_multiplier:float, max_value:int=RGB_MAX_VALUE):
   """Calculates the brightness of a color value.
   The brightness of a color value can be calculated by using the dim-multiplier and the bright-multiplier.
@@ -176,3 +362,84 @@ def calc_color_256(r:int, g:int, b: int):
   """
   color = int(RGB_COLOR_START + (RGB_COLOR_COUNT**2) * r + RGB_COLOR_COUNT * g + b)
   return color
+
+
+def palette_table(field:"ColorField|list[list[tuple[float,float,int,int,int]]]") -> list[list[tuple[int,int,int,int]]]:
+  """Precomputes the final values of every cell shown by the color picker.
+  The field only contains the brightness multipliers and the base color of each cell, so the brightness and the color value would have to be
+  calculated again every time a cell is drawn or selected. This table is calculated once and contains everything needed to draw a cell.
+  The text color of a cell is taken from the PaletteIndex of colorspace, which uses the real RGB values of the terminal.
+
+  The first row of the table contains the basic colors, followed by one row for each row of the field and the gray colors as the last row.
+  The row of a cell in the table is therefore the row of the color picker minus ROW_BASIC_INDEX.
+
+  Each cell is a tuple of (color, red, green, blue):
+    - color: The color value for the 256-color range. (0-255)
+    - red, green, blue: The quantized channel values (0-5) of the rgb colors. For basic and gray colors they are -1.
+
+  Args:
+    field: The field of brightness multipliers and colors. [[(dim-multiplier, bright-multiplier, Red, Green, Blue), ...], ...]
+
+  Returns:
+    The table of precalculated cells as list of rows.
+  """
+  basic_row = [(i, -1, -1, -1) for i in range(BASIC_COLOR_COUNT)]
+
+  rgb_rows = []
+  for line in field:
+    row = []
+    for m1,m2,r,g,b in line:
+      r = brightness(r, m1, m2)
+      g = brightness(g, m1, m2)
+      b = brightness(b, m1, m2)
+      row.append((calc_color_256(r, g, b), r, g, b))
+    rgb_rows.append(row)
+
+  gray_row = [(i, -1, -1, -1) for i in range(GRAY_COLOR_START, COLOR_MAX)]
+
+  return [basic_row, *rgb_rows, gray_row]
+
+
+def color_rgb(color:int) -> tuple[int,int,int]:
+  """Calculates the 24bit RGB value the terminal shows for a color of the 256-color range.
+  The basic colors use the default xterm values, because terminals are free to change them.
+  The rgb colors use the 6 channel levels of RGB_LEVELS and the gray colors start at GRAY_LEVEL_START and increase by GRAY_LEVEL_STEP.
+
+  Example:
+    color = 137 # R = 3, G = 2, B = 1
+    137 - 16 = 121 = (36 * 3) + (6 * 2) + 1
+    RGB = (RGB_LEVELS[3], RGB_LEVELS[2], RGB_LEVELS[1]) = (175, 135, 95)
+
+  Args:
+    color (int): The color value. (0-255)
+
+  Returns:
+    The RGB channels as tuple of integers. (0-255)
+  """
+  if color < RGB_COLOR_START:
+    return BASIC_COLOR_RGB[color]
+  if color >= GRAY_COLOR_START:
+    value = GRAY_LEVEL_START + GRAY_LEVEL_STEP * (color - GRAY_COLOR_START)
+    return value, value, value
+  r, g, b = color_levels(color)
+  return RGB_LEVELS[r], RGB_LEVELS[g], RGB_LEVELS[b]
+
+
+def color_levels(color:int) -> tuple[int,int,int]|None:
+  """Calculates the RGB channels (0-5) of a color of the 256-color range. This is the inverse of calc_color_256.
+
+  Example:
+    color = 137
+    137 - 16 = 121 = (36 * 3) + (6 * 2) + 1
+    R = 3, G = 2, B = 1
+
+  Args:
+    color (int): The color value. (0-255)
+
+  Returns:
+    The channels as tuple (Red, Green, Blue) or None for basic and gray colors.
+  """
+  if color < RGB_COLOR_START or color >= GRAY_COLOR_START:
+    return None
+  color -= RGB_COLOR_START
+  return color // (RGB_COLOR_COUNT**2), (color // RGB_COLOR_COUNT) % RGB_COLOR_COUNT, color % RGB_COLOR_COUNT
@@ -0,0 +1,140 @@
+""" This module finds colors by their name, hex value or rgb() notation while the name is typed.
+
+The names of the basic colors (BASIC_COLOR_NAMES) and the CSS color names, which were taken from the X11 color names, are kept
+in a sorted index together with the color value each name stands for. Searching a prefix is a binary search in that index, so each
+typed key only needs a few string comparisons.
+
+The CSS names are mapped to the nearest rgb or gray color (16-255), because terminals often change the basic colors.
+Four names have other values in X11 than in CSS, the X11 values can be found as "x11gray", "x11green", "x11maroon" and "x11purple".
+
+Example:
+  index = name_index()
+  index.search("dark") # [("darkblue", 18), ("darkcyan", 30), ...]
+  index.search("red") # [("Red", 1), ("red", 196)]
+  index.search("#ff8800") # [("#ff8800", 208)]
+"""
+
+
+import re
+from bisect import bisect_left
+
+from constants import BASIC_COLOR_NAMES
+from functions import hex_to_rgb
+from quantize import Quantizer
+
+
+CSS_COLORS = {
+  "aliceblue": "#f0f8ff", "antiquewhite": "#faebd7", "aqua": "#00ffff", "aquamarine": "#7fffd4", "azure": "#f0ffff",
+  "beige": "#f5f5dc", "bisque": "#ffe4c4", "black": "#000000", "blanchedalmond": "#ffebcd", "blue": "#0000ff",
+  "blueviolet": "#8a2be2", "brown": "#a52a2a", "burlywood": "#deb887", "cadetblue": "#5f9ea0", "chartreuse": "#7fff00",
+  "chocolate": "#d2691e", "coral": "#ff7f50", "cornflowerblue": "#6495ed", "cornsilk": "#fff8dc", "crimson": "#dc143c",
+  "cyan": "#00ffff", "darkblue": "#00008b", "darkcyan": "#008b8b", "darkgoldenrod": "#b8860b", "darkgray": "#a9a9a9",
+  "darkgreen": "#006400", "darkgrey": "#a9a9a9", "darkkhaki": "#bdb76b", "darkmagenta": "#8b008b", "darkolivegreen": "#556b2f",
+  "darkorange": "#ff8c00", "darkorchid": "#9932cc", "darkred": "#8b0000", "darksalmon": "#e9967a", "darkseagreen": "#8fbc8f",
+  "darkslateblue": "#483d8b", "darkslategray": "#2f4f4f", "darkslategrey": "#2f4f4f", "darkturquoise": "#00ced1", "darkviolet": "#9400d3",
+  "deeppink": "#ff1493", "deepskyblue": "#00bfff", "dimgray": "#696969", "dimgrey": "#696969", "dodgerblue": "#1e90ff",
+  "firebrick": "#b22222", "floralwhite": "#fffaf0", "forestgreen": "#228b22", "fuchsia": "#ff00ff", "gainsboro": "#dcdcdc",
+  "ghostwhite": "#f8f8ff", "gold": "#ffd700", "goldenrod": "#daa520", "gray": "#808080", "green": "#008000",
+  "greenyellow": "#adff2f", "grey": "#808080", "honeydew": "#f0fff0", "hotpink": "#ff69b4", "indianred": "#cd5c5c",
+  "indigo": "#4b0082", "ivory": "#fffff0", "khaki": "#f0e68c", "lavender": "#e6e6fa", "lavenderblush": "#fff0f5",
+  "lawngreen": "#7cfc00", "lemonchiffon": "#fffacd", "lightblue": "#add8e6", "lightcoral": "#f08080", "lightcyan": "#e0ffff",
+  "lightgoldenrodyellow": "#fafad2", "lightgray": "#d3d3d3", "lightgreen": "#90ee90", "lightgrey": "#d3d3d3", "lightpink": "#ffb6c1",
+  "lightsalmon": "#ffa07a", "lightseagreen": "#20b2aa", "lightskyblue": "#87cefa", "lightslategray": "#778899", "lightslategrey": "#778899",
+  "lightsteelblue": "#b0c4de", "lightyellow": "#ffffe0", "lime": "#00ff00", "limegreen": "#32cd32", "linen": "#faf0e6",
+  "magenta": "#ff00ff", "maroon": "#800000", "mediumaquamarine": "#66cdaa", "mediumblue": "#0000cd", "mediumorchid": "#ba55d3",
+  "mediumpurple": "#9370db", "mediumseagreen": "#3cb371", "mediumslateblue": "#7b68ee", "mediumspringgreen": "#00fa9a", "mediumturquoise": "#48d1cc",
+  "mediumvioletred": "#c71585", "midnightblue": "#191970", "mintcream": "#f5fffa", "mistyrose": "#ffe4e1", "moccasin": "#ffe4b5",
+  "navajowhite": "#ffdead", "navy": "#000080", "oldlace": "#fdf5e6", "olive": "#808000", "olivedrab": "#6b8e23",
+  "orange": "#ffa500", "orangered": "#ff4500", "orchid": "#da70d6", "palegoldenrod": "#eee8aa", "palegreen": "#98fb98",
+  "paleturquoise": "#afeeee", "palevioletred": "#db7093", "papayawhip": "#ffefd5", "peachpuff": "#ffdab9", "peru": "#cd853f",
+  "pink": "#ffc0cb", "plum": "#dda0dd", "powderblue": "#b0e0e6", "purple": "#800080", "rebeccapurple": "#663399",
+  "red": "#ff0000", "rosybrown": "#bc8f8f", "royalblue": "#4169e1", "saddlebrown": "#8b4513", "salmon": "#fa8072",
+  "sandybrown": "#f4a460", "seagreen": "#2e8b57", "seashell": "#fff5ee", "sienna": "#a0522d", "silver": "#c0c0c0",
+  "skyblue": "#87ceeb", "slateblue": "#6a5acd", "slategray": "#708090", "slategrey": "#708090", "snow": "#fffafa",
+  "springgreen": "#00ff7f", "steelblue": "#4682b4", "tan": "#d2b48c", "teal": "#008080", "thistle": "#d8bfd8",
+  "tomato": "#ff6347", "turquoise": "#40e0d0", "violet": "#ee82ee", "wheat": "#f5deb3", "white": "#ffffff",
+  "whitesmoke": "#f5f5f5", "yellow": "#ffff00", "yellowgreen": "#9acd32",
+}
+X11_COLORS = {"x11gray": "#bebebe", "x11green": "#00ff00", "x11maroon": "#b03060", "x11purple": "#a020f0"} # the X11 values differing from CSS
+
+_HEX = re.compile(r"#?([0-9a-f]{3}|[0-9a-f]{6})")
+_RGB = re.compile(r"rgb\(\s*(\d{1,3})\s*,\s*(\d{1,3})\s*,\s*(\d{1,3})\s*\)?")
+
+
+def _key(name:str) -> str:
+  # the text compared with the search, without case, spaces and brackets
+  return "".join(character for character in name.lower() if character.isalnum())
+
+
+class NameIndex(object):
+  """A sorted index of color names for incremental searches.
+
+  The entries are (key, name, color value) tuples sorted by key. Names with the same key keep the order they were added in,
+  so the basic color names come before the CSS names.
+
+  Args:
+    palette: The RGB values of the 256 colors the names are mapped to. Default are the xterm values.
+  """
+
+  def __init__(self, palette:list[tuple[int,int,int]]|None=None):
+    quantizer = Quantizer(include_basic=False, palette=palette)
+    entries = [(_key(name), name, color) for color, name in enumerate(BASIC_COLOR_NAMES)]
+    for name, value in list(CSS_COLORS.items()) + list(X11_COLORS.items()):
+      entries.append((_key(name), name, quantizer.nearest(*hex_to_rgb(value))))
+    entries.sort(key=lambda entry: entry[0]) # stable, the basic colors stay first
+    self.entries = entries
+    self.keys = [entry[0] for entry in entries]
+    self._quantizer = quantizer
+
+  def __len__(self) -> int:
+    return len(self.entries)
+
+  def search(self, text:str, limit:int=20) -> list[tuple[str,int]]:
+    """Finds the colors whose name starts with a text, or the color of a hex value or rgb() notation.
+
+    Args:
+      text: The typed text. Case, spaces and brackets are ignored for names.
+      limit: The maximum number of results.
+
+    Returns:
+      The (name, color value) results, the names in alphabetical order.
+    """
+    value = text.strip().lower()
+    if not value:
+      return []
+    match = _HEX.fullmatch(value)
+    if match is not None and (value.startswith("#") or not self._has_prefix(_key(value))):
+      return [("#" + match.group(1), self._quantizer.nearest(*hex_to_rgb(match.group(1))))]
+    match = _RGB.fullmatch(value)
+    if match is not None:
+      channels = tuple(int(channel) for channel in match.groups())
+      if max(channels) < 256:
+        return [("rgb(%i, %i, %i)" % channels, self._quantizer.nearest(*channels))]
+      return []
+    key = _key(value)
+    if not key:
+      return []
+    start = bisect_left(self.keys, key)
+    results = []
+    for entry_key, name, color in self.entries[start:start + limit]:
+      if not entry_key.startswith(key):
+        break
+      results.append((name, color))
+    return results
+
+  def _has_prefix(self, key:str) -> bool:
+    # "cad" (cadetblue) or "dee" (deeppink) are hex colors and the start of names, names win without "#"
+    start = bisect_left(self.keys, key)
+    return start < len(self.keys) and self.keys[start].startswith(key)
+
+
+_name_index = None
+
+
+def name_index() -> NameIndex:
+  """The NameIndex shared by everything in the process. It is created with the first call.
+  """
+  global _name_index
+  if _name_index is None:
+    _name_index = NameIndex()
+  return _name_index
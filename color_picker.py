@@ -2,14 +2,28 @@
 """
 
 
+import asyncio
 import random as rnd
-import unicurses as uc
+import sys
+import time
 
 
-from constants import ROW_GRAY_INDEX, ROW_BASIC_INDEX, BASIC_COLOR_COUNT, BASIC_DIM_COLOR_COUNT, GRAY_COLOR_START, GRAY_COLOR_COUNT, COLOR_MAX
-from constants import BLACK, WHITE, RGB_COLOR_COUNT, RGB_MAX_VALUE, BASIC_COLOR_NAMES, _TC_W, _TC_G, _TC_O, _TC_Y, _TC_R, _TC_B, _TC_T
-from calculations import color_range, brightness_range, brightness, calc_color_256
-from functions import colored_256, escape_str
+from constants import ROW_GRAY_INDEX, ROW_BASIC_INDEX, BASIC_COLOR_COUNT, GRAY_COLOR_START, GRAY_COLOR_COUNT, COLOR_MAX, BLACK
+from constants import RGB_COLOR_COUNT, RGB_MAX_VALUE, BASIC_COLOR_NAMES, _TC_W, _TC_G, _TC_O, _TC_Y, _TC_R, _TC_B, _TC_T
+from constants import CURSOR_CELL, CURSOR_ROW, CURSOR_COL, TITLE_Y, BASIC_Y, RGB_Y, GRAY_Y, SELECTION_Y, TEXT_Y
+from constants import BASIC_CELL_X, BASIC_CELL_WIDTH, RGB_CELL_X, RGB_CELL_WIDTH, GRAY_CELL_X, GRAY_CELL_WIDTH, FRAME_RATE
+from constants import SIMILAR_X, SIMILAR_WIDTH, SIMILAR_COUNT
+from calculations import ColorField, palette_table, color_rgb
+from renderer import SpanRenderer
+from pairs import PairAllocator
+from colorspace import PaletteIndex, palette_index
+from quantize import Quantizer, default_quantizer
+from color_names import NameIndex, name_index
+from snippets import LANGUAGES, LANGUAGE_NAMES, MODES, FUNCTION, BRACKET, STRING, OPERATOR, VARIABLE, snippet, comment
+
+
+# the text colors of the kinds of tokens in the code snippets
+_TOKEN_COLORS = {FUNCTION: _TC_O, BRACKET: _TC_Y, STRING: _TC_R, OPERATOR: _TC_W, VARIABLE: _TC_B}
 
 
 class ColorPicker(object):
@@ -18,74 +32,176 @@ class ColorPicker(object):
   """
 
   screen:any # type:ignore
-  field:list[list[tuple[float,float,int,int,int]]]
+  curses:any # type:ignore
+  renderer:SpanRenderer
+  pairs:PairAllocator
+  field:ColorField
+  table:list[list[tuple[int,int,int,int,int]]]
   row:int
   col:int
+  hex_input:str|None
+  search_input:str|None
+  language:str
+  input_stats:dict[str,int]
+  _drawn:tuple[int,int,str,str]|None
 
   @property
   def selected_color(self):
     """The selected color value.
     """
-    if self.row <= ROW_BASIC_INDEX:
-      return self.col
-    if self.row >= ROW_GRAY_INDEX:
-      return self.col + GRAY_COLOR_START
-    m1,m2,r,g,b = self.field[self.row][self.col]
-    r = brightness(r, m1, m2)
-    g = brightness(g, m1, m2)
-    b = brightness(b, m1, m2)
-    return calc_color_256(r, g, b)
-
-  def __init__(self, screen):
+    return self._cell(self.row, self.col)[0]
+
+  def __init__(self, screen, curses=None, title_seed:int|None=None, profiler=None, palette:list[tuple[int,int,int]]|None=None):
+    """
+    Args:
+      screen: The window the color picker is drawn to.
+      curses: The module providing init_pair, color_pair, the attributes and the key codes. Default is unicurses.
+      title_seed: The seed of the title colors. By default a random seed is chosen, the colors stay the same while the color picker runs.
+      profiler: A FrameProfiler measuring the sections of each frame. Without a profiler nothing is measured.
+      palette: The RGB values of the 256 colors as the terminal shows them, for example probe.palette_rgb() of a probe result.
+        The similar colors, the text colors, the hex values and the search use them. Default are the xterm values.
+    """
+    if curses is None:
+      import unicurses as curses
     self.screen = screen
-    # creating a field of colors values with brigness multipliers
-    self.field = [[(m1,m2,r,g,b) for r,g,b in color_range()] for m1,m2 in brightness_range()]
+    self.curses = curses
+    # collects the text of a frame and writes it with as few curses calls as possible
+    self.renderer = SpanRenderer()
+    self._out = self.renderer
+    # the field of colors values with brigness multipliers, the cells are calculated when accessed
+    self.field = ColorField()
+    # precalculating the color values, channels and text colors of all cells
+    self.table = palette_table(self.field)
     self.row = (ROW_GRAY_INDEX - ROW_BASIC_INDEX) // 2
     self.col = 0
+    # the hex color typed after pressing '#', None if no hex color is typed
+    self.hex_input = None
+    # the name typed after pressing '/', None if no name is searched
+    self.search_input = None
+    self._search_results = [] # the (name, color value) matches of search_input
+    self._search_match = 0 # the index of the selected match
+    self._search_origin = None # the (row, col) before the search, restored by escape
+    # the language of the code snippets, changed with 'l'
+    self.language = LANGUAGES[0]
+    # the colors as the terminal shows them, the shared xterm tables are used without a palette
+    self.palette = palette
+    self._index = palette_index() if palette is None else PaletteIndex(palette)
+    self._quantizer = default_quantizer() if palette is None else Quantizer(palette=palette)
+    self._names = None
+    self._color_cells = None
+    # the (row, col, footer text, language) shown on the screen, None if the whole screen has to be drawn
+    self._drawn = None
+    # the title colors are chosen once, so redrawing the title doesn't change it
+    self.title_seed = rnd.randrange(1 << 30) if title_seed is None else title_seed
+    # the collected text of the parts that never change, drawn again without creating it again
+    self._layers = {} # name: (ops, pairs used, evictions before collecting)
+    self._show_similar = False
+    # the number of keys merged into frames by run()
+    self.input_stats = {"events": 0, "frames": 0, "merged": 0}
+    # the methods are only wrapped with a profiler, so without one they run unchanged
+    self.profiler = profiler
+    if profiler is not None:
+      profiler.attach(self)
 
     self._init_colors()
 
+  def _cell(self, row:int, col:int) -> tuple[int,int,int,int]:
+    return self.table[row - ROW_BASIC_INDEX][col]
+
+  def _find_color_cells(self) -> list[tuple[int,int]]:
+    # the (row, col) of each color value, rgb colors missing in the field use the nearest cell
+    cells = [None] * COLOR_MAX
+    for table_row, line in enumerate(self.table):
+      for col, (color, _, _, _) in enumerate(line):
+        if cells[color] is None:
+          cells[color] = (table_row + ROW_BASIC_INDEX, col)
+    rgb_cells = [(color_rgb(color), cell) for color, cell in enumerate(cells) if cell is not None and ROW_BASIC_INDEX < cell[0] < ROW_GRAY_INDEX]
+    for color in range(COLOR_MAX):
+      if cells[color] is None:
+        r, g, b = color_rgb(color)
+        _, cells[color] = min(rgb_cells, key=lambda item: (item[0][0] - r) ** 2 + (item[0][1] - g) ** 2 + (item[0][2] - b) ** 2)
+    return cells
+
+  def select_color(self, color:int):
+    """Moves the cursor to the cell of a color value.
+    Not all rgb colors are part of the field, for those the cell with the nearest color is selected.
+
+    Args:
+      color: The color value to select. (0-255)
+    """
+    if self._color_cells is None:
+      self._color_cells = self._find_color_cells()
+    self.row, self.col = self._color_cells[color]
+
+  def select_hex(self, hex_color:str):
+    """Moves the cursor to the cell of the palette color nearest to a hex color.
+
+    Args:
+      hex_color: The hex color like "#ff8800" or "#f80".
+
+    Raises:
+      ValueError: If the string is not a hex color.
+    """
+    self.select_color(self._quantizer.nearest_hex(hex_color))
+
   def _init_colors(self):
-    # init basic colors
-    for i in range(BASIC_COLOR_COUNT):
-      bg = i
-      fg = BLACK
-      if i == 0 or i == BASIC_DIM_COLOR_COUNT:
-        fg = WHITE
-      uc.init_pair(i, fg, bg)
-
-    # init rgb colors
-    for line in self.field:
-      for cell in line:
-        m1,m2,r,g,b = cell
-        r = brightness(r, m1, m2)
-        g = brightness(g, m1, m2)
-        b = brightness(b, m1, m2)
-        color = calc_color_256(r, g, b)
-        bg = color
-        fg = BLACK
-        if m1 < 1:
-          #fg = calc_color(brightness(r, 1, 1/2), brightness(g, 1, 1/2), brightness(b, 1, 1/2))
-          fg = WHITE
-        else:
-          #fg = calc_color(brightness(r, 0.75, 0), brightness(g, 0.75, 0), brightness(b, 0.75, 0))
-          pass
-        uc.init_pair(color, fg, bg)
-
-    # init gray colors
-    for i in range(GRAY_COLOR_START, COLOR_MAX):
-      bg = i
-      fg = BLACK
-      if i < (GRAY_COLOR_START + GRAY_COLOR_COUNT // 2):
-        fg = WHITE
-      uc.init_pair(i, fg, bg)
+    # the pairs are created when a color is drawn the first time, using the text color with the best contrast
+    self.pairs = PairAllocator(self.curses)
+    self._foregrounds = self._index.foregrounds
+
+  def _pair(self, color:int) -> int:
+    # the pair of a palette cell, the text color has the best contrast on the color
+    return self.pairs.attr(self._foregrounds[color], color)
+
+  def _text_pair(self, color:int) -> int:
+    # the pair of colored text, drawn reversed so the color is the text on a black background
+    # the text of the title and the frames is always on the screen, so its few pairs are pinned
+    return self.pairs.attr(BLACK, color, pin=True)
 
   def _add_colored_str(self, color:int, text:str):
-    self.screen.attron(uc.color_pair(color) | uc.A_REVERSE)
-    self.screen.addstr(text)
-    self.screen.attroff(uc.color_pair(color) | uc.A_REVERSE)
+    self._out.addstr(text, self._text_pair(color) | self.curses.A_REVERSE)
+
+  def _section(self, row:int) -> int:
+    if row <= ROW_BASIC_INDEX:
+      return ROW_BASIC_INDEX
+    if row >= ROW_GRAY_INDEX:
+      return ROW_GRAY_INDEX
+    return 0
+
+  def _cell_str(self, row:int, col:int) -> str:
+    if self.row == row and self.col == col:
+      return CURSOR_CELL
+    return "  "
+
+  def _layer(self, name:str, display):
+    # collects the text written by display once and adds it to the frame
+    pairs = self.pairs
+    layer = self._layers.get(name)
+    if layer is not None and layer[2] != pairs.evictions and not pairs.pinned(layer[1]):
+      # a pair used by the collected text might have been changed to other colors
+      layer = None
+    if layer is None:
+      out = self._out
+      self._out = SpanRenderer()
+      evictions = pairs.evictions
+      pairs.used = used = set()
+      try:
+        display()
+        ops = self._out.take()
+      finally:
+        self._out = out
+        pairs.used = None
+      layer = self._layers[name] = (ops, used, evictions)
+    else:
+      # the pairs of the replayed text are used in this frame as well
+      pairs.touch(layer[1])
+    self.renderer.replay(layer[0])
 
   def _display_title(self):
+    self._layer("title", self._display_title_layer)
+
+  def _display_title_layer(self):
+    title_colors = rnd.Random(self.title_seed)
     msg_lines = [
       "  ____      _              ____  _      _               ",
       " / ___|___ | | ___  _ __  |  _ \\(_) ___| | _____ _ __ _ ",
@@ -93,119 +209,165 @@ class ColorPicker(object):
       "| |__| (_) | | (_) | |    |  __/| | (__|   <  __/ |   _ ",
       " \\____\\___/|_|\\___/|_|    |_|   |_|\\___|_|\\_\\___|_|  (_)"
     ]
+    self._out.move(TITLE_Y, 0)
     for line in msg_lines:
-      self.screen.addstr("     ")
+      self._out.addstr("     ")
+      color = title_colors.choice(_TC_T)
       for c in line:
-        self._add_colored_str(rnd.choice(_TC_T), c)
-      self.screen.addstr("\n")
-    self.screen.addstr("\n")
+        # spaces look the same in every title color and continue the current run
+        if c != " ":
+          color = title_colors.choice(_TC_T)
+        self._add_colored_str(color, c)
+      self._out.addstr("\n")
+    self._out.addstr("\n")
 
   def _display_basic_colors(self):
     if self.row != ROW_BASIC_INDEX:
-      self.screen.attron(uc.A_DIM)
-    self.screen.addstr("       ┌")
-    self.screen.addstr("───" * BASIC_COLOR_COUNT)
-    self.screen.addstr("─┐\n       │")
+      self._out.attron(self.curses.A_DIM)
+    self._out.move(BASIC_Y, 0)
+    self._out.addstr("       ┌")
+    self._out.addstr("───" * BASIC_COLOR_COUNT)
+    self._out.addstr("─┐\n       │")
     for i in range(BASIC_COLOR_COUNT):
-      self.screen.addstr(" ")
-      self.screen.attron(uc.COLOR_PAIR(i))
-      cell = "  "
-      if self.row == ROW_BASIC_INDEX and self.col == i:
-        cell = ""
-      self.screen.addstr(cell)
-      self.screen.attroff(uc.COLOR_PAIR(i))
-    self.screen.addstr(" │")
-    if self.row == ROW_BASIC_INDEX:
-      self.screen.addstr(" ")
-    self.screen.addstr("\n       │")
+      self._out.addstr(" ")
+      self._out.addstr(self._cell_str(ROW_BASIC_INDEX, i), self._pair(i))
+    self._out.addstr(" │")
+    self._display_row_marker(ROW_BASIC_INDEX)
+    self._display_basic_cursor()
+    self._out.addstr("       └")
+    self._out.addstr("───" * BASIC_COLOR_COUNT)
+    self._out.addstr("─┘\n")
+    self._out.attroff(self.curses.A_DIM)
+
+  def _display_basic_cursor(self):
+    self._out.move(BASIC_Y + 2, 0)
+    self._out.addstr("       │")
     col_actual = self.col
     if col_actual > BASIC_COLOR_COUNT - 1:
       col_actual = BASIC_COLOR_COUNT - 1
-    self.screen.addstr("   " * col_actual)
+    self._out.addstr("   " * col_actual)
     if self.row == ROW_BASIC_INDEX:
-      self.screen.addstr(" ")
+      self._out.addstr(" " + CURSOR_COL)
     else:
-      self.screen.addstr("   ")
-    self.screen.addstr("   " * (BASIC_COLOR_COUNT - col_actual - 1))
-    self.screen.addstr(" │\n")
-    self.screen.addstr("       └")
-    self.screen.addstr("───" * BASIC_COLOR_COUNT)
-    self.screen.addstr("─┘\n")
-    self.screen.attroff(uc.A_DIM)
+      self._out.addstr("   ")
+    self._out.addstr("   " * (BASIC_COLOR_COUNT - col_actual - 1))
+    self._out.addstr(" │\n")
 
   def _display_rgb_colors(self):
     if self.row <= ROW_BASIC_INDEX or self.row >= ROW_GRAY_INDEX:
-      self.screen.attron(uc.A_DIM)
+      self._out.attron(self.curses.A_DIM)
     line_index = 0
-    self.screen.addstr(" ┌──")
-    self.screen.addstr("──" * RGB_COLOR_COUNT * RGB_MAX_VALUE)
-    self.screen.addstr("──┐\n")
-    for line in self.field:
+    self._out.move(RGB_Y, 0)
+    self._out.addstr(" ┌──")
+    self._out.addstr("──" * RGB_COLOR_COUNT * RGB_MAX_VALUE)
+    self._out.addstr("──┐\n")
+    for line in self.table[1:-1]:
       col_index = 0
-      self.screen.addstr(" │ ")
-      for cell in line:
-        m1,m2,r,g,b = cell
-        r = brightness(r, m1, m2)
-        g = brightness(g, m1, m2)
-        b = brightness(b, m1, m2)
-        color = calc_color_256(r, g, b)
-        self.screen.attron(uc.COLOR_PAIR(color))
-        cell = "  "
-        if self.row == line_index and self.col == col_index:
-          cell = ""
-        self.screen.addstr(cell)
-        self.screen.attroff(uc.COLOR_PAIR(color))
+      self._out.addstr(" │ ")
+      for color, _, _, _ in line:
+        self._out.addstr(self._cell_str(line_index, col_index), self._pair(color))
         col_index += 1
-      self.screen.addstr(" │")
-      if self.row == line_index:
-        self.screen.addstr(" ")
-      self.screen.addstr("\n")
+      self._out.addstr(" │")
+      self._display_row_marker(line_index)
       line_index += 1
-    self.screen.addstr(" │ ")
-    self.screen.addstr("  " * self.col)
+    self._display_rgb_cursor()
+    self._out.addstr(" └──")
+    self._out.addstr("──" * RGB_COLOR_COUNT * RGB_MAX_VALUE)
+    self._out.addstr("──┘\n\n")
+    self._out.attroff(self.curses.A_DIM)
+
+  def _display_rgb_cursor(self):
+    self._out.move(RGB_Y + ROW_GRAY_INDEX + 1, 0)
+    self._out.addstr(" │ ")
+    self._out.addstr("  " * self.col)
     if self.row > ROW_BASIC_INDEX and self.row < ROW_GRAY_INDEX:
-      self.screen.addstr("")
+      self._out.addstr(CURSOR_COL)
     else:
-      self.screen.addstr("  ")
-    self.screen.addstr("  " * (RGB_COLOR_COUNT * RGB_MAX_VALUE - self.col))
-    self.screen.addstr(" │\n")
-    self.screen.addstr(" └──")
-    self.screen.addstr("──" * RGB_COLOR_COUNT * RGB_MAX_VALUE)
-    self.screen.addstr("──┘\n\n")
-    self.screen.attroff(uc.A_DIM)
+      self._out.addstr("  ")
+    self._out.addstr("  " * (RGB_COLOR_COUNT * RGB_MAX_VALUE - self.col))
+    self._out.addstr(" │\n")
 
   def _display_gray_colors(self):
     if self.row < ROW_GRAY_INDEX:
-      self.screen.attron(uc.A_DIM)
-    self.screen.addstr("       ┌")
-    self.screen.addstr("──" * GRAY_COLOR_COUNT)
-    self.screen.addstr("──┐\n       │ ")
+      self._out.attron(self.curses.A_DIM)
+    self._out.move(GRAY_Y, 0)
+    self._out.addstr("       ┌")
+    self._out.addstr("──" * GRAY_COLOR_COUNT)
+    self._out.addstr("──┐\n       │ ")
     for i in range(GRAY_COLOR_START, COLOR_MAX):
-      self.screen.attron(uc.COLOR_PAIR(i))
-      cell = "  "
-      if self.row == ROW_GRAY_INDEX and self.col == i - GRAY_COLOR_START:
-        cell = ""
-      self.screen.addstr(cell)
-      self.screen.attroff(uc.COLOR_PAIR(i))
-    self.screen.addstr(" │")
-    if self.row == ROW_GRAY_INDEX:
-      self.screen.addstr(" ")
-    self.screen.addstr("\n")
-    self.screen.addstr("       │ ")
+      self._out.addstr(self._cell_str(ROW_GRAY_INDEX, i - GRAY_COLOR_START), self._pair(i))
+    self._out.addstr(" │")
+    self._display_row_marker(ROW_GRAY_INDEX)
+    self._display_gray_cursor()
+    self._out.addstr("       └")
+    self._out.addstr("──" * GRAY_COLOR_COUNT)
+    self._out.addstr("──┘\n\n")
+    self._out.attroff(self.curses.A_DIM)
+
+  def _display_gray_cursor(self):
+    self._out.move(GRAY_Y + 2, 0)
+    self._out.addstr("       │ ")
     col_actual = self.col
     if col_actual > (GRAY_COLOR_COUNT - 1):
       col_actual = GRAY_COLOR_COUNT - 1
-    self.screen.addstr("  " * col_actual)
+    self._out.addstr("  " * col_actual)
     if self.row == ROW_GRAY_INDEX:
-      self.screen.addstr("")
+      self._out.addstr(CURSOR_COL)
+    else:
+      self._out.addstr("  ")
+    self._out.addstr("  " * (GRAY_COLOR_COUNT - col_actual - 1))
+    self._out.addstr(" │\n")
+
+  def _display_row_marker(self, row:int):
+    # the marker is written right after the border of the row and clears the rest of the line
+    if self.row == row:
+      self._out.addstr(" " + CURSOR_ROW)
+    self._out.addstr("\n")
+
+  def _display_cell(self, row:int, col:int):
+    color = self._cell(row, col)[0]
+    if row <= ROW_BASIC_INDEX:
+      self._out.move(BASIC_Y + 1, BASIC_CELL_X + BASIC_CELL_WIDTH * col)
+    elif row >= ROW_GRAY_INDEX:
+      self._out.move(GRAY_Y + 1, GRAY_CELL_X + GRAY_CELL_WIDTH * col)
+    else:
+      self._out.move(RGB_Y + 1 + row, RGB_CELL_X + RGB_CELL_WIDTH * col)
+    self._out.addstr(self._cell_str(row, col), self._pair(color))
+    if row > ROW_BASIC_INDEX and row < ROW_GRAY_INDEX:
+      # the marker of an rgb row is behind the last cell of the row
+      self._out.move(RGB_Y + 1 + row, RGB_CELL_X + RGB_CELL_WIDTH * len(self.table[row - ROW_BASIC_INDEX]) + 2)
+      self._display_row_marker(row)
+
+  def _display_section(self, section:int):
+    if section == ROW_BASIC_INDEX:
+      self._display_basic_colors()
+    elif section == ROW_GRAY_INDEX:
+      self._display_gray_colors()
+    else:
+      self._display_rgb_colors()
+
+  def _display_section_cursor(self, section:int):
+    if section == ROW_BASIC_INDEX:
+      self._display_basic_cursor()
+    elif section == ROW_GRAY_INDEX:
+      self._display_gray_cursor()
     else:
-      self.screen.addstr("  ")
-    self.screen.addstr("  " * (GRAY_COLOR_COUNT - col_actual - 1))
-    self.screen.addstr(" │\n")
-    self.screen.addstr("       └")
-    self.screen.addstr("──" * GRAY_COLOR_COUNT)
-    self.screen.addstr("──┘\n\n")
-    self.screen.attroff(uc.A_DIM)
+      self._display_rgb_cursor()
+
+  def _display_selection_layer(self):
+    # the border of the selection, the inside is drawn by _display_selection
+    self._out.move(SELECTION_Y, 0)
+    self._out.addstr(" ┌─")
+    self._out.addstr("─" * 62)
+    self._out.addstr("─┐\n")
+    for y in range(SELECTION_Y + 1, SELECTION_Y + 16):
+      self._out.move(y, 0)
+      self._out.addstr(" │ ")
+      self._out.move(y, 65)
+      self._out.addstr(" │\n")
+    self._out.addstr(" └─")
+    self._out.addstr("─" * 62)
+    self._out.addstr("─┘\n")
 
   def _display_selection(self):
     color = self.selected_color
@@ -233,10 +395,7 @@ class ColorPicker(object):
         " = %3i                    " % color
       ]
     else:
-      m1,m2,r,g,b = self.field[self.row][self.col]
-      r = brightness(r, m1, m2)
-      g = brightness(g, m1, m2)
-      b = brightness(b, m1, m2)
+      _, r, g, b = self._cell(self.row, self.col)
       lines = [
         " RGB Color (16 - 231)     ",
         "‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾‾    ",
@@ -255,93 +414,91 @@ class ColorPicker(object):
       lines.append(" " * 26)
     lines = [" " * 26, *lines, " " * 26]
 
-    self.screen.addstr(" ┌─")
-    self.screen.addstr("─" * 62)
-    self.screen.addstr("─┐\n")
-    self.screen.addstr(" │ ")
-    uc.attron(uc.color_pair(color))
-    self.screen.addstr(" " * 62)
-    uc.attroff(uc.color_pair(color))
-    self.screen.addstr(" │\n")
-    for line in lines:
-      self.screen.addstr(" │ ")
-      uc.attron(uc.color_pair(color))
-      self.screen.addstr(" " * 32)
-      uc.attroff(uc.color_pair(color))
-      uc.attron(uc.A_REVERSE)
-      self.screen.addstr(" " + line + " ")
-      uc.attroff(uc.A_REVERSE)
-      uc.attron(uc.color_pair(color))
-      self.screen.addstr("  ")
-      uc.attroff(uc.color_pair(color))
-      self.screen.addstr(" │\n")
-    self.screen.addstr(" │ ")
-    uc.attron(uc.color_pair(color))
-    self.screen.addstr(" " * 62)
-    uc.attroff(uc.color_pair(color))
-    self.screen.addstr(" │\n")
-    self.screen.addstr(" └─")
-    self.screen.addstr("─" * 62)
-    self.screen.addstr("─┘\n")
-
-  def _display_text(self):
-    selected_color = self.selected_color
-    color_start_fg, color_start_bg, _, color_end = colored_256(selected_color, "text", return_parts=True, background=True)
-    extra = ""
-    if selected_color < 10:
-      extra += " "
-    if selected_color < 100:
-      extra += " "
+    self._out.move(SELECTION_Y + 1, 3)
+    self._out.addstr(" " * 62, self._pair(color))
+    for y, line in enumerate(lines, SELECTION_Y + 2):
+      self._out.move(y, 3)
+      self._out.addstr(" " * 32, self._pair(color))
+      self._out.addstr(" " + line + " ", self.curses.A_REVERSE)
+      self._out.addstr("  ", self._pair(color))
+    self._out.move(SELECTION_Y + 15, 3)
+    self._out.addstr(" " * 62, self._pair(color))
+
+  def _similar_visible(self) -> bool:
+    # the similar colors are only shown if they fit on the screen
+    try:
+      _, width = self.screen.getmaxyx()
+    except (AttributeError, TypeError, ValueError):
+      return False
+    return width >= SIMILAR_X + SIMILAR_WIDTH
+
+  def _display_similar(self):
+    if not self._show_similar:
+      return
+    color = self.selected_color
+    index = self._index
+    self._out.move(SELECTION_Y, SIMILAR_X)
+    self._out.addstr(" Similar Colors".ljust(SIMILAR_WIDTH))
+    self._out.move(SELECTION_Y + 1, SIMILAR_X)
+    self._out.addstr(" ‾‾‾‾‾‾‾‾‾‾‾‾‾‾".ljust(SIMILAR_WIDTH))
+    for y, other in enumerate(index.nearest(color, SIMILAR_COUNT), SELECTION_Y + 2):
+      self._out.move(y, SIMILAR_X)
+      self._out.addstr(" ")
+      self._out.addstr("    ", self._pair(other))
+      self._out.addstr((" %3i  ΔE %5.1f" % (other, index.distance(color, other))).ljust(SIMILAR_WIDTH - 5))
+    foreground = index.foreground(color)
+    self._out.move(SELECTION_Y + SIMILAR_COUNT + 3, SIMILAR_X)
+    self._out.addstr((" Text: %s %4.1f:1" % ("Black" if foreground == BLACK else "White", index.contrast(color, foreground))).ljust(SIMILAR_WIDTH))
+    self._out.move(SELECTION_Y + SIMILAR_COUNT + 4, SIMILAR_X)
+    self._out.addstr((" Hex:  #%02x%02x%02x" % index.rgb[color]).ljust(SIMILAR_WIDTH))
+
+  def _display_text_layer(self):
+    # the box and the comments of the escape sequences, the code is drawn by _display_code
+    self._out.move(TEXT_Y, 0)
     self._add_colored_str(_TC_W, " ┌────────────────────────────────────────────────────────────────┐\n")
     self._add_colored_str(_TC_W, " │ You can use the following escape sequences to change the text  │\n")
-    self._add_colored_str(_TC_W, " │ color:                                                         │\n")
+    self._add_colored_str(_TC_W, (" │ color in %s (press 'l' for other languages):" % LANGUAGE_NAMES[self.language]).ljust(66) + "│\n")
     self._add_colored_str(_TC_W, " ├────────────────────────────────────────────────────────────────┤\n")
-    self._add_colored_str(_TC_W, " │ ")
-    self._add_colored_str(_TC_G, "# Foreground:")
-    self._add_colored_str(_TC_W, (" " * 50) + "│\n")
-    self._add_colored_str(_TC_W, " │ ")
-    self._add_colored_str(_TC_O, "print")
-    self._add_colored_str(_TC_Y, "(")
-    self._add_colored_str(_TC_R, escape_str(color_start_fg))
-    self._add_colored_str(_TC_W,  " + ")
-    self._add_colored_str(_TC_B,  "text")
-    self._add_colored_str(_TC_W,  " + ")
-    self._add_colored_str(_TC_R, escape_str(color_end))
-    self._add_colored_str(_TC_Y, ")")
-    self._add_colored_str(_TC_W, extra + (" " * 21) + "│\n")
-    self._add_colored_str(_TC_W, " │" + (" " * 64) + "│\n")
-    self._add_colored_str(_TC_W, " │ ")
-    self._add_colored_str(_TC_G, "# Background:")
-    self._add_colored_str(_TC_W, (" " * 50) + "│\n")
-    self._add_colored_str(_TC_W, " │ ")
-    self._add_colored_str(_TC_O, "print")
-    self._add_colored_str(_TC_Y, "(")
-    self._add_colored_str(_TC_R, escape_str(color_start_bg))
-    self._add_colored_str(_TC_W,  " + ")
-    self._add_colored_str(_TC_B,  "text")
-    self._add_colored_str(_TC_W,  " + ")
-    self._add_colored_str(_TC_R, escape_str(color_end))
-    self._add_colored_str(_TC_Y, ")")
-    self._add_colored_str(_TC_W, extra + (" " * 21) + "│\n")
-    self._add_colored_str(_TC_W, " │" + (" " * 64) + "│\n")
-    self._add_colored_str(_TC_W, " │ ")
-    self._add_colored_str(_TC_G, "# Both combined:")
-    self._add_colored_str(_TC_W, (" " * 47) + "│\n")
-    self._add_colored_str(_TC_W, " │ ")
-    self._add_colored_str(_TC_O, "print")
-    self._add_colored_str(_TC_Y, "(")
-    self._add_colored_str(_TC_R, escape_str(color_start_fg))
-    self._add_colored_str(_TC_W,  " + ")
-    self._add_colored_str(_TC_R, escape_str(color_start_bg))
-    self._add_colored_str(_TC_W,  " + ")
-    self._add_colored_str(_TC_B,  "text")
-    self._add_colored_str(_TC_W,  " + ")
-    self._add_colored_str(_TC_R, escape_str(color_end))
-    self._add_colored_str(_TC_Y, ")")
-    self._add_colored_str(_TC_W, extra + extra + "  │\n")
-    self._add_colored_str(_TC_W, " │                                                                │\n")
+    for y, mode in zip((TEXT_Y + 4, TEXT_Y + 7, TEXT_Y + 10), MODES):
+      text = comment(self.language, mode)
+      self._add_colored_str(_TC_W, " │ ")
+      self._add_colored_str(_TC_G, text)
+      self._add_colored_str(_TC_W, (" " * (63 - len(text))) + "│\n")
+      self._add_colored_str(_TC_W, " │ ")
+      self._out.move(y + 1, 66)
+      self._add_colored_str(_TC_W, "│\n")
+      self._add_colored_str(_TC_W, " │" + (" " * 64) + "│\n")
     self._add_colored_str(_TC_W, " └────────────────────────────────────────────────────────────────┘\n")
-    self.screen.addstr(" " * 25 + "Press 'q' to quit.")
+
+  def _display_text(self):
+    self._layer("text " + self.language, self._display_text_layer)
+    self._display_code()
+    self._display_footer()
+
+  def _display_code(self):
+    # the snippets are cached, so a color seen before is drawn without creating any text
+    selected_color = self.selected_color
+    for y, mode in zip((TEXT_Y + 5, TEXT_Y + 8, TEXT_Y + 11), MODES):
+      self._out.move(y, 3)
+      for kind, text in snippet(selected_color, self.language, mode, 63):
+        self._add_colored_str(_TOKEN_COLORS[kind], text)
+
+  def _footer_text(self) -> str:
+    if self.search_input is not None:
+      if self._search_results:
+        name, color = self._search_results[self._search_match]
+        found = "%s = %i (%i/%i)" % (name, color, self._search_match + 1, len(self._search_results))
+      else:
+        found = "no match" if self.search_input else "name, #hex or rgb()"
+      text = "Search: %s  %s" % (self.search_input, found)
+      return (" " * max(1, min(25, 70 - len(text))) + text)[:70] # moved to the left for long names
+    if self.hex_input is not None:
+      return " " * 25 + "Hex color: #" + self.hex_input
+    return " " * 25 + "Press 'q' to quit, '#' hex color, '/' search."
+
+  def _display_footer(self):
+    self._out.move(TEXT_Y + 14, 0)
+    self._out.addstr(self._footer_text().ljust(70))
 
   def draw(self):
     """Draw the color picker to the screen.
@@ -356,19 +513,61 @@ class ColorPicker(object):
         color_picker.handle_input(user_input)
     """
     try:
-      self.screen.move(0, 0)
-      self._display_title()
-      self._display_basic_colors()
-      self._display_rgb_colors()
-      self._display_gray_colors()
-      self._display_selection()
-      self._display_text()
+      if self._drawn is None:
+        self._display_title()
+        self._display_basic_colors()
+        self._display_rgb_colors()
+        self._display_gray_colors()
+        self._layer("selection", self._display_selection_layer)
+        self._display_selection()
+        self._show_similar = self._similar_visible()
+        self._display_similar()
+        self._display_text()
+      else:
+        old_row, old_col, old_footer, old_language = self._drawn
+        if (old_row, old_col) != (self.row, self.col):
+          self._display_changes(old_row, old_col)
+        if old_footer != self._footer_text():
+          self._display_footer()
+        if old_language != self.language:
+          self._layer("text " + self.language, self._display_text_layer)
+          self._display_code()
+      self.pairs.flush()
+      self.renderer.flush(self.screen)
+      self._drawn = (self.row, self.col, self._footer_text(), self.language)
       self.screen.refresh()
     except Exception as _:
+      self.renderer.discard()
+      self._drawn = None
       self.screen.clear()
       self.screen.addstr("Draw Error!")
       self.screen.refresh()
 
+  def _display_changes(self, old_row:int, old_col:int):
+    # only repaint what changed since the last frame
+    old_section = self._section(old_row)
+    section = self._section(self.row)
+    if old_section != section:
+      # dimming, cursors and markers of both sections change
+      self._display_section(old_section)
+      self._display_section(section)
+    else:
+      self._display_cell(old_row, old_col)
+      self._display_cell(self.row, self.col)
+      if old_col != self.col:
+        self._display_section_cursor(section)
+    if self._cell(old_row, old_col)[0] != self.selected_color:
+      # the borders and the fixed text stay on the screen
+      self._display_selection()
+      self._display_similar()
+      self._display_code()
+
+  def invalidate(self):
+    """Forces the next call of draw() to repaint the whole screen.
+    Call this if the screen was cleared or changed by someone else.
+    """
+    self._drawn = None
+
   def handle_input(self, user_input:int):
     """Handle the user input. This function should be called after the user input is read.
     If you don't have a reasont to call this function manually, use the run() function instead.
@@ -384,15 +583,33 @@ class ColorPicker(object):
         color_picker.handle_input(user_input)
     """
 
+    if self.hex_input is not None:
+      self._handle_hex_input(user_input)
+      return
+    if self.search_input is not None:
+      self._handle_search_input(user_input)
+      return
+
     # handle user input
-    if user_input == uc.KEY_UP:
+    if user_input == self.curses.KEY_UP:
       self.row -= 1
-    elif user_input == uc.KEY_DOWN:
+    elif user_input == self.curses.KEY_DOWN:
       self.row += 1
-    elif user_input == uc.KEY_LEFT:
+    elif user_input == self.curses.KEY_LEFT:
       self.col -= 1
-    elif user_input == uc.KEY_RIGHT:
+    elif user_input == self.curses.KEY_RIGHT:
       self.col += 1
+    elif user_input == self.curses.KEY_RESIZE:
+      self.invalidate()
+    elif user_input == ord('#'):
+      self.hex_input = ""
+    elif user_input == ord('/'):
+      self.search_input = ""
+      self._search_results = []
+      self._search_match = 0
+      self._search_origin = (self.row, self.col)
+    elif user_input == ord('l'):
+      self.language = LANGUAGES[(LANGUAGES.index(self.language) + 1) % len(LANGUAGES)]
 
     # correct values
     if self.row < ROW_BASIC_INDEX:
@@ -411,18 +628,166 @@ class ColorPicker(object):
     if self.col > max_col:
       self.col = max_col
 
-  def run(self, exit_key:int=ord('q')):
+  def _handle_hex_input(self, user_input:int):
+    if user_input == 27: # escape
+      self.hex_input = None
+    elif user_input in (self.curses.KEY_BACKSPACE, 127, 8):
+      self.hex_input = self.hex_input[:-1]
+    elif user_input in (self.curses.KEY_ENTER, 10, 13):
+      if len(self.hex_input) == 3:
+        self.select_hex(self.hex_input)
+      self.hex_input = None
+    elif 0 <= user_input < 128 and chr(user_input) in "0123456789abcdefABCDEF":
+      self.hex_input += chr(user_input).lower()
+      if len(self.hex_input) == 6:
+        self.select_hex(self.hex_input)
+        self.hex_input = None
+    elif user_input == self.curses.KEY_RESIZE:
+      self.invalidate()
+
+  def _handle_search_input(self, user_input:int):
+    # every typed key searches again and moves the cursor to the first match
+    if user_input == 27: # escape
+      self.row, self.col = self._search_origin
+      self.search_input = None
+    elif user_input in (self.curses.KEY_ENTER, 10, 13):
+      self.search_input = None
+    elif user_input in (self.curses.KEY_BACKSPACE, 127, 8):
+      self._search(self.search_input[:-1])
+    elif user_input in (9, self.curses.KEY_DOWN, self.curses.KEY_UP): # tab and the arrows select the other matches
+      if self._search_results:
+        step = -1 if user_input == self.curses.KEY_UP else 1
+        self._search_match = (self._search_match + step) % len(self._search_results)
+        self.select_color(self._search_results[self._search_match][1])
+    elif 32 <= user_input < 127:
+      self._search(self.search_input + chr(user_input))
+    elif user_input == self.curses.KEY_RESIZE:
+      self.invalidate()
+
+  def _search(self, text:str):
+    self.search_input = text
+    if self._names is None:
+      self._names = name_index() if self.palette is None else NameIndex(self.palette)
+    self._search_results = self._names.search(text, limit=len(self._names)) # all matches, tab goes through each of them
+    self._search_match = 0
+    if self._search_results:
+      self.select_color(self._search_results[0][1])
+    elif not text:
+      self.row, self.col = self._search_origin
+
+  @property
+  def _typing(self) -> bool:
+    # while a hex color or a name is typed, the exit key is part of the text
+    return self.hex_input is not None or self.search_input is not None
+
+  def run(self, exit_key:int=ord('q'), frame_rate:float|None=FRAME_RATE):
     """Run the color picker until the exit key is pressed.
+    The screen is drawn at most frame_rate times per second. All keys pressed in between are read without waiting and applied
+    before the next frame is drawn. How many keys were merged into fewer frames is stored in input_stats:
+      - events: The number of keys handled.
+      - frames: The number of frames drawn after handling keys.
+      - merged: The number of keys that did not need a frame of their own.
 
     Args:
       exit_key: The key code that will exit the color picker. default: ord('q')
+      frame_rate: The maximum number of frames per second. None or 0 draws as soon as all pending keys are handled.
 
     Example:
       color_picker = ColorPicker(screen)
       color_picker.run()
     """
+    interval = 1 / frame_rate if frame_rate else 0
+    self.input_stats = {"events": 0, "frames": 0, "merged": 0}
+    screen = self.screen
     action = 0
     while action != exit_key:
       self.draw()
-      action = self.screen.getch()
-      self.handle_input(action)
+      frame_end = time.monotonic() + interval
+      action = screen.getch()
+      # apply every key pressed until the next frame is due, so held keys don't queue up frames
+      events = 0
+      screen.nodelay(True)
+      while action != -1 and (action != exit_key or self._typing):
+        events += 1
+        self.handle_input(action)
+        action = screen.getch()
+        if action == -1:
+          remaining = frame_end - time.monotonic()
+          if remaining > 0:
+            screen.timeout(max(1, int(remaining * 1000)))
+            action = screen.getch()
+            screen.nodelay(True)
+      screen.nodelay(False)
+      if events:
+        self.input_stats["events"] += events
+        self.input_stats["frames"] += 1
+        self.input_stats["merged"] += events - 1
+
+  def _input_fds(self) -> list[int]:
+    # the screens of this package know their file descriptors, curses reads from stdin
+    filenos = getattr(self.screen, "filenos", None)
+    if filenos is not None:
+      return list(filenos())
+    return [sys.stdin.fileno()]
+
+  async def pick(self, exit_key:int=ord('q'), frame_rate:float|None=FRAME_RATE, fds:list[int]|None=None) -> int|None:
+    """Let the user pick a color without blocking the event loop, so other coroutines of the application keep running.
+    The keys are read when the event loop reports that the input is readable. Enter picks the selected color and the exit key
+    closes the color picker without a color. Keys are merged into frames like in run().
+
+    Cancelling the task stops the color picker at the next await. The screen is left as it is and getch() waits for keys again.
+    With curses a resize of the terminal is noticed with the next key, because curses handles the resize signal itself.
+
+    Args:
+      exit_key: The key code that closes the color picker without picking a color. default: ord('q')
+      frame_rate: The maximum number of frames per second. None or 0 draws after all pending keys are handled.
+      fds: The file descriptors to wait for. Default is the input of the screen or stdin.
+
+    Returns:
+      The picked color value or None if the exit key was pressed.
+
+    Example:
+      color_picker = ColorPicker(screen)
+      color = await asyncio.wait_for(color_picker.pick(), timeout=60)
+    """
+    loop = asyncio.get_running_loop()
+    if fds is None:
+      fds = self._input_fds()
+    interval = 1 / frame_rate if frame_rate else 0
+    enter_keys = (self.curses.KEY_ENTER, 10, 13)
+    self.input_stats = {"events": 0, "frames": 0, "merged": 0}
+    screen = self.screen
+    ready = asyncio.Event()
+    for fd in fds:
+      loop.add_reader(fd, ready.set)
+    screen.nodelay(True)
+    try:
+      self.draw()
+      while True:
+        await ready.wait()
+        ready.clear()
+        frame_end = loop.time() + interval
+        events = 0
+        action = screen.getch()
+        while action != -1:
+          if not self._typing:
+            if action == exit_key:
+              return None
+            if action in enter_keys:
+              return self.selected_color
+          events += 1
+          self.handle_input(action)
+          action = screen.getch()
+        if events:
+          self.draw()
+          self.input_stats["events"] += events
+          self.input_stats["frames"] += 1
+          self.input_stats["merged"] += events - 1
+        remaining = frame_end - loop.time()
+        if remaining > 0:
+          # keys pressed in the meantime are handled together with the next frame
+          await asyncio.sleep(remaining)
+    finally:
+      for fd in fds:
+        loop.remove_reader(fd)
+      screen.nodelay(False)
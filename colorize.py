@@ -0,0 +1,219 @@
+""" This module colors the matches of regular expressions in a stream, for example to highlight the levels of log messages.
+
+The stream is read and written as bytes in chunks that end at a line break, so the memory used stays the same for streams of any size.
+A match can therefore not span several lines. Each chunk is searched once for each rule by the regular expression engine and the
+matches of all rules are then merged and written in a single pass. Where matches of several rules overlap, the match starting first
+is colored; for matches starting at the same position the rule given first wins. A rule whose match was overlapped is searched again
+from the end of the colored match, so the result is the same as with one regular expression with an alternative for each rule.
+
+Searching the rules separately is faster than one regular expression with an alternative for each rule, because Python's engine
+tries every alternative at every position, while a single pattern can skip ahead to the next possible match.
+
+Usage:
+  tail -f app.log | ncolorpicker colorize --rule 'ERROR=196' --rule 'WARN(ING)?=214' --rule '\\d+ms=75'
+"""
+
+
+import argparse
+import heapq
+import os
+import re
+import sys
+
+from constants import COLOR_MAX
+from functions import FG_ESCAPES_BYTES, BG_ESCAPES_BYTES, FG_BG_ESCAPES_BYTES, RESET_BYTES
+
+
+CHUNK_SIZE = 1 << 16 # bytes read at once
+MAX_LINE = 1 << 20 # longer lines are split, so a single line can't use more memory
+
+
+def _search(regex, data:bytes, pos:int):
+  # the next match that is not empty, empty matches are not colored
+  length = len(data)
+  while True:
+    match = regex.search(data, pos)
+    if match is None or match.end() > match.start():
+      return match
+    if match.start() >= length:
+      return None
+    pos = match.start() + 1
+
+
+class Colorizer(object):
+  """Colors the matches of several rules in one pass.
+
+  Args:
+    rules: The (pattern, color) rules. The first rule matching at a position wins.
+    foreground: If True, the foreground color of the matches is set.
+    background: If True, the background color of the matches is set.
+    ignore_case: If True, the patterns ignore the case.
+
+  Example:
+    colorizer = Colorizer([("ERROR", 196), ("WARN", 214)])
+    colorizer.colorize(b"WARN: disk full\\n") # b"\\033[38;5;214mWARN\\033[0m: disk full\\n"
+  """
+
+  def __init__(self, rules:list[tuple[str|bytes,int]], foreground:bool=True, background:bool=False, ignore_case:bool=False):
+    if not rules:
+      raise ValueError("at least one rule is needed")
+    if foreground and background:
+      escapes = FG_BG_ESCAPES_BYTES
+    elif background:
+      escapes = BG_ESCAPES_BYTES
+    else:
+      escapes = FG_ESCAPES_BYTES
+    self.rules = []
+    for pattern, color in rules:
+      if not 0 <= color < COLOR_MAX:
+        raise ValueError("the color has to be between 0 and 255")
+      if isinstance(pattern, str):
+        pattern = pattern.encode()
+      self.rules.append((re.compile(pattern, re.IGNORECASE if ignore_case else 0), escapes[color]))
+    regex, start = self.rules[0]
+    if len(self.rules) == 1 and regex.fullmatch(b"") is None:
+      # a single rule can use a template, which is replaced without calling back into Python
+      self._template = start.replace(b"\\", b"\\\\") + rb"\g<0>" + RESET_BYTES
+      self._empty = start + RESET_BYTES
+      self._replace = self._substitute
+    else:
+      self._replace = self._merge
+
+  def _substitute(self, data:bytes) -> bytes:
+    regex = self.rules[0][0]
+    result = regex.sub(self._template, data)
+    if self._empty in result:
+      # a pattern like \b or (?=x) matched empty, which is not colored
+      return self._merge(data)
+    return result
+
+  def _merge(self, data:bytes) -> bytes:
+    spans = []
+    for i, (regex, _) in enumerate(self.rules):
+      spans += [(m.start(), i, m.end()) for m in regex.finditer(data)]
+    if not spans:
+      return data
+    spans.sort()
+    rules = self.rules
+    extra = [] # the matches found by searching a rule again, the earliest first
+    parts = []
+    append = parts.append
+    pos = 0
+    k = 0
+    count = len(spans)
+    while k < count or extra:
+      if extra and (k >= count or extra[0] < spans[k]):
+        start, i, end = heapq.heappop(extra)
+      else:
+        start, i, end = spans[k]
+        k += 1
+      if start < pos:
+        if end > pos:
+          # finditer continued after this match, a match of the rule starting before its end was never tried
+          match = _search(rules[i][0], data, pos)
+          if match is not None and match.start() < end:
+            heapq.heappush(extra, (match.start(), i, match.end()))
+        continue # overlapped by a match written before
+      if start == end:
+        continue # empty
+      append(data[pos:start])
+      append(rules[i][1])
+      append(data[start:end])
+      append(RESET_BYTES)
+      pos = end
+    append(data[pos:])
+    return b"".join(parts)
+
+  def colorize(self, data:bytes) -> bytes:
+    """Colors all matches in the data.
+
+    Args:
+      data: Complete lines. A match can't continue in the next call.
+
+    Returns:
+      The data with the escape sequences added.
+    """
+    return self._replace(data)
+
+  def stream(self, stream_in, stream_out, chunk_size:int=CHUNK_SIZE):
+    """Colors a binary stream until it ends.
+
+    Args:
+      stream_in: The binary stream to read from. Reading returns whatever is available, so lines are written as soon as they are complete.
+      stream_out: The binary stream to write to. It is flushed after each chunk.
+      chunk_size: The number of bytes read at once.
+    """
+    read = getattr(stream_in, "read1", stream_in.read)
+    write = stream_out.write
+    flush = getattr(stream_out, "flush", None)
+    rest = b""
+    while True:
+      data = read(chunk_size)
+      if not data:
+        break
+      end = data.rfind(b"\n") + 1
+      if end == 0:
+        rest += data
+        if len(rest) >= MAX_LINE:
+          write(self._replace(rest))
+          rest = b""
+        continue
+      if rest:
+        lines = rest + data[:end]
+      else:
+        lines = data[:end] if end < len(data) else data
+      rest = data[end:]
+      write(self._replace(lines))
+      if flush is not None:
+        flush()
+    if rest:
+      write(self._replace(rest))
+      if flush is not None:
+        flush()
+
+
+def _rule(value:str) -> tuple[str,int]:
+  pattern, separator, color = value.rpartition("=")
+  if not separator or not pattern:
+    raise argparse.ArgumentTypeError("a rule has to look like PATTERN=COLOR, for example 'ERROR=196'")
+  try:
+    if color.startswith("#"):
+      from quantize import nearest_hex
+      color = nearest_hex(color)
+    else:
+      color = int(color)
+    re.compile(pattern)
+  except (ValueError, re.error) as e:
+    raise argparse.ArgumentTypeError("invalid rule %r: %s" % (value, e))
+  return pattern, color
+
+
+def main(argv:list[str]|None=None) -> int:
+  """Command line interface of the colorizer.
+
+  Args:
+    argv: The arguments after "colorize".
+
+  Returns:
+    The exit code.
+  """
+  parser = argparse.ArgumentParser(prog="ncolorpicker colorize", description="Color the matches of regular expressions in stdin.")
+  parser.add_argument("--rule", type=_rule, action="append", required=True, metavar="PATTERN=COLOR",
+                      help="color the matches of the regular expression with a color value (0-255) or hex color, can be repeated")
+  parser.add_argument("--background", action="store_true", help="set the background color instead of the foreground color")
+  parser.add_argument("--both", action="store_true", help="set the foreground and the background color")
+  parser.add_argument("--ignore-case", "-i", action="store_true", help="ignore the case of the patterns")
+  args = parser.parse_args(argv)
+  try:
+    colorizer = Colorizer(args.rule, not args.background or args.both, args.background or args.both, args.ignore_case)
+  except (ValueError, re.error) as e:
+    print("ncolorpicker colorize: %s" % e, file=sys.stderr)
+    return 1
+  try:
+    colorizer.stream(sys.stdin.buffer, sys.stdout.buffer)
+  except BrokenPipeError:
+    # the reader stopped early (like head), that is not an error
+    os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+  except KeyboardInterrupt:
+    return 130
+  return 0
@@ -0,0 +1,291 @@
+""" This module converts colors to the CIELAB color space and calculates perceptual distances and WCAG contrast ratios.
+
+The PaletteIndex precalculates these values for all 256 colors once, so the colors most similar to a color and the
+most readable text color can be looked up without calculating anything:
+
+  index = palette_index()
+  index.nearest(137, 5) # the 5 colors looking most like color 137
+  index.foreground(137) # BLACK or WHITE, whichever has the better contrast on color 137
+"""
+
+
+import math
+from array import array
+
+from calculations import color_rgb
+from constants import COLOR_MAX, BLACK, WHITE
+
+
+# D65 white point of sRGB
+_WHITE_X = 0.95047
+_WHITE_Y = 1.0
+_WHITE_Z = 1.08883
+
+_SRGB_LINEAR_LIMIT = 0.0031308 # linear values up to this are not gamma encoded
+_LAB_DELTA = 6 / 29 # f() of CIELAB is linear below this
+
+# the rows of the matrix from XYZ to linear sRGB
+_XYZ_TO_LINEAR = (
+  (3.2404542, -1.5371385, -0.4985314),
+  (-0.9692660, 1.8760108, 0.0415560),
+  (0.0556434, -0.2040259, 1.0572252),
+)
+
+
+def srgb_to_linear(value:int) -> float:
+  """Removes the gamma of an sRGB channel.
+
+  Args:
+    value: The channel value. (0-255)
+
+  Returns:
+    The linear channel value. (0.0-1.0)
+  """
+  value /= 255
+  if value <= 0.04045:
+    return value / 12.92
+  return ((value + 0.055) / 1.055) ** 2.4
+
+
+def linear_to_srgb(value:float) -> int:
+  """Adds the gamma of sRGB to a linear channel. This is the inverse of srgb_to_linear.
+
+  Args:
+    value: The linear channel value. (0.0-1.0, other values are clipped)
+
+  Returns:
+    The channel value. (0-255)
+  """
+  if value <= _SRGB_LINEAR_LIMIT:
+    value *= 12.92
+  else:
+    value = 1.055 * value ** (1 / 2.4) - 0.055
+  return round(min(1.0, max(0.0, value)) * 255)
+
+
+def relative_luminance(r:int, g:int, b:int) -> float:
+  """Calculates the relative luminance of a color as defined by WCAG 2.
+
+  Args:
+    r: The red channel. (0-255)
+    g: The green channel. (0-255)
+    b: The blue channel. (0-255)
+
+  Returns:
+    The relative luminance. (0.0 for black - 1.0 for white)
+  """
+  return 0.2126 * srgb_to_linear(r) + 0.7152 * srgb_to_linear(g) + 0.0722 * srgb_to_linear(b)
+
+
+def contrast_ratio(luminance1:float, luminance2:float) -> float:
+  """Calculates the WCAG contrast ratio of two relative luminances.
+
+  Returns:
+    The contrast ratio. (1.0 - 21.0) WCAG requires at least 4.5 for normal text.
+  """
+  if luminance1 < luminance2:
+    luminance1, luminance2 = luminance2, luminance1
+  return (luminance1 + 0.05) / (luminance2 + 0.05)
+
+
+def _lab_f(t:float) -> float:
+  if t > _LAB_DELTA ** 3:
+    return t ** (1 / 3)
+  return t * 24389 / 27 / 116 + 16 / 116
+
+
+def rgb_to_lab(r:int, g:int, b:int) -> tuple[float,float,float]:
+  """Converts an sRGB color to CIELAB.
+
+  Args:
+    r: The red channel. (0-255)
+    g: The green channel. (0-255)
+    b: The blue channel. (0-255)
+
+  Returns:
+    The color as tuple. (L: 0-100, a, b)
+  """
+  r, g, b = srgb_to_linear(r), srgb_to_linear(g), srgb_to_linear(b)
+  fx = _lab_f((0.4124564 * r + 0.3575761 * g + 0.1804375 * b) / _WHITE_X)
+  fy = _lab_f((0.2126729 * r + 0.7151522 * g + 0.0721750 * b) / _WHITE_Y)
+  fz = _lab_f((0.0193339 * r + 0.1191920 * g + 0.9503041 * b) / _WHITE_Z)
+  return 116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz)
+
+
+def _lab_f_inverse(t:float) -> float:
+  if t > _LAB_DELTA:
+    return t ** 3
+  return 3 * _LAB_DELTA ** 2 * (t - 4 / 29)
+
+
+def lab_to_rgb(l:float, a:float, b:float) -> tuple[int,int,int]:
+  """Converts a CIELAB color to sRGB. This is the inverse of rgb_to_lab.
+  Colors outside of the sRGB gamut are clipped to the nearest channel values.
+
+  Args:
+    l: The lightness. (0-100)
+    a: The green-red axis.
+    b: The blue-yellow axis.
+
+  Returns:
+    The RGB channels as tuple of integers. (0-255)
+  """
+  fy = (l + 16) / 116
+  x = _WHITE_X * _lab_f_inverse(fy + a / 500)
+  y = _WHITE_Y * _lab_f_inverse(fy)
+  z = _WHITE_Z * _lab_f_inverse(fy - b / 200)
+  return tuple(linear_to_srgb(mx * x + my * y + mz * z) for mx, my, mz in _XYZ_TO_LINEAR)
+
+
+def linear_to_srgb_array(np, linear):
+  """linear_to_srgb for a NumPy array of linear channel values.
+
+  Args:
+    np: The NumPy module.
+    linear: The linear channel values. (0.0-1.0, other values are clipped)
+
+  Returns:
+    The channel values as uint8 array of the same shape.
+  """
+  encoded = np.where(linear <= _SRGB_LINEAR_LIMIT, linear * 12.92, 1.055 * np.abs(linear) ** (1 / 2.4) - 0.055)
+  return np.rint(np.clip(encoded, 0.0, 1.0) * 255).astype(np.uint8)
+
+
+def lab_to_rgb_array(np, lab):
+  """lab_to_rgb for a NumPy array of CIELAB colors. The results are the same as those of lab_to_rgb.
+
+  Args:
+    np: The NumPy module.
+    lab: The colors as float array of shape (n, 3).
+
+  Returns:
+    The RGB channels as uint8 array of shape (n, 3).
+  """
+  fy = (lab[:, 0] + 16) / 116
+  f = np.stack([fy + lab[:, 1] / 500, fy, fy - lab[:, 2] / 200], axis=-1)
+  xyz = np.where(f > _LAB_DELTA, f ** 3, 3 * _LAB_DELTA ** 2 * (f - 4 / 29)) * np.array([_WHITE_X, _WHITE_Y, _WHITE_Z])
+  x, y, z = xyz.T
+  return linear_to_srgb_array(np, np.stack([mx * x + my * y + mz * z for mx, my, mz in _XYZ_TO_LINEAR], axis=-1))
+
+
+def delta_e(lab1:tuple[float,float,float], lab2:tuple[float,float,float]) -> float:
+  """Calculates the perceptual distance of two CIELAB colors. (CIE76)
+  A distance of about 2.3 is the smallest difference most people can see.
+  """
+  return math.sqrt((lab1[0] - lab2[0]) ** 2 + (lab1[1] - lab2[1]) ** 2 + (lab1[2] - lab2[2]) ** 2)
+
+
+class PaletteIndex(object):
+  """The CIELAB values, luminances and readable text colors of all 256 colors.
+  The distances, contrast ratios and the order of the nearest colors of every color are calculated with the first query that needs them.
+
+  The tables are flat arrays with 256 values for each color:
+    - distances[a * 256 + b]: The ΔE distance of color a and color b.
+    - contrasts[a * 256 + b]: The contrast ratio of color a and color b.
+    - neighbours[a * 255 + i]: The i-th nearest color of color a. (without a itself)
+
+  Args:
+    palette: The RGB values of the 256 colors as the terminal shows them, for example from probe.palette_rgb(). Default are the xterm values.
+  """
+
+  rgb:list[tuple[int,int,int]]
+  lab:list[tuple[float,float,float]]
+  luminance:array
+  foregrounds:bytes
+
+  def __init__(self, palette:list[tuple[int,int,int]]|None=None):
+    rgb = [color_rgb(color) for color in range(COLOR_MAX)] if palette is None else [tuple(channels) for channels in palette]
+    if len(rgb) != COLOR_MAX:
+      raise ValueError("the palette needs the RGB values of all 256 colors")
+    self.rgb = rgb
+    self.lab = [rgb_to_lab(*channels) for channels in rgb]
+    self.luminance = array("d", (relative_luminance(*channels) for channels in rgb))
+    black, white = self.luminance[BLACK], self.luminance[WHITE]
+    self.foregrounds = bytes(
+      BLACK if contrast_ratio(luminance, black) >= contrast_ratio(luminance, white) else WHITE for luminance in self.luminance
+    )
+    self._distances = None
+    self._contrasts = None
+    self._neighbours = None
+
+  def _build(self):
+    size = COLOR_MAX
+    distances = array("f", bytes(4 * size * size))
+    contrasts = array("f", bytes(4 * size * size))
+    lab = self.lab
+    luminance = self.luminance
+    for a in range(size):
+      l1, a1, b1 = lab[a]
+      lum1 = luminance[a]
+      contrasts[a * size + a] = 1.0
+      for b in range(a + 1, size):
+        l2, a2, b2 = lab[b]
+        distance = math.sqrt((l1 - l2) ** 2 + (a1 - a2) ** 2 + (b1 - b2) ** 2)
+        distances[a * size + b] = distances[b * size + a] = distance
+        ratio = contrast_ratio(lum1, luminance[b])
+        contrasts[a * size + b] = contrasts[b * size + a] = ratio
+    neighbours = array("B")
+    for a in range(size):
+      row = distances[a * size:(a + 1) * size]
+      neighbours.extend(sorted((b for b in range(size) if b != a), key=lambda b: (row[b], b)))
+    self._distances = distances
+    self._contrasts = contrasts
+    self._neighbours = neighbours
+
+  @property
+  def distances(self) -> array:
+    if self._distances is None:
+      self._build()
+    return self._distances
+
+  @property
+  def contrasts(self) -> array:
+    if self._contrasts is None:
+      self._build()
+    return self._contrasts
+
+  @property
+  def neighbours(self) -> array:
+    if self._neighbours is None:
+      self._build()
+    return self._neighbours
+
+  def distance(self, color1:int, color2:int) -> float:
+    """The ΔE distance of two colors.
+    """
+    return self.distances[color1 * COLOR_MAX + color2]
+
+  def contrast(self, color1:int, color2:int) -> float:
+    """The contrast ratio of two colors.
+    """
+    return self.contrasts[color1 * COLOR_MAX + color2]
+
+  def nearest(self, color:int, k:int) -> list[int]:
+    """The colors looking most like a color, the nearest first.
+
+    Args:
+      color: The color value. (0-255)
+      k: The number of colors. (at most 255)
+
+    Returns:
+      The color values without the color itself. Colors with the same distance are sorted by their value.
+    """
+    start = color * (COLOR_MAX - 1)
+    return self.neighbours[start:start + min(k, COLOR_MAX - 1)].tolist()
+
+  def foreground(self, color:int) -> int:
+    """The text color with the better contrast on a color. (BLACK or WHITE)
+    """
+    return self.foregrounds[color]
+
+
+_palette_index = None
+
+
+def palette_index() -> PaletteIndex:
+  """The PaletteIndex shared by everything in the process. It is created with the first call.
+  """
+  global _palette_index
+  if _palette_index is None:
+    _palette_index = PaletteIndex()
+  return _palette_index
@@ -0,0 +1,103 @@
+""" This module contains small commands that work without curses, so they start fast and can be used in scripts.
+
+Usage:
+  ncolorpicker escape 137 [--background] [--both] [--quoted | --language python|bash|c|javascript|raw]
+  ncolorpicker convert "#ff8800" | "255,136,0" | 208
+  ncolorpicker palette
+"""
+
+
+import argparse
+import sys
+
+from calculations import color_levels, color_rgb
+from constants import COLOR_MAX
+from functions import escape_table, escape_str, hex_to_rgb, RESET
+from snippets import LANGUAGES, snippet_text
+
+
+def _color(value:str) -> int:
+  color = int(value)
+  if not 0 <= color < COLOR_MAX:
+    raise argparse.ArgumentTypeError("the color has to be between 0 and 255")
+  return color
+
+
+def escape_main(argv:list[str]|None=None) -> int:
+  """Prints the escape sequence of a color.
+
+  Args:
+    argv: The arguments after "escape".
+
+  Returns:
+    The exit code.
+  """
+  parser = argparse.ArgumentParser(prog="ncolorpicker escape", description="Print the escape sequence of a color.")
+  parser.add_argument("color", type=_color, help="the color value (0-255)")
+  parser.add_argument("--background", action="store_true", help="set the background color instead of the foreground color")
+  parser.add_argument("--both", action="store_true", help="set the foreground and the background color")
+  parser.add_argument("--quoted", action="store_true", help="print the sequence as quoted string instead of the raw bytes")
+  parser.add_argument("--language", choices=LANGUAGES, help="print code printing text in the color in this language")
+  args = parser.parse_args(argv)
+  if args.language is not None:
+    mode = "both" if args.both else "background" if args.background else "foreground"
+    sys.stdout.write(snippet_text(args.color, args.language, mode) + "\n")
+    return 0
+  escape = escape_table(not args.background or args.both, args.background or args.both)[args.color]
+  if args.quoted:
+    sys.stdout.write(escape_str(escape) + "\n")
+  else:
+    sys.stdout.write(escape)
+  return 0
+
+
+def convert_main(argv:list[str]|None=None) -> int:
+  """Converts between color values and 24bit colors.
+  A hex color or "r,g,b" is converted to the nearest color value and a color value is converted to its hex color.
+
+  Args:
+    argv: The arguments after "convert".
+
+  Returns:
+    The exit code.
+  """
+  parser = argparse.ArgumentParser(prog="ncolorpicker convert", description="Convert between color values and 24bit colors.")
+  parser.add_argument("color", help='a hex color ("#ff8800"), RGB channels ("255,136,0") or a color value (0-255)')
+  args = parser.parse_args(argv)
+  try:
+    if args.color.isdigit():
+      r, g, b = color_rgb(_color(args.color))
+      print("#%02x%02x%02x" % (r, g, b))
+      return 0
+    if "," in args.color:
+      r, g, b = (int(channel) for channel in args.color.split(","))
+      if not (0 <= r < 256 and 0 <= g < 256 and 0 <= b < 256):
+        raise ValueError("the channels have to be between 0 and 255")
+    else:
+      r, g, b = hex_to_rgb(args.color)
+  except (ValueError, argparse.ArgumentTypeError) as e:
+    print("ncolorpicker convert: %s" % e, file=sys.stderr)
+    return 1
+  from quantize import nearest_256
+  print(nearest_256(r, g, b))
+  return 0
+
+
+def palette_main(argv:list[str]|None=None) -> int:
+  """Lists all 256 colors with their color value, channels and hex color.
+
+  Args:
+    argv: The arguments after "palette".
+
+  Returns:
+    The exit code.
+  """
+  parser = argparse.ArgumentParser(prog="ncolorpicker palette", description="List all 256 colors.")
+  parser.parse_args(argv)
+  backgrounds = escape_table(False, True)
+  lines = []
+  for color in range(COLOR_MAX):
+    levels = color_levels(color)
+    lines.append("%s    %s %3i  #%02x%02x%02x  %s\n" % (backgrounds[color], RESET, color, *color_rgb(color), "%i %i %i" % levels if levels else ""))
+  sys.stdout.write("".join(lines))
+  return 0
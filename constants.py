@@ -23,6 +23,14 @@ RGB_SKIP_BLACK = True # skip the black color in the rgb colors because it is alr
 GRAY_COLOR_START = RGB_COLOR_START + RGB_COLOR_COUNT ** 3 # after the rgb colors the gray colors start
 GRAY_COLOR_COUNT = COLOR_MAX - GRAY_COLOR_START # 24 gray colors
 
+BASIC_COLOR_RGB = [ # the default xterm values of the basic colors
+  (0, 0, 0), (205, 0, 0), (0, 205, 0), (205, 205, 0), (0, 0, 238), (205, 0, 205), (0, 205, 205), (229, 229, 229),
+  (127, 127, 127), (255, 0, 0), (0, 255, 0), (255, 255, 0), (92, 92, 255), (255, 0, 255), (0, 255, 255), (255, 255, 255)
+]
+RGB_LEVELS = [0, 95, 135, 175, 215, 255] # the 24bit channel value of each rgb color value (0-5)
+GRAY_LEVEL_START = 8 # the 24bit channel value of the first gray color
+GRAY_LEVEL_STEP = 10 # each gray color is 10 brighter than the one before
+
 ROW_COUNT = 1 + (RGB_MAX_VALUE * 2) + 1 # 1 row of basic colors, 2*RGB_MAX_VALUE rows of rgb colors dark to light, 1 row of gray colors
 ROW_BASIC_INDEX = -1 # the Row containing the basic colors
 ROW_GRAY_INDEX = ROW_COUNT - 1 - (1 if RGB_SKIP_BLACK else 0) - (1 if RGB_SKIP_WHITE else 0) # the Row containing the gray colors
@@ -37,3 +45,26 @@ _TC_Y = 220 # Text Color Yellow
 _TC_R = 216 # Text Color Red
 _TC_B = 75 # Text Color Blue
 _TC_T = [1,2,3,4,5,6,7,9,10,11,12,13,14] # Title Colors
+
+CURSOR_CELL = "\ue0b7\ue0b5" # Replaces the two spaces of the selected cell
+CURSOR_ROW = "\ue0b2\ue0b2\ue0b2" # Marks the selected row right of the palette border
+CURSOR_COL = "\ue0ba\ue0b8" # Marks the selected column below the palette
+
+TITLE_Y = 0 # The title is at the top of the screen
+BASIC_Y = TITLE_Y + 6 # 5 lines of title and an empty line
+RGB_Y = BASIC_Y + 4 # border, colors, cursor and border of the basic colors
+GRAY_Y = RGB_Y + ROW_GRAY_INDEX + 4 # border, rgb color rows, cursor, border and an empty line
+SELECTION_Y = GRAY_Y + 5 # border, colors, cursor, border and an empty line
+TEXT_Y = SELECTION_Y + 17 # border, padding, 13 lines of information, padding and border
+SIMILAR_X = 70 # the similar colors are shown right of the selection if the screen is wide enough
+SIMILAR_WIDTH = 24 # the width of the similar colors
+SIMILAR_COUNT = 11 # the number of similar colors shown
+
+BASIC_CELL_X = 9 # "       │ " in front of the first basic color
+BASIC_CELL_WIDTH = 3 # " " + 2 characters for each basic color
+RGB_CELL_X = 3 # " │ " in front of the first rgb color
+RGB_CELL_WIDTH = 2 # 2 characters for each rgb color
+GRAY_CELL_X = 9 # "       │ " in front of the first gray color
+GRAY_CELL_WIDTH = 2 # 2 characters for each gray color
+
+FRAME_RATE = 60 # the maximum number of frames drawn per second, keys pressed in between are applied together
@@ -0,0 +1,210 @@
+""" This module rewrites 24bit color escape sequences in a stream to the nearest color of the 256-color range.
+
+Programs that print "\\033[38;2;R;G;Bm" (foreground), "\\033[48;2;R;G;Bm" (background) or "\\033[58;2;R;G;Bm" (underline)
+show wrong colors on terminals and recorders that only know 256 colors. The Downsampler replaces these parameters with
+"38;5;N", "48;5;N" and "58;5;N" and keeps all other parameters of the sequence. The colon forms "38:2:R:G:B" and
+"38:2::R:G:B" are rewritten to "38:5:N".
+
+By default only the rgb and gray colors (16-255) are used, because the basic colors look different in every terminal theme.
+Each sequence and each color is converted only once. Everything else is written without being copied, and a sequence
+split between two reads is completed with the next read.
+
+Usage:
+  some-program | ncolorpicker downsample
+  some-program | ncolorpicker downsample --basic
+"""
+
+
+import argparse
+import os
+import re
+import sys
+
+from quantize import Quantizer
+
+
+CHUNK_SIZE = 1 << 16 # bytes read at once
+MAX_SEQUENCE = 256 # longer sequences are passed through unchanged
+MAX_MEMO = 1 << 16 # the number of sequences remembered
+
+SGR = re.compile(rb"\x1b\[[0-9;:]*m") # a complete SGR sequence
+SGR_PREFIX = re.compile(rb"\x1b(\[[0-9;:]*)?\Z") # the start of an SGR sequence at the end of a read
+TRUECOLOR = re.compile(rb"[345]8[;:]:?2") # a sequence containing a 24bit color
+
+
+class Downsampler(object):
+  """Converts 24bit colors in escape sequences to the 256-color range.
+
+  Args:
+    include_basic: If True, the basic colors (0-15) can be used as well.
+
+  Example:
+    downsampler = Downsampler()
+    downsampler.convert_sequence(b"\\033[1;38;2;255;136;0m") # b"\\033[1;38;5;208m"
+    downsampler.stream(sys.stdin.buffer, sys.stdout.buffer)
+  """
+
+  def __init__(self, include_basic:bool=False):
+    self.quantizer = Quantizer(include_basic=include_basic)
+    self._sequences = {} # sequence: converted sequence
+    self._colors = {} # (r, g, b): color value
+    self._rest = b"" # the start of a sequence at the end of the last read
+
+  def _color(self, r:int, g:int, b:int) -> int:
+    key = (r, g, b)
+    color = self._colors.get(key)
+    if color is None:
+      color = self._colors[key] = self.quantizer.nearest(r, g, b)
+    return color
+
+  def _convert_parameters(self, parameters:bytes) -> bytes:
+    parts = parameters.split(b";")
+    result = []
+    i = 0
+    while i < len(parts):
+      part = parts[i]
+      if part in (b"38", b"48", b"58") and i + 4 < len(parts) and parts[i + 1] == b"2":
+        channels = parts[i + 2:i + 5]
+        if all(channel.isdigit() and int(channel) < 256 for channel in channels):
+          result.append(b"%s;5;%d" % (part, self._color(*(int(channel) for channel in channels))))
+          i += 5
+          continue
+      elif b":" in part:
+        fields = part.split(b":")
+        if fields[0] in (b"38", b"48", b"58") and len(fields) >= 5 and fields[1] == b"2":
+          channels = fields[-3:] # "38:2:R:G:B" or "38:2:<color space>:R:G:B"
+          if len(fields) <= 6 and all(channel.isdigit() and int(channel) < 256 for channel in channels):
+            part = b"%s:5:%d" % (fields[0], self._color(*(int(channel) for channel in channels)))
+      result.append(part)
+      i += 1
+    return b";".join(result)
+
+  def _convert(self, sequence:bytes) -> bytes|None:
+    # the converted sequence or None if it has no 24bit color, sequences are only checked once
+    converted = self._sequences.get(sequence, False)
+    if converted is False:
+      if TRUECOLOR.search(sequence) is None:
+        converted = None
+      else:
+        converted = b"\x1b[" + self._convert_parameters(sequence[2:-1]) + b"m"
+      if len(self._sequences) >= MAX_MEMO:
+        self._sequences.clear()
+      self._sequences[sequence] = converted
+    return converted
+
+  def convert_sequence(self, sequence:bytes) -> bytes:
+    """Converts a single SGR sequence. The result is remembered, so converting the same sequence again only needs a lookup.
+
+    Args:
+      sequence: The whole sequence from the escape character to the "m".
+
+    Returns:
+      The sequence with all 24bit colors replaced.
+    """
+    converted = self._convert(sequence)
+    return sequence if converted is None else converted
+
+  def _parts(self, data:bytes, start:int, end:int, parts:list):
+    # adds the unchanged slices and the converted sequences of data[start:end] to parts
+    view = memoryview(data)
+    append = parts.append
+    convert = self._convert
+    pos = start
+    for match in SGR.finditer(data, start, end):
+      converted = convert(match.group())
+      if converted is None:
+        continue
+      match_start = match.start()
+      if match_start > pos:
+        append(view[pos:match_start])
+      append(converted)
+      pos = match.end()
+    if end > pos:
+      append(view[pos:end])
+
+  def feed(self, data:bytes) -> list[bytes|memoryview]:
+    """Converts the next part of a stream.
+    A sequence at the end of data that is not complete yet is kept and completed with the next call.
+
+    Args:
+      data: The bytes read from the stream.
+
+    Returns:
+      The parts to write in order. Unchanged bytes are memoryviews of data.
+    """
+    parts = []
+    start = 0
+    if self._rest:
+      head = self._rest + data[:MAX_SEQUENCE]
+      match = SGR.match(head)
+      if match is not None:
+        parts.append(self.convert_sequence(match.group()))
+        start = match.end() - len(self._rest)
+        self._rest = b""
+      elif SGR_PREFIX.match(head) and len(head) < MAX_SEQUENCE:
+        self._rest = head # still not complete
+        return parts
+      else:
+        parts.append(self._rest) # not a color sequence
+        self._rest = b""
+    end = len(data)
+    if b"\x1b" not in data:
+      if start < end:
+        parts.append(memoryview(data)[start:] if start else data)
+      return parts
+    last = data.rfind(b"\x1b", start)
+    if last != -1 and end - last < MAX_SEQUENCE and SGR_PREFIX.match(data, last):
+      self._rest = data[last:]
+      end = last
+    self._parts(data, start, end, parts)
+    return parts
+
+  def close(self) -> list[bytes]:
+    """Returns the incomplete sequence left at the end of the stream unchanged.
+    """
+    rest, self._rest = self._rest, b""
+    return [rest] if rest else []
+
+  def stream(self, stream_in, stream_out, chunk_size:int=CHUNK_SIZE):
+    """Converts a binary stream until it ends.
+
+    Args:
+      stream_in: The binary stream to read from. Reading returns whatever is available, so the output is not delayed.
+      stream_out: The binary stream to write to. It is flushed after each read.
+      chunk_size: The number of bytes read at once.
+    """
+    read = getattr(stream_in, "read1", stream_in.read)
+    writelines = stream_out.writelines
+    flush = getattr(stream_out, "flush", None)
+    while True:
+      data = read(chunk_size)
+      if not data:
+        break
+      writelines(self.feed(data))
+      if flush is not None:
+        flush()
+    writelines(self.close())
+    if flush is not None:
+      flush()
+
+
+def main(argv:list[str]|None=None) -> int:
+  """Command line interface of the downsampler.
+
+  Args:
+    argv: The arguments after "downsample".
+
+  Returns:
+    The exit code.
+  """
+  parser = argparse.ArgumentParser(prog="ncolorpicker downsample", description="Rewrite 24bit color escape sequences to the 256-color range.")
+  parser.add_argument("--basic", action="store_true", help="use the basic colors (0-15) as well, their look depends on the terminal theme")
+  args = parser.parse_args(argv)
+  try:
+    Downsampler(args.basic).stream(sys.stdin.buffer, sys.stdout.buffer)
+  except BrokenPipeError:
+    # the reader stopped early (like head), that is not an error
+    os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+  except KeyboardInterrupt:
+    return 130
+  return 0
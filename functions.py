@@ -2,6 +2,26 @@
 """
 
 
+import io
+
+from constants import COLOR_MAX
+
+
+FG_ESCAPES = ["\033[38;5;%dm" % color for color in range(COLOR_MAX)] # foreground escape sequence of each color
+BG_ESCAPES = ["\033[48;5;%dm" % color for color in range(COLOR_MAX)] # background escape sequence of each color
+FG_BG_ESCAPES = [fg + bg for fg, bg in zip(FG_ESCAPES, BG_ESCAPES)] # foreground and background escape sequence of each color
+RESET = "\033[0m" # resets all colors
+
+FG_ESCAPES_BYTES = [escape.encode() for escape in FG_ESCAPES]
+BG_ESCAPES_BYTES = [escape.encode() for escape in BG_ESCAPES]
+FG_BG_ESCAPES_BYTES = [escape.encode() for escape in FG_BG_ESCAPES]
+RESET_BYTES = RESET.encode()
+
+# the characters replaced by escape_str
+ESCAPE_TABLE = {"\\": "\\\\", "\n": "\\n", "\t": "\\t", "\r": "\\r", "\b": "\\b", "\f": "\\f", "\v": "\\v", "\033": "\\033"}
+_ESCAPE_TRANSLATION = str.maketrans(ESCAPE_TABLE)
+
+
 def escape_str(s:str) -> str:
   """ Escapes the string for the terminal.
 
@@ -11,7 +31,7 @@ def escape_str(s:str) -> str:
   Returns:
     The escaped string.
   """
-  return '"' + s.replace("\\", "\\\\").replace("\n", "\\n").replace("\t", "\\t").replace("\r", "\\r").replace("\b", "\\b").replace("\f", "\\f").replace("\v", "\\v").replace("\033", "\\033") + '"'
+  return '"' + s.translate(_ESCAPE_TRANSLATION) + '"'
 
 
 def colored_256(color:int, text:str, return_parts:bool=False, foreground:bool=True, background:bool=False) -> str|tuple[str, str, str, str]:
@@ -51,15 +71,115 @@ def colored_256(color:int, text:str, return_parts:bool=False, foreground:bool=Tr
         - The next byte is the numer '0' to indicate that the color sequence should be reset.
         - The last byte is the m to indicate the end of the color sequence.
   """
-  color_start_fg = "\033[38;5;%dm" % color
-  color_start_bg = "\033[48;5;%dm" % color
-  if not foreground:
-    color_start_fg = ""
-  if not background:
-    color_start_bg = ""
-  colored_text = text
-  color_end = "\033[0m"
-  result = color_start_fg + color_start_bg + colored_text + color_end
+  if 0 <= color < COLOR_MAX:
+    color_start_fg = FG_ESCAPES[color] if foreground else ""
+    color_start_bg = BG_ESCAPES[color] if background else ""
+  else:
+    color_start_fg = "\033[38;5;%dm" % color if foreground else ""
+    color_start_bg = "\033[48;5;%dm" % color if background else ""
   if return_parts:
-    return color_start_fg, color_start_bg, colored_text, color_end
-  return result
+    return color_start_fg, color_start_bg, text, RESET
+  return color_start_fg + color_start_bg + text + RESET
+
+
+def escape_table(foreground:bool=True, background:bool=False, binary:bool=False) -> list[str]|list[bytes]:
+  """ Returns the precomputed escape sequences of all 256 colors.
+
+  Args:
+    foreground(bool): If True, the sequences set the foreground color.
+    background(bool): If True, the sequences set the background color.
+    binary(bool): If True, the sequences are bytes instead of str.
+
+  Returns:
+    A list with the escape sequence of each color.
+  """
+  if foreground and background:
+    return FG_BG_ESCAPES_BYTES if binary else FG_BG_ESCAPES
+  if foreground:
+    return FG_ESCAPES_BYTES if binary else FG_ESCAPES
+  if background:
+    return BG_ESCAPES_BYTES if binary else BG_ESCAPES
+  return [b"" if binary else ""] * COLOR_MAX
+
+
+def write_colored(segments, out, foreground:bool=True, background:bool=False, batch_size:int=4096):
+  """ Colors many segments of text and writes them to a stream or buffer.
+  The escape sequences are taken from precomputed tables and a color is only emitted if it differs from the color of the segment before.
+  The segments are joined and written in batches, so the output is written with few calls even for millions of segments.
+
+  Args:
+    segments: An iterable of (color, text) tuples. The color can be None to reset the colors. The text can be str or bytes.
+    out: The target to write to. A bytearray is extended, text streams like io.StringIO get str and all other file objects get bytes.
+    foreground(bool): If True, the foreground color is used.
+    background(bool): If True, the background color is used.
+    batch_size(int): The number of parts joined before they are written.
+
+  Raises:
+    ValueError: If a color is not None and not between 0 and 255.
+
+  Example:
+    out = io.StringIO()
+    write_colored([(196, "ERROR"), (7, ": "), (7, "disk full")], out)
+    print(out.getvalue()) # only one escape sequence for color 7
+  """
+  to_text = isinstance(out, io.TextIOBase)
+  parts = []
+  append = parts.append
+  escapes = None
+  reset = None
+  last = None
+  for color, text in segments:
+    if escapes is None:
+      # the tables are chosen by the type of the first text
+      binary = not isinstance(text, str)
+      escapes = escape_table(foreground, background, binary)
+      reset, join = (RESET_BYTES, b"".join) if binary else (RESET, "".join)
+    if color != last:
+      if color is None:
+        append(reset)
+      elif 0 <= color < COLOR_MAX:
+        append(escapes[color])
+      else:
+        raise ValueError("the color has to be between 0 and 255, got %r" % (color,))
+      last = color
+    append(text)
+    if len(parts) >= batch_size:
+      _write_parts(out, join(parts), to_text)
+      parts.clear()
+  if last is not None:
+    append(reset)
+  if parts:
+    _write_parts(out, join(parts), to_text)
+
+
+def _write_parts(out, data:str|bytes, to_text:bool):
+  if isinstance(data, str):
+    if not to_text:
+      data = data.encode()
+  elif to_text:
+    data = data.decode()
+  if isinstance(out, bytearray):
+    out += data
+  else:
+    out.write(data)
+
+
+def hex_to_rgb(s:str) -> tuple[int, int, int]:
+  """ Parses a hex color like "#ff8800", "ff8800" or "#f80".
+
+  Args:
+    s(str): The hex color.
+
+  Returns:
+    The RGB channels as tuple of integers. (0-255)
+
+  Raises:
+    ValueError: If the string is not a hex color.
+  """
+  value = s.strip().lstrip("#")
+  if len(value) == 3:
+    value = value[0] * 2 + value[1] * 2 + value[2] * 2
+  if len(value) != 6 or value.strip("0123456789abcdefABCDEF"):
+    raise ValueError("Not a hex color: %r" % s)
+  number = int(value, 16)
+  return (number >> 16) & 0xff, (number >> 8) & 0xff, number & 0xff
@@ -0,0 +1,177 @@
+""" This module creates color gradients with any number of steps between two or more colors.
+
+The colors are mixed in one of three color spaces:
+  - "rgb": The sRGB channels as the terminal gets them. Fast, but the middle of a ramp often looks too dark.
+  - "linear": The sRGB channels without gamma, mixing the light of the colors.
+  - "lab": CIELAB, where equal steps look about equally large. This is the default.
+
+Each step is snapped to the nearest color of the 256-color range or kept as 24bit color. The whole gradient is calculated at once,
+with NumPy if it is installed and with plain Python otherwise. Gradients are cached by their parameters, so drawing the same
+heatmap or progress bar again only needs a lookup.
+
+The result has the same memory layout with and without NumPy, one byte per step for color values and three bytes (R, G, B) per step
+for 24bit colors:
+  - with NumPy a read-only uint8 array of shape (steps,) or (steps, 3)
+  - without NumPy bytes of length steps or steps * 3
+
+Example:
+  gradient(["#00ff00", "#ffff00", "#ff0000"], 10) # 10 color values from green over yellow to red
+  gradient([21, 196], 5, space="rgb", snap="24bit") # 5 RGB values from blue to red
+  gradient_escapes([21, 196], 20) # 20 foreground escape sequences for a progress bar
+"""
+
+
+import functools
+
+from calculations import color_rgb
+from colorspace import srgb_to_linear, linear_to_srgb, rgb_to_lab, lab_to_rgb, linear_to_srgb_array, lab_to_rgb_array
+from constants import COLOR_MAX
+from functions import FG_ESCAPES, BG_ESCAPES, hex_to_rgb
+from quantize import Quantizer, load_numpy
+
+
+SPACES = ("rgb", "linear", "lab")
+SNAPS = ("256", "24bit")
+GRADIENT_CACHE_SIZE = 1024 # the number of gradients kept
+
+_quantizers = {} # include_basic: Quantizer
+
+
+def _quantizer(include_basic:bool) -> Quantizer:
+  quantizer = _quantizers.get(include_basic)
+  if quantizer is None:
+    quantizer = _quantizers[include_basic] = Quantizer(include_basic=include_basic)
+  return quantizer
+
+
+def _rgb(color) -> tuple[int,int,int]:
+  # a color value, hex color or RGB tuple as RGB tuple
+  if isinstance(color, int):
+    if not 0 <= color < COLOR_MAX:
+      raise ValueError("the color has to be between 0 and 255")
+    return color_rgb(color)
+  if isinstance(color, str):
+    return hex_to_rgb(color)
+  r, g, b = color
+  if not (0 <= r < 256 and 0 <= g < 256 and 0 <= b < 256):
+    raise ValueError("the channels have to be between 0 and 255")
+  return int(r), int(g), int(b)
+
+
+def _to_space(rgb:tuple[int,int,int], space:str) -> tuple[float,float,float]:
+  if space == "lab":
+    return rgb_to_lab(*rgb)
+  if space == "linear":
+    return tuple(srgb_to_linear(channel) for channel in rgb)
+  return tuple(float(channel) for channel in rgb)
+
+
+def _from_space(values:tuple[float,float,float], space:str) -> tuple[int,int,int]:
+  if space == "lab":
+    return lab_to_rgb(*values)
+  if space == "linear":
+    return tuple(linear_to_srgb(value) for value in values)
+  return tuple(round(min(255.0, max(0.0, value))) for value in values)
+
+
+def _positions(count:int, steps:int) -> list[tuple[int,float]]:
+  # the segment between two colors and the position inside of it for each step
+  segments = count - 1
+  positions = []
+  for i in range(steps):
+    t = i * segments / (steps - 1) if steps > 1 else 0.0
+    segment = min(int(t), segments - 1)
+    positions.append((segment, t - segment))
+  return positions
+
+
+def _gradient_python(stops:tuple[tuple[int,int,int],...], steps:int, space:str, snap:str, include_basic:bool) -> bytes:
+  values = [_to_space(rgb, space) for rgb in stops]
+  result = bytearray()
+  nearest = _quantizer(include_basic).nearest
+  for segment, local in _positions(len(stops), steps):
+    start, end = values[segment], values[segment + 1]
+    rgb = _from_space(tuple(a + (b - a) * local for a, b in zip(start, end)), space)
+    if snap == "256":
+      result.append(nearest(*rgb))
+    else:
+      result.extend(rgb)
+  return bytes(result)
+
+
+def _gradient_numpy(np, stops:tuple[tuple[int,int,int],...], steps:int, space:str, snap:str, include_basic:bool):
+  values = np.array([_to_space(rgb, space) for rgb in stops], dtype=np.float64)
+  segments = len(stops) - 1
+  t = np.arange(steps) * segments / (steps - 1) if steps > 1 else np.zeros(1) # the same rounding as _positions
+  segment = np.minimum(t.astype(np.int64), segments - 1)
+  local = (t - segment)[:, None]
+  mixed = values[segment] + (values[segment + 1] - values[segment]) * local
+  if space == "lab":
+    rgb = lab_to_rgb_array(np, mixed)
+  elif space == "linear":
+    rgb = linear_to_srgb_array(np, mixed)
+  else:
+    rgb = np.rint(np.clip(mixed, 0.0, 255.0)).astype(np.uint8)
+  result = _quantizer(include_basic).nearest_array(rgb) if snap == "256" else rgb
+  result.setflags(write=False) # shared by everyone getting it from the cache
+  return result
+
+
+@functools.lru_cache(maxsize=GRADIENT_CACHE_SIZE)
+def _gradient(stops:tuple[tuple[int,int,int],...], steps:int, space:str, snap:str, include_basic:bool, use_numpy:bool):
+  np = load_numpy() if use_numpy else None
+  if np is not None:
+    return _gradient_numpy(np, stops, steps, space, snap, include_basic)
+  return _gradient_python(stops, steps, space, snap, include_basic)
+
+
+def gradient(colors:list, steps:int, space:str="lab", snap:str="256", include_basic:bool=False, use_numpy:bool=True):
+  """Creates a gradient through several colors with the same distance between each two colors.
+
+  Args:
+    colors: At least two colors, each a color value (0-255), a hex color like "#ff8800" or an (r, g, b) tuple.
+    steps: The number of colors of the gradient. The first and the last step are the first and the last color.
+    space: The color space the colors are mixed in, one of SPACES.
+    snap: "256" for the nearest color values or "24bit" for RGB values.
+    include_basic: If True, the basic colors (0-15) can be used as well. Terminals often change them.
+    use_numpy: If False, the gradient is calculated without NumPy even if it is installed.
+
+  Returns:
+    The colors of the gradient as read-only NumPy array or bytes, see the description of the module.
+
+  Raises:
+    ValueError: If the arguments are invalid.
+  """
+  if space not in SPACES:
+    raise ValueError("unknown color space %r, use one of %s" % (space, ", ".join(SPACES)))
+  if snap not in SNAPS:
+    raise ValueError("unknown snap %r, use one of %s" % (snap, ", ".join(SNAPS)))
+  if steps < 1:
+    raise ValueError("a gradient needs at least one step")
+  stops = tuple(_rgb(color) for color in colors)
+  if len(stops) < 2:
+    raise ValueError("a gradient needs at least two colors")
+  return _gradient(stops, steps, space, snap, include_basic, use_numpy)
+
+
+@functools.lru_cache(maxsize=GRADIENT_CACHE_SIZE)
+def _gradient_escapes(stops:tuple, steps:int, space:str, snap:str, include_basic:bool, background:bool) -> tuple[str,...]:
+  values = bytes(gradient(stops, steps, space, snap, include_basic))
+  if snap == "256":
+    table = BG_ESCAPES if background else FG_ESCAPES
+    return tuple(table[color] for color in values)
+  start = "\033[48;2;%d;%d;%dm" if background else "\033[38;2;%d;%d;%dm"
+  return tuple(start % tuple(values[i:i + 3]) for i in range(0, len(values), 3))
+
+
+def gradient_escapes(colors:list, steps:int, space:str="lab", snap:str="256", include_basic:bool=False, background:bool=False) -> tuple[str,...]:
+  """Creates the escape sequences of a gradient, for example for the cells of a progress bar or a heatmap.
+  The arguments are the same as for gradient().
+
+  Args:
+    background: If True, the sequences set the background color instead of the foreground color.
+
+  Returns:
+    One escape sequence for each step.
+  """
+  return _gradient_escapes(tuple(_rgb(color) for color in colors), steps, space, snap, include_basic, background)
@@ -46,7 +46,7 @@ sudo echo "" >> ncolorpicker.sh
 sudo echo "INSTALL_PATH=$INSTALL_PATH" >> ncolorpicker.sh
 sudo echo "" >> ncolorpicker.sh
 sudo echo "# A simple color picker script for your terminal" >> ncolorpicker.sh
-sudo echo "python3 \$INSTALL_PATH/__init__.py" >> ncolorpicker.sh
+sudo echo "python3 \$INSTALL_PATH/__init__.py \"\$@\"" >> ncolorpicker.sh
 
 # Allow execution
 echo "Allowing execution..."
@@ -0,0 +1,122 @@
+""" This module contains an allocator for curses color pairs.
+
+Curses can only show a color with a color pair and terminals support a limited number of pairs (often 64 or 256).
+Instead of creating a pair for every color at startup, the PairAllocator creates a pair the first time a
+(foreground, background) combination is used. When all pairs are used, the least recently used pair is changed.
+The new pairs are created together with flush() before the frame is shown.
+"""
+
+
+from collections import OrderedDict
+
+from constants import COLOR_MAX
+
+
+class PairAllocator(object):
+  """Creates color pairs when they are needed.
+
+  Pair 0 is never changed because it holds the default colors of the terminal.
+  Changing a pair also changes the text on the screen that still uses it, so with few pairs only the text drawn last is
+  guaranteed to have the right colors. evictions counts how often that happened, so cached text using old pairs can be dropped.
+  Pinned pairs are never changed. They are meant for the few colors of text that is always on the screen, at most half of the
+  pairs can be pinned.
+
+  Example:
+    pairs = PairAllocator(uc)
+    screen.addstr("Hello World!", pairs.attr(WHITE, 196))
+    pairs.flush()
+    screen.refresh()
+  """
+
+  evictions:int
+  used:set[tuple[int,int]]|None
+
+  def __init__(self, curses, limit:int|None=None):
+    """
+    Args:
+      curses: The module providing init_pair, color_pair and COLOR_PAIRS.
+      limit: The number of pairs the terminal supports. Default is COLOR_PAIRS of the curses module, at most 256.
+    """
+    if limit is None:
+      limit = getattr(curses, "COLOR_PAIRS", COLOR_MAX)
+      if callable(limit):
+        limit = limit()
+    self.curses = curses
+    self.limit = max(2, min(limit, COLOR_MAX)) # color_pair() can only hold 256 pairs
+    self.evictions = 0
+    # if a set, the (foreground, background) of every pair returned by attr() is added, for example to touch() them later
+    self.used = None
+    self._pairs = OrderedDict() # (foreground, background): attribute, the least recently used first
+    self._pinned = {} # (foreground, background): attribute, never changed
+    self._numbers = {} # (foreground, background): pair number
+    self._pending = {} # pair number: (foreground, background)
+
+  def __len__(self) -> int:
+    return len(self._pairs) + len(self._pinned)
+
+  def attr(self, foreground:int, background:int, pin:bool=False) -> int:
+    """The attribute of the pair with the colors. The pair is created if it does not exist yet.
+
+    Args:
+      foreground: The color value of the text.
+      background: The color value of the background.
+      pin: If True, the pair is never changed afterwards, as long as less than half of the pairs are pinned.
+
+    Returns:
+      The attribute to use with addstr or attron.
+    """
+    key = (foreground, background)
+    if self.used is not None:
+      self.used.add(key)
+    attr = self._pinned.get(key)
+    if attr is not None:
+      return attr
+    pin = pin and len(self._pinned) < (self.limit - 1) // 2
+    attr = self._pairs.get(key)
+    if attr is not None:
+      if pin:
+        self._pinned[key] = self._pairs.pop(key)
+      else:
+        self._pairs.move_to_end(key)
+      return attr
+    if len(self._pairs) + len(self._pinned) < self.limit - 1:
+      number = len(self._pairs) + len(self._pinned) + 1
+    else:
+      old_key, _ = self._pairs.popitem(last=False)
+      number = self._numbers.pop(old_key)
+      self.evictions += 1
+    attr = self.curses.color_pair(number)
+    if pin:
+      self._pinned[key] = attr
+    else:
+      self._pairs[key] = attr
+    self._numbers[key] = number
+    self._pending[number] = key
+    return attr
+
+  def pinned(self, keys) -> bool:
+    """Whether all pairs are pinned, so text using them keeps its colors.
+
+    Args:
+      keys: The (foreground, background) tuples of the pairs.
+    """
+    return all(key in self._pinned for key in keys)
+
+  def touch(self, keys):
+    """Marks pairs as used, so they are changed last. Pairs that don't exist anymore are created again.
+
+    Args:
+      keys: The (foreground, background) tuples of the pairs.
+    """
+    for foreground, background in keys:
+      self.attr(foreground, background)
+
+  def flush(self):
+    """Creates all pairs requested since the last flush. A pair changed several times is only created once.
+    """
+    if not self._pending:
+      return
+    init_pair = self.curses.init_pair
+    for number, (foreground, background) in self._pending.items():
+      init_pair(number, foreground, background)
+    self._pending.clear()
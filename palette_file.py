@@ -0,0 +1,287 @@
+""" This module writes the values of all 256 colors to a binary file that other processes can map into memory and read without parsing.
+
+The file is created once from calculations.py and colorspace.py. Afterwards a lookup is only an offset calculation, so short-lived
+processes and tools written in other languages don't have to calculate the palette again.
+
+Layout (all numbers little endian):
+
+  Header, 64 bytes:
+    0   4 bytes   magic b"NCPL"
+    4   uint16    format version (PALETTE_VERSION)
+    6   uint16    header size, the offset of the first record (64)
+    8   uint16    record size (64)
+    10  uint16    number of records (256)
+    12  52 bytes  zero
+
+  Record of color i at header size + i * record size, 64 bytes:
+    0   uint8     color value
+    1   3 uint8   channel levels (0-5) of the rgb colors, 255 for basic and gray colors
+    4   3 uint8   sRGB channels
+    7   uint8     text color with the better contrast (BLACK or WHITE)
+    8   3 float32 CIELAB L, a, b
+    20  float32   relative luminance
+    24  float32   contrast ratio of the color and its text color
+    28  uint8     length of the foreground escape sequence
+    29  uint8     length of the background escape sequence
+    30  2 bytes   zero
+    32  16 bytes  foreground escape sequence, padded with zeros
+    48  16 bytes  background escape sequence, padded with zeros
+
+Example from a shell, printing the foreground escape sequence of color 137:
+  dd if="$(ncolorpicker palette-file)" bs=16 skip=$(( (64 + 137 * 64 + 32) / 16 )) count=1 2>/dev/null | tr -d '\\0'
+"""
+
+
+import mmap
+import os
+import struct
+import sys
+
+from constants import COLOR_MAX
+
+
+PALETTE_MAGIC = b"NCPL"
+PALETTE_VERSION = 1
+HEADER = struct.Struct("<4sHHHH52x")
+RECORD = struct.Struct("<B3B3BB3fffBB2x16s16s")
+NO_LEVEL = 255 # the level of basic and gray colors
+
+# the offsets of the fields in a record
+LEVELS_OFFSET = 1
+RGB_OFFSET = 4
+FOREGROUND_OFFSET = 7
+LAB_OFFSET = 8
+LUMINANCE_OFFSET = 20
+CONTRAST_OFFSET = 24
+FG_LENGTH_OFFSET = 28
+BG_LENGTH_OFFSET = 29
+FG_ESCAPE_OFFSET = 32
+BG_ESCAPE_OFFSET = 48
+ESCAPE_SIZE = 16
+
+
+def cache_directory() -> str:
+  """The directory of the files created by ncolorpicker. ($XDG_CACHE_HOME/ncolorpicker or ~/.cache/ncolorpicker)
+  """
+  cache = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+  return os.path.join(cache, "ncolorpicker")
+
+
+def default_path() -> str:
+  """The path of the palette file in the cache directory of the user.
+  """
+  return os.path.join(cache_directory(), "palette-v%d.bin" % PALETTE_VERSION)
+
+
+def build_palette() -> bytes:
+  """Creates the content of the palette file.
+
+  Returns:
+    The header followed by the records of all 256 colors.
+  """
+  from calculations import color_levels, color_rgb
+  from colorspace import palette_index
+  from functions import FG_ESCAPES_BYTES, BG_ESCAPES_BYTES
+  index = palette_index()
+  parts = [HEADER.pack(PALETTE_MAGIC, PALETTE_VERSION, HEADER.size, RECORD.size, COLOR_MAX)]
+  for color in range(COLOR_MAX):
+    levels = color_levels(color) or (NO_LEVEL, NO_LEVEL, NO_LEVEL)
+    foreground = index.foreground(color)
+    fg, bg = FG_ESCAPES_BYTES[color], BG_ESCAPES_BYTES[color]
+    parts.append(RECORD.pack(
+      color, *levels, *color_rgb(color), foreground, *index.lab[color], index.luminance[color], index.contrast(color, foreground),
+      len(fg), len(bg), fg, bg
+    ))
+  return b"".join(parts)
+
+
+def write_atomic(path:str, data:bytes):
+  """Writes a file in the cache directory. The file is replaced at once, so a process reading it never sees a partly written file.
+
+  Args:
+    path: The path of the file. Missing directories are created.
+    data: The content of the file.
+  """
+  import tempfile # only needed to write the file, readers start faster without it
+  directory = os.path.dirname(path) or "."
+  os.makedirs(directory, exist_ok=True)
+  fd, temp_path = tempfile.mkstemp(prefix=".ncolorpicker-", dir=directory)
+  try:
+    os.fchmod(fd, 0o644) # readable by the tools of other users as well
+    with os.fdopen(fd, "wb") as f:
+      f.write(data)
+    os.replace(temp_path, path)
+  except BaseException:
+    os.unlink(temp_path)
+    raise
+
+
+def write_palette(path:str|None=None) -> str:
+  """Writes the palette file.
+
+  Args:
+    path: The path of the file. Default is default_path().
+
+  Returns:
+    The path of the file.
+  """
+  path = path or default_path()
+  write_atomic(path, build_palette())
+  return path
+
+
+class PaletteFile(object):
+  """A palette file mapped into memory. The values are read directly from the mapped file.
+
+  Args:
+    path: The path of the file. Default is default_path().
+
+  Raises:
+    ValueError: If the file is not a palette file of this version.
+
+  Example:
+    with PaletteFile() as palette:
+      palette.rgb(137) # (175, 135, 95)
+      sys.stdout.buffer.write(palette.fg_escape(137)) # the memoryview is written without copying it
+  """
+
+  path:str
+  view:memoryview
+
+  def __init__(self, path:str|None=None):
+    self.path = path or default_path()
+    with open(self.path, "rb") as f:
+      self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+      if len(self._map) < HEADER.size:
+        raise ValueError("%s is not a palette file" % self.path)
+      magic, version, header_size, record_size, count = HEADER.unpack_from(self._map)
+      if magic != PALETTE_MAGIC:
+        raise ValueError("%s is not a palette file" % self.path)
+      if version != PALETTE_VERSION or record_size != RECORD.size or count != COLOR_MAX:
+        raise ValueError("%s has version %d, expected version %d" % (self.path, version, PALETTE_VERSION))
+      if len(self._map) < header_size + count * record_size:
+        raise ValueError("%s is truncated" % self.path)
+    except ValueError:
+      self._map.close()
+      raise
+    self._header_size = header_size
+    self.view = memoryview(self._map)
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *_):
+    self.close()
+
+  def close(self):
+    """Unmaps the file.
+
+    Raises:
+      BufferError: If a memoryview returned before is still used.
+    """
+    self.view.release()
+    self._map.close()
+
+  def _offset(self, color:int) -> int:
+    if not 0 <= color < COLOR_MAX:
+      raise ValueError("the color has to be between 0 and 255")
+    return self._header_size + color * RECORD.size
+
+  def record(self, color:int) -> memoryview:
+    """The record of a color as memoryview of the mapped file. (no copy)
+    """
+    offset = self._offset(color)
+    return self.view[offset:offset + RECORD.size]
+
+  def fields(self, color:int) -> tuple:
+    """All fields of the record of a color in the order of RECORD.
+    """
+    return RECORD.unpack_from(self._map, self._offset(color))
+
+  def levels(self, color:int) -> tuple[int,int,int]|None:
+    """The channel levels (0-5) of a color or None for basic and gray colors.
+    """
+    offset = self._offset(color) + LEVELS_OFFSET
+    levels = tuple(self.view[offset:offset + 3])
+    return None if levels[0] == NO_LEVEL else levels
+
+  def rgb(self, color:int) -> tuple[int,int,int]:
+    """The sRGB channels of a color.
+    """
+    offset = self._offset(color) + RGB_OFFSET
+    return tuple(self.view[offset:offset + 3])
+
+  def foreground(self, color:int) -> int:
+    """The text color with the better contrast on a color. (BLACK or WHITE)
+    """
+    return self.view[self._offset(color) + FOREGROUND_OFFSET]
+
+  def lab(self, color:int) -> tuple[float,float,float]:
+    """The CIELAB values of a color.
+    """
+    return struct.unpack_from("<3f", self._map, self._offset(color) + LAB_OFFSET)
+
+  def luminance(self, color:int) -> float:
+    """The relative luminance of a color.
+    """
+    return struct.unpack_from("<f", self._map, self._offset(color) + LUMINANCE_OFFSET)[0]
+
+  def contrast(self, color:int) -> float:
+    """The contrast ratio of a color and its text color.
+    """
+    return struct.unpack_from("<f", self._map, self._offset(color) + CONTRAST_OFFSET)[0]
+
+  def fg_escape(self, color:int) -> memoryview:
+    """The foreground escape sequence of a color as memoryview of the mapped file. (no copy)
+    """
+    offset = self._offset(color)
+    return self.view[offset + FG_ESCAPE_OFFSET:offset + FG_ESCAPE_OFFSET + self.view[offset + FG_LENGTH_OFFSET]]
+
+  def bg_escape(self, color:int) -> memoryview:
+    """The background escape sequence of a color as memoryview of the mapped file. (no copy)
+    """
+    offset = self._offset(color)
+    return self.view[offset + BG_ESCAPE_OFFSET:offset + BG_ESCAPE_OFFSET + self.view[offset + BG_LENGTH_OFFSET]]
+
+
+def open_palette(path:str|None=None) -> PaletteFile:
+  """Maps the palette file. The file is written first if it does not exist or has another version.
+
+  Args:
+    path: The path of the file. Default is default_path().
+  """
+  path = path or default_path()
+  try:
+    return PaletteFile(path)
+  except (OSError, ValueError):
+    write_palette(path)
+    return PaletteFile(path)
+
+
+def main(argv:list[str]|None=None) -> int:
+  """Command line interface of the palette file. Prints the path of the file, so scripts can map it.
+
+  Args:
+    argv: The arguments after "palette-file".
+
+  Returns:
+    The exit code.
+  """
+  import argparse
+  parser = argparse.ArgumentParser(prog="ncolorpicker palette-file", description="Write the binary palette file and print its path.")
+  parser.add_argument("--path", help="the path of the file, default: %s" % default_path())
+  parser.add_argument("--rebuild", action="store_true", help="write the file even if it exists")
+  args = parser.parse_args(argv)
+  try:
+    if args.rebuild:
+      path = write_palette(args.path)
+    else:
+      palette = open_palette(args.path)
+      path = palette.path
+      palette.close()
+  except OSError as e:
+    print("ncolorpicker palette-file: %s" % e, file=sys.stderr)
+    return 1
+  print(path)
+  return 0
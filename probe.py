@@ -0,0 +1,280 @@
+""" This module finds out which colors the terminal really shows.
+
+The color picker assumes the xterm values for all 256 colors, but many terminals use other values, especially for the 16 basic colors.
+The probe reads the number of colors and pairs and the true color support from terminfo and the environment, and asks the terminal
+for the RGB value of each color with the OSC 4 query "\\033]4;<color>;?\\033\\\\".
+
+All queries are sent with a single write, followed by a device attributes request "\\033[c". Every terminal answers the device attributes,
+so when that answer arrives all palette answers have arrived as well and the probe doesn't have to wait for its timeout.
+Terminals that don't support OSC 4 only answer the device attributes. If nothing answers, the probe stops after the timeout.
+
+The result is cached for each terminal (TERM, COLORTERM, TERM_PROGRAM, TERM_PROGRAM_VERSION and VTE_VERSION), so only the first
+start in a terminal has to ask it. Terminals that don't answer are cached as well, so they don't make every start wait for the timeout.
+The color picker probes the terminal when it starts and uses the real RGB values for the similar colors, the text colors, the hex values
+and the search. On terminals without 256 colors it shows a warning and uses the xterm values.
+
+Usage:
+  ncolorpicker probe [--refresh] [--json]
+"""
+
+
+import hashlib
+import json
+import os
+import re
+import select
+import termios
+import time
+import tty
+
+from calculations import color_rgb
+from constants import COLOR_MAX, BASIC_COLOR_COUNT, BASIC_COLOR_NAMES
+from palette_file import cache_directory, write_atomic
+
+
+PROBE_VERSION = 2 # changes when the cached results have to be created again
+PROBE_TIMEOUT = 0.5 # seconds to wait for the answers of the terminal
+IDENTITY_VARIABLES = ("TERM", "COLORTERM", "TERM_PROGRAM", "TERM_PROGRAM_VERSION", "VTE_VERSION")
+
+OSC4_QUERY = "\033]4;%d;?\033\\"
+DA1_QUERY = b"\033[c"
+_OSC4_REPLY = re.compile(rb"\x1b\]4;(\d+);rgb:([0-9a-fA-F]{1,4})/([0-9a-fA-F]{1,4})/([0-9a-fA-F]{1,4})(?:\x1b\\|\x07)")
+_DA1_REPLY = re.compile(rb"\x1b\[\?[0-9;]*c")
+
+
+def terminal_identity(environ:dict|None=None) -> dict[str,str]:
+  """The environment variables that tell terminals apart. The cached results are stored for each identity.
+
+  Args:
+    environ: The environment. Default is os.environ.
+  """
+  environ = os.environ if environ is None else environ
+  return {name: environ.get(name, "") for name in IDENTITY_VARIABLES}
+
+
+def cache_path(identity:dict[str,str]) -> str:
+  """The path of the cached result of a terminal.
+  """
+  key = hashlib.sha1(json.dumps(identity, sort_keys=True).encode()).hexdigest()[:16]
+  return os.path.join(cache_directory(), "probe-v%d-%s.json" % (PROBE_VERSION, key))
+
+
+def query_capabilities(identity:dict[str,str], fd:int=1) -> dict:
+  """Reads the number of colors and pairs and the true color support from terminfo and the environment.
+  Without terminfo entry the values are guessed from TERM.
+  The curses module of the standard library reads terminfo only for the first terminal of a process.
+
+  Args:
+    identity: The identity returned by terminal_identity().
+    fd: The file descriptor of the terminal.
+
+  Returns:
+    A dict with colors, color_pairs and truecolor.
+  """
+  term = identity["TERM"]
+  colors = pairs = -1
+  truecolor = identity["COLORTERM"].lower() in ("truecolor", "24bit")
+  try:
+    import curses # the terminfo functions of the standard library, not the screen
+    curses.setupterm(term or None, fd)
+    colors = curses.tigetnum("colors")
+    pairs = curses.tigetnum("pairs")
+    truecolor = truecolor or curses.tigetflag("Tc") == 1 or curses.tigetflag("RGB") == 1
+  except Exception: # no curses module, no terminfo entry or no terminal, the values are guessed below
+    pass
+  if colors < 0:
+    colors = COLOR_MAX if "256color" in term or truecolor else 8
+  if pairs < 0:
+    pairs = colors * colors
+  return {"colors": colors, "color_pairs": pairs, "truecolor": truecolor}
+
+
+def _channel(digits:bytes) -> int:
+  # the terminals answer with 1 to 4 hex digits per channel
+  return round(int(digits, 16) * 255 / ((1 << (4 * len(digits))) - 1))
+
+
+def parse_palette(data:bytes) -> dict[int,tuple[int,int,int]]:
+  """Reads the OSC 4 answers of the terminal.
+
+  Args:
+    data: The bytes read from the terminal.
+
+  Returns:
+    The RGB value of each color the terminal answered.
+  """
+  palette = {}
+  for match in _OSC4_REPLY.finditer(data):
+    color = int(match.group(1))
+    if 0 <= color < COLOR_MAX:
+      palette[color] = (_channel(match.group(2)), _channel(match.group(3)), _channel(match.group(4)))
+  return palette
+
+
+def query_palette(fd_in:int, fd_out:int, colors=range(COLOR_MAX), timeout:float=PROBE_TIMEOUT) -> tuple[dict[int,tuple[int,int,int]],bool]:
+  """Asks the terminal for the RGB values of colors.
+  The echo of the terminal is switched off while waiting for the answers, so they are not shown.
+
+  Args:
+    fd_in: The file descriptor the answers are read from.
+    fd_out: The file descriptor the queries are written to.
+    colors: The color values to ask for.
+    timeout: The maximum number of seconds to wait for all answers.
+
+  Returns:
+    The RGB values of the colors the terminal answered and whether the terminal answered at all.
+  """
+  attributes = None
+  if os.isatty(fd_in):
+    attributes = termios.tcgetattr(fd_in)
+    tty.setcbreak(fd_in)
+  data = b""
+  answered = False
+  try:
+    queries = "".join(OSC4_QUERY % color for color in colors).encode() + DA1_QUERY
+    view = memoryview(queries)
+    while view:
+      view = view[os.write(fd_out, view):]
+    deadline = time.monotonic() + timeout
+    while True:
+      remaining = deadline - time.monotonic()
+      if remaining <= 0:
+        break
+      ready, _, _ = select.select([fd_in], [], [], remaining)
+      if not ready:
+        break
+      chunk = os.read(fd_in, 4096)
+      if not chunk:
+        break
+      data += chunk
+      if _DA1_REPLY.search(data):
+        answered = True
+        break
+  finally:
+    if attributes is not None:
+      termios.tcsetattr(fd_in, termios.TCSADRAIN, attributes)
+  return parse_palette(data), answered
+
+
+def load_cached(identity:dict[str,str]) -> dict|None:
+  """The cached result of a terminal or None if it was not probed yet.
+  """
+  try:
+    with open(cache_path(identity)) as f:
+      result = json.load(f)
+  except (OSError, ValueError):
+    return None
+  if result.get("identity") != identity:
+    return None
+  return result
+
+
+def probe(fd_in:int=0, fd_out:int=1, refresh:bool=False, timeout:float=PROBE_TIMEOUT, environ:dict|None=None) -> dict:
+  """Finds out the colors of the terminal. The cached result is used if the terminal was probed before.
+
+  Args:
+    fd_in: The file descriptor the answers of the terminal are read from.
+    fd_out: The file descriptor of the terminal the queries are written to.
+    refresh: If True, the terminal is probed again even if a cached result exists.
+    timeout: The maximum number of seconds to wait for the answers of the terminal.
+    environ: The environment. Default is os.environ.
+
+  Returns:
+    A dict with:
+      - identity: The identity of the terminal.
+      - colors, color_pairs, truecolor: The capabilities.
+      - palette: A list with the hex color of each color value, None for colors the terminal didn't answer.
+      - answered: False if the terminal didn't answer within the timeout.
+      - cached: True if the result was read from the cache.
+  """
+  identity = terminal_identity(environ)
+  if not refresh:
+    result = load_cached(identity)
+    if result is not None:
+      result["cached"] = True
+      return result
+  result = {"identity": identity, **query_capabilities(identity, fd_out)}
+  palette, answered = {}, False
+  asked = os.isatty(fd_in) and os.isatty(fd_out)
+  if asked:
+    palette, answered = query_palette(fd_in, fd_out, timeout=timeout)
+  result["palette"] = ["#%02x%02x%02x" % palette[color] if color in palette else None for color in range(COLOR_MAX)]
+  result["answered"] = answered
+  if asked:
+    # a terminal that didn't answer is cached too, otherwise every start would wait for the timeout (--refresh asks again)
+    write_atomic(cache_path(identity), json.dumps(result, indent=1).encode())
+  result["cached"] = False
+  return result
+
+
+def probe_terminal(refresh:bool=False, timeout:float=PROBE_TIMEOUT) -> dict:
+  """Probes the controlling terminal with probe(). /dev/tty is used if it can be opened, so it works while stdin or stdout are piped.
+
+  Args:
+    refresh: If True, the terminal is probed again even if a cached result exists.
+    timeout: The maximum number of seconds to wait for the answers of the terminal.
+
+  Returns:
+    The result of probe().
+  """
+  try:
+    tty_fd = os.open("/dev/tty", os.O_RDWR | os.O_NOCTTY)
+  except OSError:
+    return probe(0, 1, refresh, timeout)
+  try:
+    return probe(tty_fd, tty_fd, refresh, timeout)
+  finally:
+    os.close(tty_fd)
+
+
+def supports_256_colors(result:dict) -> bool:
+  """Whether the terminal of a probe result shows all 256 colors.
+  Terminals answering the query of color 255 show it, even if terminfo reports fewer colors.
+  """
+  return result["colors"] >= COLOR_MAX or result["palette"][COLOR_MAX - 1] is not None
+
+
+def palette_rgb(result:dict) -> list[tuple[int,int,int]]:
+  """The RGB values of all 256 colors of a probe result. Colors the terminal didn't answer use the xterm values.
+  The list can be used as palette of a Quantizer.
+  """
+  return [
+    (int(value[1:3], 16), int(value[3:5], 16), int(value[5:7], 16)) if value else color_rgb(color)
+    for color, value in enumerate(result["palette"])
+  ]
+
+
+def main(argv:list[str]|None=None) -> int:
+  """Command line interface of the probe.
+
+  Args:
+    argv: The arguments after "probe".
+
+  Returns:
+    The exit code.
+  """
+  import argparse
+  parser = argparse.ArgumentParser(prog="ncolorpicker probe", description="Show the colors the terminal really uses.")
+  parser.add_argument("--refresh", action="store_true", help="ask the terminal again instead of using the cached result")
+  parser.add_argument("--timeout", type=float, default=PROBE_TIMEOUT, help="seconds to wait for the terminal (default: %(default)s)")
+  parser.add_argument("--json", action="store_true", help="print the result as JSON")
+  args = parser.parse_args(argv)
+  result = probe_terminal(args.refresh, args.timeout)
+  if args.json:
+    print(json.dumps(result, indent=1))
+    return 0
+  answered = sum(1 for value in result["palette"] if value)
+  print("TERM %s, %i colors, %i pairs, true color: %s%s" % (
+    result["identity"]["TERM"] or "-", result["colors"], result["color_pairs"], "yes" if result["truecolor"] else "no",
+    " (cached)" if result["cached"] else ""
+  ))
+  if result["answered"]:
+    print("The terminal reported %i of %i colors." % (answered, COLOR_MAX))
+  else:
+    print("The terminal didn't answer, the xterm colors are assumed. Use --refresh to ask it again.")
+  for color in range(BASIC_COLOR_COUNT):
+    value = result["palette"][color]
+    xterm = "#%02x%02x%02x" % color_rgb(color)
+    if value and value != xterm:
+      print("  %2i %-32s %s instead of %s" % (color, BASIC_COLOR_NAMES[color], value, xterm))
+  return 0
@@ -0,0 +1,329 @@
+""" This module measures where the color picker spends its time while it runs.
+
+The FrameProfiler wraps the methods of a single ColorPicker, so a picker without a profiler runs the methods unchanged.
+It records:
+  - the time of draw, handle_input, _init_colors, each _display_* section and the flush and refresh of every frame
+  - the spans, attron and attroff calls and characters each section adds to the SpanRenderer of the frame, replayed layers included
+  - the addstr calls and characters the flush writes to the screen
+  - the time from the first key handled after a frame until the next frame is on the screen (key to paint)
+
+The numbers can be shown live in the empty line below the title and written to a trace file in the Chrome trace event format,
+which can be opened with chrome://tracing or https://ui.perfetto.dev.
+
+Usage:
+  ncolorpicker --profile trace.json --profile-overlay
+"""
+
+
+import json
+import os
+import time
+
+from constants import BASIC_Y
+
+
+OVERLAY_Y = BASIC_Y - 1 # the empty line below the title
+MAX_EVENTS = 1 << 18 # trace events kept, later events are only counted
+
+
+COUNT_NAMES = ("spans", "attron", "attroff", "chars", "addstr", "written") # the entries of FrameProfiler.counts
+
+
+class _CountingRenderer(object):
+  # passes every call to the SpanRenderer of the frame and counts what the sections add to it
+  # the sections only write to the renderer, the screen is written by its flush
+
+  def __init__(self, renderer, counts:list[int]):
+    self._renderer = renderer
+    self._counts = counts
+
+  def __getattr__(self, name:str):
+    return getattr(self._renderer, name)
+
+  def addstr(self, text:str, attr:int=0):
+    counts = self._counts
+    counts[0] += 1
+    counts[3] += len(text)
+    return self._renderer.addstr(text, attr)
+
+  def attron(self, attr:int):
+    self._counts[1] += 1
+    return self._renderer.attron(attr)
+
+  def attroff(self, attr:int):
+    self._counts[2] += 1
+    return self._renderer.attroff(attr)
+
+  def replay(self, ops:list):
+    counts = self._counts
+    for op in ops:
+      if type(op) is not tuple:
+        counts[0] += len(op[1])
+        counts[3] += sum(map(len, op[1]))
+    return self._renderer.replay(ops)
+
+
+class _CountingScreen(object):
+  # passes every call to the screen and counts the calls that write text
+
+  def __init__(self, screen, profiler):
+    self._screen = screen
+    self._profiler = profiler
+
+  def __getattr__(self, name:str):
+    return getattr(self._screen, name)
+
+  def addstr(self, *args):
+    counts = self._profiler.counts
+    counts[4] += 1
+    for arg in args:
+      if isinstance(arg, str):
+        counts[5] += len(arg)
+        break
+    return self._screen.addstr(*args)
+
+  def refresh(self):
+    profiler = self._profiler
+    if profiler.overlay:
+      profiler.draw_overlay(self._screen)
+    start = time.perf_counter_ns()
+    result = self._screen.refresh()
+    stats = getattr(self._screen, "stats", None) # the bytes written by the AnsiScreen
+    profiler.record("refresh", start, time.perf_counter_ns(), None, stats.get("bytes") if isinstance(stats, dict) else None)
+    return result
+
+
+class FrameProfiler(object):
+  """Records the timings and screen calls of a ColorPicker.
+
+  Args:
+    trace_path: The file the trace events are written to by write_trace(). None keeps them in memory only.
+    overlay: If True, the numbers of the last frame are shown on the screen.
+
+  Example:
+    profiler = FrameProfiler("trace.json")
+    color_picker = ColorPicker(screen, profiler=profiler)
+    color_picker.run()
+    profiler.write_trace()
+    print(profiler.report())
+  """
+
+  counts:list[int]
+  sections:dict[str,list[int]]
+  latencies:list[int]
+  events:list[dict]
+
+  def __init__(self, trace_path:str|None=None, overlay:bool=False):
+    self.trace_path = trace_path
+    self.overlay = overlay
+    self.counts = [0] * len(COUNT_NAMES) # spans, attron, attroff, characters added to the renderer, addstr, characters written to the screen
+    self.sections = {} # name: [calls, total ns, max ns, *counts]
+    self.latencies = [] # key to paint in ns
+    self.events = []
+    self.dropped = 0
+    self.frames = 0
+    self._start = time.perf_counter_ns()
+    self._pid = os.getpid()
+    self._key_time = None
+    self._last_frame = None # (draw ns, *counts, latency ns or None)
+    self._picker = None
+
+  def attach(self, picker):
+    """Wraps the methods of a color picker and counts the calls to its renderer and screen.
+    ColorPicker calls this when it is created with a profiler, before the colors are initialized.
+
+    Args:
+      picker: The ColorPicker to measure.
+    """
+    names = ["draw", "handle_input", "_init_colors"] + sorted(name for name in dir(type(picker)) if name.startswith("_display_"))
+    for name in names:
+      setattr(picker, name, self._wrap(name, getattr(picker, name)))
+    renderer = _CountingRenderer(picker.renderer, self.counts)
+    renderer.flush = self._wrap("flush", picker.renderer.flush)
+    picker.renderer = picker._out = renderer
+    picker.screen = _CountingScreen(picker.screen, self)
+    self._picker = picker
+
+  def detach(self):
+    """Restores the methods and the screen of the color picker.
+    """
+    picker = self._picker
+    if picker is None:
+      return
+    for name in list(vars(picker)):
+      if name in ("draw", "handle_input", "_init_colors") or name.startswith("_display_"):
+        delattr(picker, name)
+    picker.renderer = picker._out = picker.renderer._renderer
+    picker.screen = picker.screen._screen
+    self._picker = None
+
+  def _wrap(self, name:str, function):
+    record = self.record
+    counts = self.counts
+    if name == "handle_input":
+      def wrapper(*args, **kwargs):
+        start = time.perf_counter_ns()
+        if self._key_time is None:
+          self._key_time = start # the first key waiting for the next frame
+        try:
+          return function(*args, **kwargs)
+        finally:
+          record(name, start, time.perf_counter_ns())
+    elif name == "draw":
+      def wrapper(*args, **kwargs):
+        before = counts[:]
+        start = time.perf_counter_ns()
+        try:
+          return function(*args, **kwargs)
+        finally:
+          self._end_frame(start, time.perf_counter_ns(), before)
+    else:
+      def wrapper(*args, **kwargs):
+        before = counts[:]
+        start = time.perf_counter_ns()
+        try:
+          return function(*args, **kwargs)
+        finally:
+          record(name, start, time.perf_counter_ns(), before)
+    return wrapper
+
+  def record(self, name:str, start:int, end:int, before:list[int]|None=None, written:int|None=None):
+    """Adds the time of a section and its trace event.
+
+    Args:
+      name: The name of the section.
+      start: The start time from time.perf_counter_ns().
+      end: The end time from time.perf_counter_ns().
+      before: The counts at the start of the section, the differences are added to the section and its trace event.
+      written: The bytes written to the terminal, if known.
+    """
+    duration = end - start
+    section = self.sections.get(name)
+    if section is None:
+      section = self.sections[name] = [0] * (3 + len(COUNT_NAMES))
+    section[0] += 1
+    section[1] += duration
+    if duration > section[2]:
+      section[2] = duration
+    differences = None
+    if before is not None:
+      differences = [value - old for value, old in zip(self.counts, before)]
+      for i, difference in enumerate(differences, 3):
+        section[i] += difference
+    if len(self.events) >= MAX_EVENTS:
+      self.dropped += 1
+      return
+    event = {"name": name, "ph": "X", "ts": (start - self._start) / 1000, "dur": duration / 1000, "pid": self._pid, "tid": 0}
+    args = {}
+    if differences is not None:
+      for key, difference in zip(COUNT_NAMES, differences):
+        if difference:
+          args[key] = difference
+    if written is not None:
+      args["bytes"] = written
+    if args:
+      event["args"] = args
+    self.events.append(event)
+
+  def _end_frame(self, start:int, end:int, before:list[int]):
+    self.record("draw", start, end, before)
+    self.frames += 1
+    latency = None
+    if self._key_time is not None:
+      latency = end - self._key_time
+      self.latencies.append(latency)
+      if len(self.events) < MAX_EVENTS:
+        self.events.append({
+          "name": "key to paint", "ph": "X", "ts": (self._key_time - self._start) / 1000, "dur": latency / 1000,
+          "pid": self._pid, "tid": 1
+        })
+      self._key_time = None
+    self._last_frame = (end - start, *(value - old for value, old in zip(self.counts, before)), latency)
+
+  def overlay_text(self) -> str:
+    """The numbers of the last frame as shown by the overlay.
+    """
+    if self._last_frame is None:
+      return " profiling..."
+    duration, spans, attron, attroff, chars, addstr, written, latency = self._last_frame
+    text = " frame %i: draw %.2f ms, spans %i, attron %i, attroff %i, chars %i, addstr %i, written %i" % (
+      self.frames, duration / 1e6, spans, attron, attroff, chars, addstr, written
+    )
+    if latency is not None:
+      text += ", key to paint %.2f ms" % (latency / 1e6)
+    return text
+
+  def draw_overlay(self, screen):
+    """Writes the overlay to the screen without counting it.
+
+    Args:
+      screen: The screen of the color picker, not the counting wrapper.
+    """
+    try:
+      _, width = screen.getmaxyx()
+    except (AttributeError, TypeError, ValueError):
+      width = 80
+    screen.move(OVERLAY_Y, 0)
+    screen.addstr(self.overlay_text()[:width - 1].ljust(width - 1))
+
+  def summary(self) -> dict:
+    """The totals of all recorded frames.
+
+    Returns:
+      A dict with:
+        - sections: {name: {"calls", "total_ms", "mean_ms", "max_ms", "spans", "attron", "attroff", "chars", "addstr", "written"}}
+          The spans, attron, attroff and chars are added to the renderer, addstr and written are the calls and characters sent to the screen.
+        - counts: The totals of the counts of the sections.
+        - frames: The number of frames drawn.
+        - key_to_paint_ms: {"count", "mean", "p50", "p95", "max"} or None if no key was handled.
+    """
+    sections = {
+      name: {"calls": calls, "total_ms": total / 1e6, "mean_ms": total / calls / 1e6, "max_ms": maximum / 1e6, **dict(zip(COUNT_NAMES, counts))}
+      for name, (calls, total, maximum, *counts) in self.sections.items()
+    }
+    latency = None
+    if self.latencies:
+      values = sorted(self.latencies)
+      latency = {
+        "count": len(values), "mean": sum(values) / len(values) / 1e6, "p50": values[len(values) // 2] / 1e6,
+        "p95": values[min(len(values) - 1, len(values) * 95 // 100)] / 1e6, "max": values[-1] / 1e6
+      }
+    counts = dict(zip(COUNT_NAMES, self.counts))
+    return {"sections": sections, "counts": counts, "frames": self.frames, "key_to_paint_ms": latency}
+
+  def report(self) -> str:
+    """The summary as text table, the slowest sections first.
+    """
+    summary = self.summary()
+    lines = ["%-28s %7s %10s %9s %9s %9s %10s %9s %10s" % ("section", "calls", "total ms", "mean ms", "max ms", "spans", "chars", "addstr", "written")]
+    for name, section in sorted(summary["sections"].items(), key=lambda item: -item[1]["total_ms"]):
+      lines.append("%-28s %7i %10.2f %9.3f %9.3f %9i %10i %9i %10i" % (
+        name, section["calls"], section["total_ms"], section["mean_ms"], section["max_ms"],
+        section["spans"], section["chars"], section["addstr"], section["written"]
+      ))
+    lines.append("frames %i, spans %i, attron %i, attroff %i, chars %i, addstr %i, written %i" % (summary["frames"], *summary["counts"].values()))
+    latency = summary["key_to_paint_ms"]
+    if latency is not None:
+      lines.append("key to paint: %i keys, mean %.2f ms, p50 %.2f ms, p95 %.2f ms, max %.2f ms" % (
+        latency["count"], latency["mean"], latency["p50"], latency["p95"], latency["max"]
+      ))
+    if self.dropped:
+      lines.append("%i trace events dropped" % self.dropped)
+    return "\n".join(lines)
+
+  def write_trace(self, path:str|None=None):
+    """Writes the trace events in the Chrome trace event format.
+
+    Args:
+      path: The file to write. Default is the trace_path given to the constructor.
+    """
+    path = path or self.trace_path
+    if path is None:
+      raise ValueError("no path for the trace")
+    metadata = [
+      {"name": "process_name", "ph": "M", "pid": self._pid, "tid": 0, "args": {"name": "ncolorpicker"}},
+      {"name": "thread_name", "ph": "M", "pid": self._pid, "tid": 0, "args": {"name": "sections"}},
+      {"name": "thread_name", "ph": "M", "pid": self._pid, "tid": 1, "args": {"name": "key to paint"}},
+    ]
+    with open(path, "w") as f:
+      json.dump({"traceEvents": metadata + self.events, "displayTimeUnit": "ms"}, f)
@@ -0,0 +1,224 @@
+""" This module finds the nearest color of the 256-color range for any 24bit RGB value.
+
+The search uses a 3D lookup table that splits the RGB cube into levels^3 buckets.
+Each bucket stores every palette color that can be the nearest color for at least one RGB value inside of the bucket.
+Because of that a lookup only has to compare the distances to the few candidates of its bucket to get the exact nearest color.
+
+The candidates of a bucket are found with the triangle inequality:
+  - D is the distance from the center of the bucket to the palette color nearest to the center.
+  - R is the distance from the center of the bucket to its corners.
+  - Every RGB value inside of the bucket is at most D + R away from that color.
+  - A palette color further away than D + 2R from the center can therefore never be the nearest color of a value inside of the bucket.
+
+Single lookups fill the buckets the first time they are used.
+If NumPy is installed, nearest_array() builds the whole table at once on its first call and converts whole arrays of pixels.
+"""
+
+
+from calculations import color_rgb
+from constants import COLOR_MAX, RGB_COLOR_START
+from functions import hex_to_rgb
+
+_numpy = False # not tried to import yet
+
+
+def load_numpy():
+  """Imports NumPy the first time it is needed. Importing it takes longer than everything else, so short running commands should not pay for it.
+
+  Returns:
+    The numpy module or None if it is not installed.
+  """
+  global _numpy
+  if _numpy is False:
+    try:
+      import numpy
+      _numpy = numpy
+    except ImportError: # NumPy is optional and only needed for nearest_array()
+      _numpy = None
+  return _numpy
+
+
+class Quantizer(object):
+  """Finds the nearest palette color for 24bit RGB values using the squared euclidean distance.
+  If two colors are equally near, the lower color value is used.
+
+  Example:
+    quantizer = Quantizer()
+    quantizer.nearest(255, 136, 0) # 208
+    quantizer.nearest_hex("#ff8800") # 208
+  """
+
+  levels:int
+  colors:list[int]
+  palette:list[tuple[int,int,int]]
+
+  def __init__(self, levels:int=32, include_basic:bool=True, palette:list[tuple[int,int,int]]|None=None):
+    """
+    Args:
+      levels: The number of buckets per channel. Has to be a power of two between 1 and 256.
+      include_basic: If False, only the rgb and gray colors are used. Terminals often change the basic colors.
+      palette: The RGB values of all 256 colors. Default are the xterm values of calculations.color_rgb.
+    """
+    if levels < 1 or levels > 256 or levels & (levels - 1):
+      raise ValueError("levels has to be a power of two between 1 and 256")
+    self.levels = levels
+    self.palette = list(palette) if palette is not None else [color_rgb(c) for c in range(COLOR_MAX)]
+    self.colors = list(range(0 if include_basic else RGB_COLOR_START, COLOR_MAX))
+    self._shift = 8 - (levels.bit_length() - 1)
+    self._lut = [None] * (levels ** 3)
+    self._array_lut = None
+
+  def _bucket(self, r:int, g:int, b:int) -> int:
+    shift = self._shift
+    return (((r >> shift) * self.levels) + (g >> shift)) * self.levels + (b >> shift)
+
+  def _build_bucket(self, bucket:int) -> tuple[int,...]:
+    size = 1 << self._shift
+    levels = self.levels
+    half = (size - 1) / 2
+    cr = (bucket // (levels * levels)) * size + half
+    cg = ((bucket // levels) % levels) * size + half
+    cb = (bucket % levels) * size + half
+    distances = []
+    for color in self.colors:
+      r, g, b = self.palette[color]
+      distances.append(((r - cr) ** 2 + (g - cg) ** 2 + (b - cb) ** 2) ** 0.5)
+    limit = min(distances) + 2 * half * 3 ** 0.5
+    candidates = tuple(color for color, distance in zip(self.colors, distances) if distance <= limit + 1e-9)
+    self._lut[bucket] = candidates
+    return candidates
+
+  def _build_array_lut(self):
+    # all buckets at once, padded with the first candidate to the same width
+    np = load_numpy()
+    size = 1 << self._shift
+    levels = self.levels
+    half = (size - 1) / 2
+    steps = np.arange(levels, dtype=np.float64) * size + half
+    centers = np.stack(np.meshgrid(steps, steps, steps, indexing="ij"), axis=-1).reshape(-1, 3)
+    colors = np.array(self.colors, dtype=np.int64)
+    palette = np.array([self.palette[c] for c in self.colors], dtype=np.float64)
+    rows = []
+    width = 1
+    for start in range(0, len(centers), 4096):
+      part = centers[start:start + 4096]
+      distances = np.sqrt(((part[:, None, :] - palette[None, :, :]) ** 2).sum(axis=-1))
+      mask = distances <= (distances.min(axis=1) + 2 * half * 3 ** 0.5 + 1e-9)[:, None]
+      count = int(mask.sum(axis=1).max())
+      # stable sort puts the candidates first and keeps them ordered by color value
+      order = np.argsort(~mask, axis=1, kind="stable")[:, :count]
+      candidates = colors[order]
+      candidates = np.where(np.arange(count)[None, :] < mask.sum(axis=1)[:, None], candidates, candidates[:, :1])
+      rows.append(candidates)
+      width = max(width, count)
+    rows = [np.pad(part, ((0, 0), (0, width - part.shape[1])), mode="edge") for part in rows]
+    self._array_lut = np.concatenate(rows).astype(np.uint8)
+    # the channels and squared length of each candidate, so the distance needs no gather of the palette:
+    # (p - c)^2 = p^2 - 2pc + c^2 and p^2 is the same for all candidates of a pixel
+    palette = np.array(self.palette, dtype=np.int32)
+    self._array_r = palette[self._array_lut, 0]
+    self._array_g = palette[self._array_lut, 1]
+    self._array_b = palette[self._array_lut, 2]
+    self._array_length = self._array_r ** 2 + self._array_g ** 2 + self._array_b ** 2
+
+  def nearest(self, r:int, g:int, b:int) -> int:
+    """Finds the nearest palette color of a 24bit RGB value.
+
+    Args:
+      r: The red channel. (0-255)
+      g: The green channel. (0-255)
+      b: The blue channel. (0-255)
+
+    Returns:
+      The color value of the nearest palette color. (0-255)
+
+    Raises:
+      ValueError: If a channel is not between 0 and 255.
+    """
+    if not (0 <= r < 256 and 0 <= g < 256 and 0 <= b < 256):
+      raise ValueError("the channels have to be between 0 and 255")
+    bucket = self._bucket(r, g, b)
+    candidates = self._lut[bucket]
+    if candidates is None:
+      candidates = self._build_bucket(bucket)
+    if len(candidates) == 1:
+      return candidates[0]
+    palette = self.palette
+    best = candidates[0]
+    pr, pg, pb = palette[best]
+    best_distance = (pr - r) ** 2 + (pg - g) ** 2 + (pb - b) ** 2
+    for color in candidates[1:]:
+      pr, pg, pb = palette[color]
+      distance = (pr - r) ** 2 + (pg - g) ** 2 + (pb - b) ** 2
+      if distance < best_distance:
+        best, best_distance = color, distance
+    return best
+
+  def nearest_hex(self, s:str) -> int:
+    """Finds the nearest palette color of a hex color like "#ff8800".
+
+    Args:
+      s: The hex color.
+
+    Returns:
+      The color value of the nearest palette color. (0-255)
+    """
+    return self.nearest(*hex_to_rgb(s))
+
+  def nearest_array(self, rgb, chunk_size:int=1 << 12):
+    """Finds the nearest palette colors of a whole NumPy array of RGB values.
+
+    Args:
+      rgb: An array of shape (..., 3) with channel values between 0 and 255.
+      chunk_size: The number of pixels converted at once. Limits the temporary memory.
+
+    Returns:
+      An uint8 array with the shape of rgb without the last axis containing the color values.
+    """
+    np = load_numpy()
+    if np is None:
+      raise RuntimeError("nearest_array() needs NumPy")
+    if self._array_lut is None:
+      self._build_array_lut()
+    rgb = np.asarray(rgb)
+    pixels = rgb.reshape(-1, 3).astype(np.int32, copy=False)
+    result = np.empty(len(pixels), dtype=np.uint8)
+    shift = self._shift
+    levels = self.levels
+    for start in range(0, len(pixels), chunk_size):
+      part = pixels[start:start + chunk_size]
+      r, g, b = part[:, 0:1], part[:, 1:2], part[:, 2:3]
+      buckets = (((part[:, 0] >> shift) * levels) + (part[:, 1] >> shift)) * levels + (part[:, 2] >> shift)
+      distances = self._array_length[buckets] - 2 * (r * self._array_r[buckets] + g * self._array_g[buckets] + b * self._array_b[buckets])
+      result[start:start + chunk_size] = self._array_lut[buckets, distances.argmin(axis=1)]
+    return result.reshape(rgb.shape[:-1])
+
+
+_default_quantizer = None
+
+
+def default_quantizer() -> Quantizer:
+  """Returns the shared quantizer for the default xterm palette. It is created on the first call.
+  """
+  global _default_quantizer
+  if _default_quantizer is None:
+    _default_quantizer = Quantizer()
+  return _default_quantizer
+
+
+def nearest_256(r:int, g:int, b:int) -> int:
+  """Finds the nearest color of the 256-color range for a 24bit RGB value using the default quantizer.
+
+  Example:
+    nearest_256(255, 136, 0) # 208
+  """
+  return default_quantizer().nearest(r, g, b)
+
+
+def nearest_hex(s:str) -> int:
+  """Finds the nearest color of the 256-color range for a hex color using the default quantizer.
+
+  Example:
+    nearest_hex("#ff8800") # 208
+  """
+  return default_quantizer().nearest_hex(s)
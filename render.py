@@ -0,0 +1,299 @@
+""" This module renders PPM and PGM images as 256-color ANSI art using the upper half block character.
+
+Each character shows two pixels: The foreground color is the upper pixel and the background color the lower one.
+The image is read, quantized and written two rows at a time, so even very large images never have to be in memory at once.
+
+Usage:
+  ncolorpicker render [--width N] [--dither] image.ppm
+"""
+
+
+import argparse
+import sys
+from array import array
+
+from functions import FG_ESCAPES_BYTES, BG_ESCAPES_BYTES, RESET_BYTES
+from quantize import Quantizer, load_numpy
+
+
+HALF_BLOCK = "▀".encode() # upper half block, the foreground color fills the upper half
+BAYER_4X4 = [
+  [0, 8, 2, 10],
+  [12, 4, 14, 6],
+  [3, 11, 1, 9],
+  [15, 7, 13, 5]
+]
+DITHER_SPREAD = 40 # about the distance between two rgb color levels
+CHUNK_SIZE = 1 << 20 # the output is written in chunks of about 1 MiB
+
+
+def _read_token(stream) -> bytes:
+  token = b""
+  while True:
+    c = stream.read(1)
+    if not c:
+      return token
+    if c == b"#":
+      while c not in (b"\n", b""):
+        c = stream.read(1)
+      continue
+    if c.isspace():
+      if token:
+        return token
+      continue
+    token += c
+
+
+def read_header(stream) -> tuple[bytes, int, int, int]:
+  """Reads the header of a binary or plain PPM or PGM image.
+
+  Args:
+    stream: The binary stream of the image.
+
+  Returns:
+    The magic number, width, height and maximum value of the image. (b"P6", 640, 480, 255)
+
+  Raises:
+    ValueError: If the stream is not a PPM or PGM image.
+  """
+  magic = stream.read(2)
+  if magic not in (b"P2", b"P3", b"P5", b"P6"):
+    raise ValueError("Not a PPM or PGM image")
+  width = int(_read_token(stream))
+  height = int(_read_token(stream))
+  max_value = int(_read_token(stream))
+  if width <= 0 or height <= 0 or not 0 < max_value < 65536:
+    raise ValueError("Invalid image size or maximum value")
+  return magic, width, height, max_value
+
+
+def read_rows(stream, magic:bytes, width:int, height:int, max_value:int):
+  """Reads the rows of an image one at a time.
+
+  Args:
+    stream: The binary stream of the image after the header.
+    magic: The magic number of the image.
+    width: The width of the image.
+    height: The height of the image.
+    max_value: The maximum value of a channel.
+
+  Returns:
+    A generator of rows as bytes or bytearray with 3 channels (0-255) per pixel. Each row is a new object, so earlier rows can be kept.
+  """
+  channels = 3 if magic in (b"P3", b"P6") else 1
+  values = width * channels
+  wide = max_value > 255
+  size = values * (2 if wide else 1)
+  # the channel (0-255) of each value that can be read, larger values than max_value are clipped
+  scale = None
+  if max_value != 255:
+    scale = bytes(min(255, v * 255 // max_value) for v in range(65536 if wide else 256))
+  np = load_numpy() if wide else None
+  for _ in range(height):
+    if magic in (b"P2", b"P3"):
+      row = [int(_read_token(stream) or 0) for _ in range(values)]
+      row = bytes(row) if scale is None else bytes(scale[min(v, len(scale) - 1)] for v in row)
+    else:
+      row = bytearray(size)
+      view = memoryview(row)
+      filled = 0
+      while filled < size:
+        count = stream.readinto(view[filled:])
+        if not count:
+          raise ValueError("Unexpected end of image")
+        filled += count
+      view.release()
+      if wide:
+        # 16 bit values are big endian
+        if np is not None:
+          row = np.frombuffer(scale, dtype=np.uint8)[np.frombuffer(row, dtype=">u2")].tobytes()
+        else:
+          words = array("H", row)
+          if sys.byteorder == "little":
+            words.byteswap()
+          row = bytes(map(scale.__getitem__, words))
+      elif scale is not None:
+        row = row.translate(scale)
+    if channels == 1:
+      gray = row
+      row = bytearray(len(gray) * 3)
+      row[0::3] = gray
+      row[1::3] = gray
+      row[2::3] = gray
+    yield row
+
+
+class ImageRenderer(object):
+  """Quantizes rows of pixels and writes them as half block characters.
+
+  Example:
+    renderer = ImageRenderer(sys.stdout.buffer, width=640)
+    renderer.write_rows(upper_row, lower_row)
+    renderer.close()
+  """
+
+  def __init__(self, out, width:int, dither:bool=False, quantizer:Quantizer|None=None, chunk_size:int=CHUNK_SIZE):
+    """
+    Args:
+      out: The binary stream to write to.
+      width: The number of pixels of each row.
+      dither: If True, ordered dithering is used before the colors are quantized.
+      quantizer: The quantizer used to find the colors. Default is a new Quantizer.
+      chunk_size: The size of the output buffer that is written at once.
+    """
+    self.out = out
+    self.width = width
+    self.dither = dither
+    self.quantizer = quantizer or Quantizer()
+    self.chunk_size = chunk_size
+    self._buffer = bytearray()
+    self._y = 0
+    self._offsets = [[(BAYER_4X4[y][x % 4] + 0.5) / 16 * DITHER_SPREAD - DITHER_SPREAD / 2 for x in range(width)] for y in range(4)]
+    self._np = load_numpy()
+    if self._np is not None:
+      self._offsets = self._np.array(self._offsets, dtype=self._np.int16)[:, :, None]
+
+  def _quantize(self, row:bytes) -> list[int]:
+    y = self._y
+    self._y += 1
+    np = self._np
+    if np is not None:
+      pixels = np.frombuffer(row, dtype=np.uint8).reshape(-1, 3)
+      if self.dither:
+        pixels = np.clip(pixels + self._offsets[y % 4], 0, 255)
+      return self.quantizer.nearest_array(pixels).tolist()
+    nearest = self.quantizer.nearest
+    if not self.dither:
+      return [nearest(row[i], row[i + 1], row[i + 2]) for i in range(0, len(row), 3)]
+    offsets = self._offsets[y % 4]
+    colors = []
+    for x in range(self.width):
+      offset = int(offsets[x])
+      r, g, b = (min(255, max(0, row[3 * x + c] + offset)) for c in range(3))
+      colors.append(nearest(r, g, b))
+    return colors
+
+  def write_rows(self, upper:bytes, lower:bytes|None=None):
+    """Writes one line of characters for two rows of pixels.
+
+    Args:
+      upper: The upper row as bytes with 3 channels per pixel.
+      lower: The lower row, None for the last line of an image with an odd height.
+    """
+    fg_row = self._quantize(upper)
+    buffer = self._buffer
+    fg_escapes = FG_ESCAPES_BYTES
+    last_fg = -1
+    if lower is None:
+      buffer += b"\033[49m"
+      for fg in fg_row:
+        if fg != last_fg:
+          buffer += fg_escapes[fg]
+          last_fg = fg
+        buffer += HALF_BLOCK
+    else:
+      bg_row = self._quantize(lower)
+      bg_escapes = BG_ESCAPES_BYTES
+      last_bg = -1
+      for fg, bg in zip(fg_row, bg_row):
+        if fg != last_fg:
+          buffer += fg_escapes[fg]
+          last_fg = fg
+        if bg != last_bg:
+          buffer += bg_escapes[bg]
+          last_bg = bg
+        buffer += HALF_BLOCK
+    buffer += RESET_BYTES + b"\n"
+    if len(buffer) >= self.chunk_size:
+      self.out.write(buffer)
+      buffer.clear()
+
+  def close(self):
+    """Writes the remaining output.
+    """
+    if self._buffer:
+      self.out.write(self._buffer)
+      self._buffer.clear()
+    self.out.flush()
+
+
+def _scaled_rows(rows, width:int, height:int, target_width:int):
+  # nearest neighbour scaling, rows that are not needed are skipped while reading
+  if target_width >= width:
+    yield from rows
+    return
+  columns = [(x * width // target_width) * 3 for x in range(target_width)]
+  target_height = max(1, height * target_width // width)
+  next_row = 0
+  for y, row in enumerate(rows):
+    if next_row >= target_height:
+      break
+    if y == next_row * height // target_height:
+      yield b"".join(row[c:c + 3] for c in columns)
+      next_row += 1
+
+
+def render(stream, out, width:int|None=None, dither:bool=False, chunk_size:int=CHUNK_SIZE):
+  """Renders a PPM or PGM image as 256-color ANSI art.
+
+  Args:
+    stream: The binary stream of the image.
+    out: The binary stream to write the ANSI art to.
+    width: The maximum width in characters. Larger images are scaled down.
+    dither: If True, ordered dithering is used before the colors are quantized.
+    chunk_size: The size of the output buffer that is written at once.
+
+  Raises:
+    ValueError: If the stream is not a PPM or PGM image or the width is smaller than 1.
+  """
+  if width is not None and width < 1:
+    raise ValueError("the width has to be at least 1")
+  magic, image_width, image_height, max_value = read_header(stream)
+  rows = read_rows(stream, magic, image_width, image_height, max_value)
+  if width is not None and width < image_width:
+    rows = _scaled_rows(rows, image_width, image_height, width)
+    image_width = width
+  renderer = ImageRenderer(out, image_width, dither=dither, chunk_size=chunk_size)
+  upper = None
+  for row in rows:
+    if upper is None:
+      upper = row
+    else:
+      renderer.write_rows(upper, row)
+      upper = None
+  if upper is not None:
+    renderer.write_rows(upper)
+  renderer.close()
+
+
+def _width(value:str) -> int:
+  width = int(value)
+  if width < 1:
+    raise argparse.ArgumentTypeError("the width has to be at least 1")
+  return width
+
+
+def main(argv:list[str]|None=None) -> int:
+  """Command line interface of the render mode.
+
+  Args:
+    argv: The arguments after "render".
+
+  Returns:
+    The exit code.
+  """
+  parser = argparse.ArgumentParser(prog="ncolorpicker render", description="Render a PPM or PGM image as 256-color ANSI art.")
+  parser.add_argument("image", help="the PPM or PGM image, - for stdin")
+  parser.add_argument("--width", type=_width, default=None, help="scale the image down to this many characters")
+  parser.add_argument("--dither", action="store_true", help="use ordered dithering")
+  args = parser.parse_args(argv)
+  try:
+    if args.image == "-":
+      render(sys.stdin.buffer, sys.stdout.buffer, args.width, args.dither)
+    else:
+      with open(args.image, "rb") as stream:
+        render(stream, sys.stdout.buffer, args.width, args.dither)
+  except (OSError, ValueError) as e:
+    print("ncolorpicker render: %s" % e, file=sys.stderr)
+    return 1
+  return 0
@@ -0,0 +1,137 @@
+""" This module contains a renderer that collects the text of a frame and writes it to a curses screen with as few calls as possible.
+"""
+
+
+class SpanRenderer(object):
+  """Collects (attribute, text) spans of a frame and merges adjacent spans with the same attribute into runs.
+  Each run is written with a single addstr call when the frame is flushed to the screen.
+
+  The renderer can be used like a curses screen for the functions move, attron, attroff and addstr.
+  Attributes enabled with attron are combined with the attribute of every span added afterwards.
+
+  Example:
+    renderer = SpanRenderer()
+    renderer.move(0, 0)
+    renderer.addstr("Hello ", uc.color_pair(1))
+    renderer.addstr("World!", uc.color_pair(1))
+    renderer.flush(screen) # one move and one addstr call
+    print(renderer.stats)
+  """
+
+  attr:int
+  stats:dict[str,int]
+
+  def __init__(self):
+    self.attr = 0
+    self.stats = {"spans": 0, "runs": 0, "calls_before": 0, "calls_after": 0}
+    self._ops = []
+    self._last = None
+    self._spans = 0
+    self._calls_before = 0
+
+  def attron(self, attr:int):
+    """Enables an attribute for all following spans.
+
+    Args:
+      attr: The curses attribute to enable.
+    """
+    self.attr |= attr
+    self._calls_before += 1
+
+  def attroff(self, attr:int):
+    """Disables an attribute for all following spans.
+
+    Args:
+      attr: The curses attribute to disable.
+    """
+    self.attr &= ~attr
+    self._calls_before += 1
+
+  def move(self, y:int, x:int):
+    """Moves the cursor. Runs are never merged across a move.
+
+    Args:
+      y: The line to move to.
+      x: The column to move to.
+    """
+    self._ops.append((y, x))
+    self._last = None
+    self._calls_before += 1
+
+  def addstr(self, text:str, attr:int=0):
+    """Adds a span of text to the frame.
+
+    Args:
+      text: The text of the span.
+      attr: The curses attribute of the span. It is combined with the attributes enabled by attron.
+    """
+    attr |= self.attr
+    self._spans += 1
+    self._calls_before += 3 if attr else 1 # attron, addstr, attroff for each span
+    last = self._last
+    if last is not None and last[0] == attr:
+      last[1].append(text)
+    else:
+      last = [attr, [text]]
+      self._ops.append(last)
+      self._last = last
+
+  def flush(self, screen):
+    """Writes all collected runs to the screen and starts a new frame.
+    The call counts of the frame are stored in stats afterwards:
+      - spans: The number of spans added.
+      - runs: The number of runs written after merging.
+      - calls_before: The curses calls needed to write every span with attron, addstr and attroff.
+      - calls_after: The curses calls used to write the runs.
+
+    Args:
+      screen: The curses screen to write to.
+    """
+    calls = 0
+    runs = 0
+    for op in self._ops:
+      if type(op) is tuple:
+        screen.move(*op)
+      else:
+        attr, parts = op
+        text = parts[0] if len(parts) == 1 else "".join(parts)
+        if attr:
+          screen.addstr(text, attr)
+        else:
+          screen.addstr(text)
+        runs += 1
+      calls += 1
+    self.stats = {"spans": self._spans, "runs": runs, "calls_before": self._calls_before, "calls_after": calls}
+    self.discard()
+
+  def take(self) -> list:
+    """Returns the collected frame without writing it and starts a new frame.
+    The returned operations can be added to other frames with replay, so text that never changes only has to be collected once.
+
+    Returns:
+      The operations of the frame.
+    """
+    ops = self._ops
+    self.discard()
+    return ops
+
+  def replay(self, ops:list):
+    """Adds operations returned by take to the frame.
+
+    Args:
+      ops: The operations to add. They are not changed, so they can be replayed again.
+    """
+    self._ops.extend(ops)
+    self._last = None # never merge into a replayed run, it is shared with later frames
+    for op in ops:
+      if type(op) is not tuple:
+        self._spans += len(op[1])
+
+  def discard(self):
+    """Drops the collected frame without writing it.
+    """
+    self.attr = 0
+    self._ops = []
+    self._last = None
+    self._spans = 0
+    self._calls_before = 0
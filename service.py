@@ -0,0 +1,222 @@
+""" This module answers color queries as JSON lines, so scripts can share one running process instead of starting a new one for each lookup.
+
+Each request is one JSON object per line with an "op" and an optional "id" that is copied into the response.
+Each response is one JSON object per line with either a "result" or an "error".
+
+Operations:
+  {"op": "rgb", "color": 137}
+    -> {"color": 137, "levels": [3, 2, 1], "rgb": [175, 135, 95], "hex": "#af875f"}
+  {"op": "nearest", "hex": "#ff8800"} or {"op": "nearest", "rgb": [255, 136, 0]}
+    -> {"color": 208}
+  {"op": "escape", "color": 137, "foreground": true, "background": false}
+    -> {"start": "\\u001b[38;5;137m", "end": "\\u001b[0m"}
+  {"op": "gradient", "from": "#ff0000", "to": 21, "steps": 5}
+    -> {"colors": [9, 125, 90, 55, 21]}
+    The steps are limited to MAX_STEPS, so a single request can't stall the clients sharing the process.
+
+Usage:
+  ncolorpicker --serve
+  ncolorpicker --serve --socket /tmp/ncolorpicker.sock
+"""
+
+
+import argparse
+import errno
+import json
+import os
+import signal
+import socket
+import socketserver
+import stat
+import sys
+
+from calculations import color_levels, color_rgb
+from constants import COLOR_MAX
+from functions import escape_table, hex_to_rgb, RESET
+from quantize import default_quantizer
+
+
+MAX_STEPS = 1024 # the maximum steps of a gradient
+
+# the answers that only depend on the color are calculated once
+_RGB_RESULTS = []
+for _color in range(COLOR_MAX):
+  _levels = color_levels(_color)
+  _rgb = color_rgb(_color)
+  _RGB_RESULTS.append({"color": _color, "levels": list(_levels) if _levels else None, "rgb": list(_rgb), "hex": "#%02x%02x%02x" % _rgb})
+
+
+def _rgb_value(value:list) -> tuple[int,int,int]:
+  r, g, b = value
+  if not (0 <= r < 256 and 0 <= g < 256 and 0 <= b < 256):
+    raise ValueError("rgb channels have to be between 0 and 255")
+  return r, g, b
+
+
+def _color_arg(request:dict, key:str) -> int:
+  value = request[key]
+  if isinstance(value, str):
+    return default_quantizer().nearest_hex(value)
+  if isinstance(value, list):
+    return default_quantizer().nearest(*_rgb_value(value))
+  if not 0 <= value < COLOR_MAX:
+    raise ValueError("%s has to be between 0 and 255" % key)
+  return value
+
+
+def _rgb_arg(request:dict, key:str) -> tuple[int,int,int]:
+  value = request[key]
+  if isinstance(value, str):
+    return hex_to_rgb(value)
+  if isinstance(value, list):
+    return _rgb_value(value)
+  return color_rgb(_color_arg(request, key))
+
+
+def _op_rgb(request:dict) -> dict:
+  return _RGB_RESULTS[_color_arg(request, "color")]
+
+
+def _op_nearest(request:dict) -> dict:
+  if "hex" in request:
+    return {"color": default_quantizer().nearest_hex(request["hex"])}
+  return {"color": default_quantizer().nearest(*_rgb_value(request["rgb"]))}
+
+
+def _op_escape(request:dict) -> dict:
+  color = _color_arg(request, "color")
+  table = escape_table(request.get("foreground", True), request.get("background", False))
+  return {"start": table[color], "end": RESET}
+
+
+def _op_gradient(request:dict) -> dict:
+  r1, g1, b1 = _rgb_arg(request, "from")
+  r2, g2, b2 = _rgb_arg(request, "to")
+  steps = int(request.get("steps", 10))
+  if not 2 <= steps <= MAX_STEPS:
+    raise ValueError("steps has to be between 2 and %i" % MAX_STEPS)
+  nearest = default_quantizer().nearest
+  colors = []
+  for i in range(steps):
+    t = i / (steps - 1)
+    colors.append(nearest(round(r1 + (r2 - r1) * t), round(g1 + (g2 - g1) * t), round(b1 + (b2 - b1) * t)))
+  return {"colors": colors}
+
+
+OPERATIONS = {
+  "rgb": _op_rgb,
+  "nearest": _op_nearest,
+  "escape": _op_escape,
+  "gradient": _op_gradient,
+}
+
+
+def handle_line(line:bytes|str) -> bytes:
+  """Answers one request line.
+
+  Args:
+    line: The JSON request.
+
+  Returns:
+    The JSON response as bytes ending with a newline.
+  """
+  request_id = None
+  try:
+    request = json.loads(line)
+    request_id = request.get("id")
+    result = OPERATIONS[request["op"]](request)
+    response = {"id": request_id, "result": result}
+  except KeyError as e:
+    response = {"id": request_id, "error": "missing or unknown %s" % e}
+  except (ValueError, TypeError, AttributeError) as e:
+    response = {"id": request_id, "error": str(e)}
+  return (json.dumps(response, separators=(",", ":")) + "\n").encode()
+
+
+def serve_stream(stream_in, stream_out):
+  """Answers requests from a binary stream until it ends.
+
+  Args:
+    stream_in: The binary stream to read the requests from.
+    stream_out: The binary stream to write the responses to.
+  """
+  for line in stream_in:
+    if not line.strip():
+      continue
+    stream_out.write(handle_line(line))
+    stream_out.flush()
+
+
+class _StreamHandler(socketserver.StreamRequestHandler):
+
+  def handle(self):
+    serve_stream(self.rfile, self.wfile)
+
+
+class _Terminated(Exception):
+  # raised by the SIGTERM handler, so the socket is removed like after Ctrl+C
+  pass
+
+
+def _terminate(signum, frame):
+  raise _Terminated()
+
+
+def serve_socket(path:str):
+  """Answers requests of many clients on a Unix domain socket until the process is stopped with Ctrl+C or SIGTERM.
+  The socket is removed when the service stops.
+
+  Args:
+    path: The path of the socket. An old socket that nothing listens on anymore is replaced.
+
+  Raises:
+    FileExistsError: If something else than a socket exists at the path.
+    OSError: With errno.EADDRINUSE if another service is listening on the socket.
+  """
+  try:
+    mode = os.lstat(path).st_mode
+  except FileNotFoundError:
+    pass
+  else:
+    if not stat.S_ISSOCK(mode):
+      raise FileExistsError(errno.EEXIST, "exists and is not a socket", path)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+      try:
+        client.connect(path)
+      except ConnectionRefusedError:
+        os.unlink(path) # left behind by a service that was killed
+      else:
+        raise OSError(errno.EADDRINUSE, "another service is listening on the socket", path)
+  with socketserver.ThreadingUnixStreamServer(path, _StreamHandler) as server:
+    server.daemon_threads = True
+    previous = signal.signal(signal.SIGTERM, _terminate)
+    try:
+      server.serve_forever()
+    except (KeyboardInterrupt, _Terminated):
+      pass
+    finally:
+      signal.signal(signal.SIGTERM, previous)
+      os.unlink(path)
+
+
+def main(argv:list[str]|None=None) -> int:
+  """Command line interface of the query service.
+
+  Args:
+    argv: The arguments after "--serve".
+
+  Returns:
+    The exit code.
+  """
+  parser = argparse.ArgumentParser(prog="ncolorpicker --serve", description="Answer color queries as JSON lines.")
+  parser.add_argument("--socket", default=None, help="listen on this Unix domain socket instead of stdin/stdout")
+  args = parser.parse_args(argv)
+  if args.socket:
+    try:
+      serve_socket(args.socket)
+    except OSError as e:
+      print("ncolorpicker --serve: %s" % e, file=sys.stderr)
+      return 1
+  else:
+    serve_stream(sys.stdin.buffer, sys.stdout.buffer)
+  return 0
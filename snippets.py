@@ -0,0 +1,132 @@
+""" This module creates code snippets that print text in a color, for several programming languages.
+
+A snippet is a tuple of (kind, text) tokens, so it can be drawn with syntax highlighting without parsing it again.
+The snippets are cached, so showing a snippet of a color and language a second time only needs a lookup.
+The escape characters of each language are replaced with a translation table in a single pass over the text.
+
+Example:
+  snippet_text(196, "bash", "both") # printf '\\033[38;5;196m\\033[48;5;196m%s\\033[0m\\n' "$text"
+"""
+
+
+import functools
+
+from constants import COLOR_MAX
+from functions import ESCAPE_TABLE, FG_ESCAPES, BG_ESCAPES, RESET
+
+
+LANGUAGES = ("python", "bash", "c", "javascript", "raw")
+LANGUAGE_NAMES = {"python": "Python", "bash": "Bash", "c": "C", "javascript": "JavaScript", "raw": "Raw bytes"}
+MODES = ("foreground", "background", "both")
+SNIPPET_CACHE_SIZE = 4096 # enough for every color, language and mode
+
+# the kinds of tokens
+FUNCTION = 0
+BRACKET = 1
+STRING = 2
+OPERATOR = 3
+VARIABLE = 4
+COMMENT = 5
+
+
+def _caret_table() -> dict[int,str]:
+  # control characters as shown by "cat -v", for example "^[" for the escape character
+  table = {code: "^" + chr(code + 64) for code in range(32)}
+  table[127] = "^?"
+  return table
+
+
+_ESCAPES = {
+  "python": str.maketrans({**ESCAPE_TABLE, '"': '\\"'}),
+  "bash": str.maketrans({**ESCAPE_TABLE, "%": "%%", "'": "'\\''"}), # inside a single quoted printf format
+  "c": str.maketrans({**ESCAPE_TABLE, '"': '\\"', "%": "%%"}), # inside a printf format
+  "javascript": str.maketrans({**ESCAPE_TABLE, '"': '\\"', "\033": "\\x1b"}), # octal escapes are not allowed in strict mode
+  "raw": _caret_table(),
+}
+_COMMENTS = {"python": "# ", "bash": "# ", "c": "// ", "javascript": "// ", "raw": ""}
+
+
+def _python(start:list[str], end:str) -> list[tuple[int,str]]:
+  tokens = [(FUNCTION, "print"), (BRACKET, "(")]
+  for escape in start:
+    tokens += [(STRING, '"%s"' % escape), (OPERATOR, " + ")]
+  return tokens + [(VARIABLE, "text"), (OPERATOR, " + "), (STRING, '"%s"' % end), (BRACKET, ")")]
+
+
+def _bash(start:list[str], end:str) -> list[tuple[int,str]]:
+  return [(FUNCTION, "printf"), (OPERATOR, " "), (STRING, "'%s%%s%s\\n'" % ("".join(start), end)), (OPERATOR, " "), (VARIABLE, '"$text"')]
+
+
+def _c(start:list[str], end:str) -> list[tuple[int,str]]:
+  return [
+    (FUNCTION, "printf"), (BRACKET, "("), (STRING, '"%s%%s%s\\n"' % ("".join(start), end)), (OPERATOR, ", "), (VARIABLE, "text"),
+    (BRACKET, ")"), (OPERATOR, ";")
+  ]
+
+
+def _javascript(start:list[str], end:str) -> list[tuple[int,str]]:
+  return [
+    (FUNCTION, "console.log"), (BRACKET, "("), (STRING, '"%s"' % "".join(start)), (OPERATOR, " + "), (VARIABLE, "text"),
+    (OPERATOR, " + "), (STRING, '"%s"' % end), (BRACKET, ")"), (OPERATOR, ";")
+  ]
+
+
+def _raw(start:list[str], end:str) -> list[tuple[int,str]]:
+  return [(STRING, "".join(start)), (VARIABLE, "text"), (STRING, end)]
+
+
+_TEMPLATES = {"python": _python, "bash": _bash, "c": _c, "javascript": _javascript, "raw": _raw}
+
+
+def _check(language:str, mode:str):
+  if language not in _TEMPLATES:
+    raise ValueError("unknown language %r, use one of %s" % (language, ", ".join(LANGUAGES)))
+  if mode not in MODES:
+    raise ValueError("unknown mode %r, use one of %s" % (mode, ", ".join(MODES)))
+
+
+@functools.lru_cache(maxsize=SNIPPET_CACHE_SIZE)
+def snippet(color:int, language:str="python", mode:str="foreground", width:int=0) -> tuple[tuple[int,str],...]:
+  """Creates the code printing text in a color.
+
+  Args:
+    color: The color value. (0-255)
+    language: One of LANGUAGES. "raw" shows the bytes written to the terminal like "cat -v" does.
+    mode: One of MODES, the color is used for the foreground, the background or both.
+    width: The snippet is padded with spaces to this length, so it overwrites a longer snippet drawn before.
+
+  Returns:
+    The (kind, text) tokens of the snippet. kind is FUNCTION, BRACKET, STRING, OPERATOR or VARIABLE.
+
+  Example:
+    snippet(196, "c") # ((FUNCTION, "printf"), (BRACKET, "("), (STRING, '"\\\\033[38;5;196m%s\\\\033[0m\\\\n"'), ...)
+  """
+  _check(language, mode)
+  if not 0 <= color < COLOR_MAX:
+    raise ValueError("the color has to be between 0 and 255")
+  start = []
+  if mode != "background":
+    start.append(FG_ESCAPES[color])
+  if mode != "foreground":
+    start.append(BG_ESCAPES[color])
+  table = _ESCAPES[language]
+  tokens = _TEMPLATES[language]([escape.translate(table) for escape in start], RESET.translate(table))
+  length = sum(len(text) for _, text in tokens)
+  if length < width:
+    tokens.append((OPERATOR, " " * (width - length)))
+  return tuple(tokens)
+
+
+def snippet_text(color:int, language:str="python", mode:str="foreground") -> str:
+  """Creates the code printing text in a color as a single string.
+  The arguments are the same as for snippet().
+  """
+  return "".join(text for _, text in snippet(color, language, mode))
+
+
+@functools.lru_cache(maxsize=len(LANGUAGES) * len(MODES))
+def comment(language:str, mode:str) -> str:
+  """The comment naming the mode in a language, for example "# Foreground:".
+  """
+  _check(language, mode)
+  return _COMMENTS[language] + ("Both combined:" if mode == "both" else mode.capitalize() + ":")
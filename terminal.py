@@ -0,0 +1,169 @@
+""" This module contains a minimal terminal for programs that write escape sequences directly instead of using curses.
+
+The key codes returned by getch() use the same values as curses, so the same input handling works for both.
+"""
+
+
+import os
+import select
+import signal
+import termios
+import tty
+
+
+KEY_DOWN = 258
+KEY_UP = 259
+KEY_LEFT = 260
+KEY_RIGHT = 261
+KEY_HOME = 262
+KEY_BACKSPACE = 263
+KEY_NPAGE = 338
+KEY_PPAGE = 339
+KEY_ENTER = 343
+KEY_END = 360
+KEY_RESIZE = 410
+
+_SEQUENCES = { # escape sequences sent by the keys
+  b"\033[A": KEY_UP, b"\033[B": KEY_DOWN, b"\033[C": KEY_RIGHT, b"\033[D": KEY_LEFT,
+  b"\033OA": KEY_UP, b"\033OB": KEY_DOWN, b"\033OC": KEY_RIGHT, b"\033OD": KEY_LEFT,
+  b"\033[H": KEY_HOME, b"\033OH": KEY_HOME, b"\033[1~": KEY_HOME, b"\033[7~": KEY_HOME,
+  b"\033[F": KEY_END, b"\033OF": KEY_END, b"\033[4~": KEY_END, b"\033[8~": KEY_END,
+  b"\033[5~": KEY_PPAGE, b"\033[6~": KEY_NPAGE, b"\033OM": KEY_ENTER,
+}
+
+ALTERNATE_SCREEN_ON = b"\033[?1049h"
+ALTERNATE_SCREEN_OFF = b"\033[?1049l"
+CURSOR_HIDE = b"\033[?25l"
+CURSOR_SHOW = b"\033[?25h"
+CLEAR = b"\033[H\033[2J"
+
+
+def decode_keys(data:bytes) -> list[int]:
+  """Decodes the bytes read from the terminal into key codes.
+
+  Args:
+    data: The bytes read from the terminal. Can contain several keys.
+
+  Returns:
+    The key codes. Printable keys are returned as their character code, special keys as the curses key codes.
+  """
+  keys = []
+  i = 0
+  while i < len(data):
+    if data[i] == 0x1b and i + 1 < len(data) and data[i + 1] in b"[O":
+      # CSI and SS3 sequences end with a character between @ and ~
+      end = i + 2
+      while end < len(data) and not (0x40 <= data[end] <= 0x7e):
+        end += 1
+      sequence = data[i:end + 1]
+      if sequence in _SEQUENCES:
+        keys.append(_SEQUENCES[sequence])
+      i = end + 1
+      continue
+    keys.append(data[i])
+    i += 1
+  return keys
+
+
+class Terminal(object):
+  """A terminal in cbreak mode on the alternate screen with a hidden cursor.
+  The previous state is restored when the terminal is closed.
+
+  Example:
+    with Terminal() as terminal:
+      terminal.write(b"Hello World!")
+      key = terminal.getch()
+  """
+
+  def __init__(self, fd_in:int=0, fd_out:int=1):
+    """
+    Args:
+      fd_in: The file descriptor the keys are read from.
+      fd_out: The file descriptor everything is written to.
+    """
+    self.fd_in = fd_in
+    self.fd_out = fd_out
+    self._keys = []
+    self._resized = False
+    self._attributes = None
+    self._old_handler = None
+    self._wakeup = None
+
+  def __enter__(self):
+    self._attributes = termios.tcgetattr(self.fd_in)
+    tty.setcbreak(self.fd_in)
+    # the resize handler writes into this pipe to wake up a waiting getch()
+    self._wakeup = os.pipe()
+    os.set_blocking(self._wakeup[1], False)
+    self._old_handler = signal.signal(signal.SIGWINCH, self._on_resize)
+    self.write(ALTERNATE_SCREEN_ON + CURSOR_HIDE + CLEAR)
+    return self
+
+  def __exit__(self, *_):
+    self.write(b"\033[0m" + CURSOR_SHOW + ALTERNATE_SCREEN_OFF)
+    signal.signal(signal.SIGWINCH, self._old_handler)
+    termios.tcsetattr(self.fd_in, termios.TCSADRAIN, self._attributes)
+    os.close(self._wakeup[0])
+    os.close(self._wakeup[1])
+    self._wakeup = None
+
+  def _on_resize(self, *_):
+    self._resized = True
+    if self._wakeup is not None:
+      try:
+        os.write(self._wakeup[1], b"!")
+      except BlockingIOError:
+        pass
+
+  def fileno(self) -> int:
+    """The file descriptor the keys are read from. Can be used with select or an event loop.
+    """
+    return self.fd_in
+
+  def filenos(self) -> list[int]:
+    """The file descriptors that become readable when getch() has something to return: the keys and the resize notifications.
+    """
+    return [self.fd_in] if self._wakeup is None else [self.fd_in, self._wakeup[0]]
+
+  def size(self) -> tuple[int,int]:
+    """The size of the terminal as (lines, columns).
+    """
+    columns, lines = os.get_terminal_size(self.fd_out)
+    return lines, columns
+
+  def write(self, data:bytes|str):
+    """Writes everything at once with as few system calls as possible.
+
+    Args:
+      data: The text or bytes to write.
+    """
+    if isinstance(data, str):
+      data = data.encode()
+    view = memoryview(data)
+    while view:
+      view = view[os.write(self.fd_out, view):]
+
+  def getch(self, timeout:float|None=None) -> int:
+    """Reads the next key.
+
+    Args:
+      timeout: The number of seconds to wait for a key. None waits until a key is pressed, 0 does not wait at all.
+
+    Returns:
+      The key code or -1 if no key was pressed within the timeout.
+    """
+    if not self._keys:
+      self._read(timeout)
+    if self._resized:
+      self._resized = False
+      return KEY_RESIZE
+    if self._keys:
+      return self._keys.pop(0)
+    return -1
+
+  def _read(self, timeout:float|None):
+    ready, _, _ = select.select(self.filenos(), [], [], timeout)
+    if self._wakeup is not None and self._wakeup[0] in ready:
+      os.read(self._wakeup[0], 1024)
+    if self.fd_in in ready:
+      self._keys.extend(decode_keys(os.read(self.fd_in, 1024)))
@@ -0,0 +1,9 @@
+""" The modules of the color picker are imported from the repository root, like __init__.py and the benchmarks do.
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks")) # fake_screen
@@ -0,0 +1,73 @@
+""" Tests of the drawing of the ColorPicker without a terminal.
+"""
+
+import random
+
+from fake_screen import FakeScreen
+
+from ansi_screen import AnsiCurses
+from color_picker import ColorPicker
+
+
+class GridScreen(FakeScreen):
+  # a FakeScreen that keeps the character and the colors of every cell
+
+  def __init__(self, curses:AnsiCurses):
+    super().__init__()
+    self.curses = curses
+    self.grid = {}
+
+  def addstr(self, *args):
+    super().addstr(*args)
+    if len(args) >= 3 and isinstance(args[0], int):
+      args = args[2:]
+    text = args[0]
+    attr = self.attr | (args[1] if len(args) > 1 else 0)
+    x = self.x - len(text)
+    for character in text:
+      if character == "\n":
+        for cell in [cell for cell in self.grid if cell[0] == self.y and cell[1] >= x]:
+          del self.grid[cell]
+        self.y += 1
+        x = 0
+      else:
+        self.grid[(self.y, x)] = (character, attr)
+        x += 1
+    self.x = x
+
+  def clear(self):
+    super().clear()
+    self.grid = {}
+
+  def cells(self) -> dict:
+    # the pair numbers differ between two pickers, so the cells are compared with the colors of their pairs
+    pairs = self.curses.pairs
+    return {cell: (character, pairs.get((attr >> 8) & 0xff), attr & ~AnsiCurses.A_COLOR) for cell, (character, attr) in self.grid.items()}
+
+
+def _picker() -> tuple[ColorPicker,GridScreen]:
+  curses = AnsiCurses()
+  screen = GridScreen(curses)
+  picker = ColorPicker(screen, curses=curses, title_seed=1)
+  return picker, screen
+
+
+def test_incremental_redraw_like_full_redraw():
+  rng = random.Random(1)
+  navigation = [AnsiCurses.KEY_UP, AnsiCurses.KEY_DOWN, AnsiCurses.KEY_LEFT, AnsiCurses.KEY_RIGHT] * 4 + [
+    AnsiCurses.KEY_HOME, AnsiCurses.KEY_END, AnsiCurses.KEY_NPAGE, AnsiCurses.KEY_PPAGE, ord("l")
+  ]
+  keys = [rng.choice(navigation) for _ in range(200)]
+  keys[100:100] = [ord(key) for key in "/dark"] + [9, 9, AnsiCurses.KEY_BACKSPACE, 10] # a search
+  incremental, incremental_screen = _picker()
+  full, full_screen = _picker()
+  incremental.draw()
+  for i, key in enumerate(keys):
+    incremental.handle_input(key)
+    full.handle_input(key)
+    incremental.draw()
+    full_screen.clear()
+    full.invalidate()
+    full.draw()
+    assert incremental_screen.cells() == full_screen.cells(), "frame %i after key %i" % (i, key)
+  assert incremental_screen.calls["addstr"] < full_screen.calls["addstr"]
@@ -0,0 +1,57 @@
+""" Tests of the Colorizer.
+"""
+
+import io
+import random
+import re
+
+import pytest
+
+from colorize import Colorizer
+from functions import FG_ESCAPES_BYTES, RESET_BYTES
+
+
+NEVER = (b"(?!)", 2) # a rule that never matches, so the rules below take the path for several rules
+
+
+@pytest.mark.parametrize("pattern", [b"a", b"a*", b"x?y?", rb"\b", b"(?=a)", b"a|", b"(ERROR)?"])
+def test_one_rule_like_several_rules(pattern):
+  data = b"bab cad\nERROR aaa\n\n"
+  assert Colorizer([(pattern, 1)]).colorize(data) == Colorizer([(pattern, 1), NEVER]).colorize(data)
+
+
+def test_empty_matches_are_not_colored():
+  assert Colorizer([(b"a*", 1)]).colorize(b"bab\n") == b"b\x1b[38;5;1ma\x1b[0mb\n"
+
+
+PATTERNS = [b"ab", b"a+", b"b[ab]", b"ba?", b"(ab)+", b"abc", b"c.", b"[bc]+a", b"a(?=b)", b"(?<=c)a+"]
+
+
+def _combined(rules, data:bytes) -> bytes:
+  # one regular expression with an alternative for each rule, the result the Colorizer has to give
+  regex = re.compile(b"|".join(b"(?P<r%d>%s)" % (i, pattern) for i, (pattern, _) in enumerate(rules)))
+  parts = []
+  pos = 0
+  for match in regex.finditer(data):
+    if match.end() == match.start():
+      continue
+    rule = next(i for i in range(len(rules)) if match.group("r%d" % i) is not None)
+    parts += [data[pos:match.start()], FG_ESCAPES_BYTES[rules[rule][1]], match.group(), RESET_BYTES]
+    pos = match.end()
+  return b"".join(parts) + data[pos:]
+
+
+def test_several_rules_like_one_alternation():
+  rng = random.Random(17)
+  for _ in range(3000):
+    rules = [(rng.choice(PATTERNS), rng.randrange(256)) for _ in range(rng.randrange(1, 5))]
+    data = bytes(rng.choice(b"abc ") for _ in range(rng.randrange(30))) + b"\n"
+    assert Colorizer(rules).colorize(data) == _combined(rules, data), (rules, data)
+
+
+def test_stream_in_small_reads():
+  rules = [(b"ERROR", 196), (rb"\d+ms", 75)]
+  data = b"".join(b"%s took %ims\n" % (random.Random(i).choice([b"ERROR", b"INFO"]), i) for i in range(500))
+  out = io.BytesIO()
+  Colorizer(rules).stream(io.BytesIO(data), out, chunk_size=7)
+  assert out.getvalue() == Colorizer(rules).colorize(data)
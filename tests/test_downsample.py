@@ -0,0 +1,69 @@
+""" Tests of the Downsampler.
+"""
+
+import io
+import random
+
+from downsample import Downsampler
+
+
+def _join(parts) -> bytes:
+  return b"".join(bytes(part) for part in parts)
+
+
+def _convert(data:bytes, sizes) -> bytes:
+  # feeds the data in reads of the given sizes
+  downsampler = Downsampler()
+  parts = []
+  pos = 0
+  for size in sizes:
+    if pos >= len(data):
+      break
+    parts += downsampler.feed(data[pos:pos + size])
+    pos += size
+  if pos < len(data):
+    parts += downsampler.feed(data[pos:])
+  return _join(parts + downsampler.close())
+
+
+def _random_stream(rng:random.Random) -> bytes:
+  parts = []
+  for _ in range(600):
+    kind = rng.random()
+    if kind < 0.3:
+      parts.append(b"\x1b[38;2;%d;%d;%dm" % tuple(rng.randrange(256) for _ in range(3)))
+    elif kind < 0.4:
+      parts.append(b"\x1b[1;48;2;%d;%d;%d;4m" % tuple(rng.randrange(256) for _ in range(3)))
+    elif kind < 0.45:
+      parts.append(b"\x1b[38:2::%d:%d:%dm" % tuple(rng.randrange(256) for _ in range(3)))
+    elif kind < 0.5:
+      parts.append(b"\x1b[0m")
+    elif kind < 0.55:
+      parts.append(b"\x1b]0;title\x07\x1b")
+    else:
+      parts.append(bytes(rng.choice(b"ab; [m\n") for _ in range(rng.randrange(10))))
+  return b"".join(parts)
+
+
+def test_sequences():
+  downsampler = Downsampler()
+  assert downsampler.convert_sequence(b"\x1b[1;38;2;255;136;0m") == b"\x1b[1;38;5;208m"
+  assert downsampler.convert_sequence(b"\x1b[48:2::0:0:255m") == b"\x1b[48:5:21m"
+  assert downsampler.convert_sequence(b"\x1b[0m") == b"\x1b[0m"
+
+
+def test_output_independent_of_reads():
+  rng = random.Random(2)
+  data = _random_stream(rng)
+  whole = _convert(data, [len(data)])
+  assert b"38;2;" not in whole and b"38;5;" in whole
+  assert _convert(data, [1] * len(data)) == whole
+  for _ in range(10):
+    assert _convert(data, [rng.randrange(1, 40) for _ in range(len(data))]) == whole
+
+
+def test_stream():
+  data = _random_stream(random.Random(3))
+  out = io.BytesIO()
+  Downsampler().stream(io.BytesIO(data), out, chunk_size=7)
+  assert out.getvalue() == _convert(data, [len(data)])
@@ -0,0 +1,43 @@
+""" Tests of the gradients, the NumPy and the plain Python calculation have to give the same colors.
+"""
+
+import random
+
+import pytest
+
+import colorspace
+from gradients import gradient, SPACES, SNAPS
+
+
+np = pytest.importorskip("numpy")
+
+
+def _random_stops(rng:random.Random) -> list:
+  return [tuple(rng.randrange(256) for _ in range(3)) for _ in range(rng.randrange(2, 5))]
+
+
+@pytest.mark.parametrize("space", SPACES)
+@pytest.mark.parametrize("snap", SNAPS)
+def test_numpy_like_python(space, snap):
+  rng = random.Random(space + snap)
+  for _ in range(200):
+    stops = _random_stops(rng)
+    steps = rng.randrange(1, 70)
+    include_basic = rng.random() < 0.3
+    with_numpy = gradient(stops, steps, space, snap, include_basic)
+    without_numpy = gradient(stops, steps, space, snap, include_basic, use_numpy=False)
+    assert isinstance(with_numpy, np.ndarray)
+    assert with_numpy.tobytes() == without_numpy, (stops, steps, include_basic)
+
+
+def test_lab_to_rgb_array_like_lab_to_rgb():
+  # the whole sRGB gamut and colors outside of it, which are clipped
+  lab = np.array([(l, a, b) for l in range(-5, 106, 5) for a in range(-130, 131, 10) for b in range(-130, 131, 10)], dtype=np.float64)
+  expected = np.array([colorspace.lab_to_rgb(*values) for values in lab.tolist()], dtype=np.uint8)
+  assert (colorspace.lab_to_rgb_array(np, lab) == expected).all()
+
+
+def test_lab_round_trip():
+  for color in range(256):
+    rgb = colorspace.color_rgb(color)
+    assert colorspace.lab_to_rgb(*colorspace.rgb_to_lab(*rgb)) == rgb
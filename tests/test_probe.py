@@ -0,0 +1,103 @@
+""" Tests of the terminal probe against a pty with a thread answering like a terminal.
+"""
+
+import os
+import re
+import threading
+import time
+
+import pytest
+
+import probe
+
+
+PALETTE = [((color * 7) % 256, (color * 13) % 256, (color * 29) % 256) for color in range(256)]
+_QUERY = re.compile(rb"\x1b\]4;(\d+);\?\x1b\\|\x1b\[c")
+
+
+def _stand_in(master:int, colors, answer_da:bool=True):
+  # answers the OSC 4 queries of the given colors with one batched write and then the device attributes
+  data = b""
+  while True:
+    try:
+      chunk = os.read(master, 4096)
+    except OSError:
+      return
+    if not chunk:
+      return
+    data += chunk
+    if not data.endswith(b"\x1b[c"):
+      continue
+    asked = [int(match.group(1)) for match in _QUERY.finditer(data) if match.group(1) is not None]
+    replies = b"".join(
+      b"\x1b]4;%d;rgb:%04x/%04x/%04x\x1b\\" % (color, *(channel * 257 for channel in PALETTE[color]))
+      for color in asked if color in colors
+    )
+    if answer_da:
+      replies += b"\x1b[?64;1;22c"
+    if replies:
+      os.write(master, replies)
+    return
+
+
+@pytest.fixture
+def terminal(tmp_path, monkeypatch):
+  # a pty and a function starting the stand-in, the cache is written to tmp_path
+  monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+  master, slave = os.openpty()
+  threads = []
+
+  def answer(colors=range(256), answer_da:bool=True):
+    thread = threading.Thread(target=_stand_in, args=(master, set(colors), answer_da), daemon=True)
+    thread.start()
+    threads.append(thread)
+    return slave
+
+  yield answer
+  os.close(slave)
+  os.close(master)
+
+
+ENVIRON = {"TERM": "xterm-256color", "COLORTERM": "truecolor"}
+
+
+def test_full_answer(terminal):
+  fd = terminal()
+  start = time.monotonic()
+  result = probe.probe(fd, fd, refresh=True, timeout=2, environ=ENVIRON)
+  assert time.monotonic() - start < 1 # the device attributes end the wait, not the timeout
+  assert result["answered"] and not result["cached"]
+  assert probe.palette_rgb(result) == PALETTE
+  assert probe.supports_256_colors(result)
+
+
+def test_partial_answer(terminal):
+  fd = terminal(colors=range(16))
+  result = probe.probe(fd, fd, refresh=True, timeout=2, environ=ENVIRON)
+  assert result["answered"]
+  assert [value is not None for value in result["palette"]] == [True] * 16 + [False] * 240
+  rgb = probe.palette_rgb(result)
+  assert rgb[:16] == PALETTE[:16]
+  assert rgb[16:] == [probe.color_rgb(color) for color in range(16, 256)]
+
+
+def test_no_answer_within_timeout(terminal):
+  fd = terminal(colors=(), answer_da=False)
+  start = time.monotonic()
+  result = probe.probe(fd, fd, refresh=True, timeout=0.2, environ={"TERM": "linux"})
+  assert 0.2 <= time.monotonic() - start < 1
+  assert not result["answered"]
+  assert result["palette"] == [None] * 256
+
+
+@pytest.mark.parametrize("answer_da", [True, False])
+def test_cache_written_and_reused(terminal, answer_da):
+  fd = terminal(answer_da=answer_da)
+  first = probe.probe(fd, fd, refresh=True, timeout=0.2, environ=ENVIRON)
+  assert os.path.exists(probe.cache_path(probe.terminal_identity(ENVIRON)))
+  # nothing answers anymore, so the second result can only come from the cache
+  start = time.monotonic()
+  second = probe.probe(fd, fd, timeout=0.2, environ=ENVIRON)
+  assert time.monotonic() - start < 0.1
+  assert second["cached"]
+  assert second["palette"] == first["palette"] and second["answered"] == answer_da
@@ -0,0 +1,27 @@
+""" Tests of the FrameProfiler with the FakeScreen of the benchmarks.
+"""
+
+from fake_screen import FakeCurses, FakeScreen
+
+from color_picker import ColorPicker
+from profiler import FrameProfiler
+
+
+def test_sections_count_what_they_draw():
+  profiler = FrameProfiler()
+  picker = ColorPicker(FakeScreen(keys=[FakeCurses.KEY_RIGHT, ord("q")]), curses=FakeCurses, title_seed=1, profiler=profiler)
+  picker.run(frame_rate=0)
+  sections = profiler.summary()["sections"]
+  for name in ("_display_title", "_display_rgb_colors", "_display_selection", "_display_footer"):
+    assert sections[name]["spans"] > 0 and sections[name]["chars"] > 0, name
+    assert sections[name]["addstr"] == 0, name # only the flush writes to the screen
+  assert sections["flush"]["spans"] == 0 and sections["flush"]["addstr"] > 0
+  assert sections["flush"]["written"] == sections["draw"]["chars"]
+
+
+def test_detach_restores_the_picker():
+  screen = FakeScreen(keys=[ord("q")])
+  picker = ColorPicker(screen, curses=FakeCurses, profiler=FrameProfiler())
+  renderer = picker.renderer._renderer
+  picker.profiler.detach()
+  assert picker.renderer is renderer and picker._out is renderer and picker.screen is screen
@@ -0,0 +1,62 @@
+""" Tests of the Quantizer against a search through all colors.
+"""
+
+import random
+
+import pytest
+
+from calculations import color_rgb
+from quantize import Quantizer, load_numpy, nearest_256
+
+
+def _brute_force(palette:list, r:int, g:int, b:int, colors=range(256)) -> int:
+  # the nearest color, the lower color value if two are equally near
+  return min(colors, key=lambda color: ((palette[color][0] - r) ** 2 + (palette[color][1] - g) ** 2 + (palette[color][2] - b) ** 2, color))
+
+
+def _points(seed:int, count:int) -> list[tuple[int,int,int]]:
+  rng = random.Random(seed)
+  corners = [(r, g, b) for r in (0, 255) for g in (0, 255) for b in (0, 255)]
+  grays = [(value, value, value) for value in range(0, 256, 5)]
+  return corners + grays + [tuple(rng.randrange(256) for _ in range(3)) for _ in range(count)]
+
+
+XTERM = [color_rgb(color) for color in range(256)]
+
+
+@pytest.mark.parametrize("include_basic", [True, False])
+def test_nearest_like_brute_force(include_basic):
+  quantizer = Quantizer(include_basic=include_basic)
+  colors = range(256) if include_basic else range(16, 256)
+  for point in _points(1, 3000):
+    assert quantizer.nearest(*point) == _brute_force(XTERM, *point, colors=colors), point
+
+
+@pytest.mark.parametrize("levels", [1, 8, 64])
+def test_nearest_with_other_palette_and_levels(levels):
+  rng = random.Random(levels)
+  palette = [tuple(rng.randrange(256) for _ in range(3)) for _ in range(256)]
+  quantizer = Quantizer(levels=levels, palette=palette)
+  for point in _points(2, 1000):
+    assert quantizer.nearest(*point) == _brute_force(palette, *point), point
+
+
+def test_nearest_array_like_nearest():
+  np = load_numpy()
+  if np is None:
+    pytest.skip("NumPy is not installed")
+  quantizer = Quantizer()
+  points = _points(3, 5000)
+  result = quantizer.nearest_array(np.array(points, dtype=np.uint8))
+  assert result.tolist() == [quantizer.nearest(*point) for point in points]
+
+
+def test_channels_outside_of_the_range():
+  for point in [(256, 0, 0), (0, -1, 0), (0, 0, 1000)]:
+    with pytest.raises(ValueError):
+      Quantizer().nearest(*point)
+
+
+def test_examples():
+  assert nearest_256(255, 136, 0) == 208
+  assert Quantizer().nearest_hex("#ff8800") == 208
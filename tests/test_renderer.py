@@ -0,0 +1,97 @@
+""" Tests of the SpanRenderer.
+"""
+
+import random
+
+from renderer import SpanRenderer
+
+
+class CellScreen(object):
+  # records the text and attribute of every cell
+
+  def __init__(self):
+    self.cells = {}
+    self.y = 0
+    self.x = 0
+    self.attr = 0
+    self.calls = 0
+
+  def move(self, y:int, x:int):
+    self.calls += 1
+    self.y, self.x = y, x
+
+  def attron(self, attr:int):
+    self.calls += 1
+    self.attr |= attr
+
+  def attroff(self, attr:int):
+    self.calls += 1
+    self.attr &= ~attr
+
+  def addstr(self, text:str, attr:int=0):
+    self.calls += 1
+    for character in text:
+      self.cells[(self.y, self.x)] = (character, self.attr | attr)
+      self.x += 1
+
+
+def _random_frame(rng:random.Random, screen):
+  # moves and spans with a few attributes, written with attron, addstr and attroff like the color picker did
+  for _ in range(300):
+    kind = rng.random()
+    if kind < 0.1:
+      screen.move(rng.randrange(20), rng.randrange(40))
+    elif kind < 0.15:
+      screen.attron(1 << 20)
+    elif kind < 0.2:
+      screen.attroff(1 << 20)
+    else:
+      attr = rng.choice([0, 1 << 8, 2 << 8, (3 << 8) | (1 << 18)])
+      text = "".join(rng.choice("ab █") for _ in range(rng.randrange(1, 4)))
+      if attr:
+        screen.attron(attr)
+        screen.addstr(text)
+        screen.attroff(attr)
+      else:
+        screen.addstr(text)
+
+
+def test_runs_like_spans():
+  for seed in range(20):
+    direct = CellScreen()
+    _random_frame(random.Random(seed), direct)
+    renderer = SpanRenderer()
+    _random_frame(random.Random(seed), renderer)
+    merged = CellScreen()
+    renderer.flush(merged)
+    assert merged.cells == direct.cells, seed
+    assert merged.calls == renderer.stats["calls_after"] < direct.calls
+    assert renderer.stats["runs"] < renderer.stats["spans"]
+
+
+def test_adjacent_spans_are_merged():
+  renderer = SpanRenderer()
+  renderer.move(0, 0)
+  renderer.addstr("Hello ", 1 << 8)
+  renderer.addstr("World!", 1 << 8)
+  renderer.addstr("?")
+  screen = CellScreen()
+  renderer.flush(screen)
+  assert renderer.stats == {"spans": 3, "runs": 2, "calls_before": 8, "calls_after": 3}
+
+
+def test_replay_like_drawing_again():
+  renderer = SpanRenderer()
+  _random_frame(random.Random(1), renderer)
+  ops = renderer.take()
+  for _ in range(2):
+    renderer.move(0, 0)
+    renderer.addstr("x", 1 << 8)
+    renderer.replay(ops)
+    replayed = CellScreen()
+    renderer.flush(replayed)
+    direct = CellScreen()
+    direct.move(0, 0)
+    direct.addstr("x", 1 << 8)
+    _random_frame(random.Random(1), direct)
+    assert replayed.cells == direct.cells
@@ -0,0 +1,79 @@
+""" Tests of the query service.
+"""
+
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+import service
+
+
+MAIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "__init__.py")
+
+
+def _start(path:str) -> subprocess.Popen:
+  process = subprocess.Popen([sys.executable, MAIN, "--serve", "--socket", path], stderr=subprocess.PIPE)
+  deadline = time.monotonic() + 10
+  while True:
+    try:
+      with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(path)
+      return process
+    except OSError:
+      if time.monotonic() > deadline or process.poll() is not None:
+        process.kill()
+        raise
+      time.sleep(0.02)
+
+
+def test_handle_line():
+  response = json.loads(service.handle_line(b'{"op": "nearest", "hex": "#ff8800", "id": 3}'))
+  assert response == {"id": 3, "result": {"color": 208}}
+
+
+def test_socket_in_use_is_not_taken_over(tmp_path):
+  path = str(tmp_path / "service.sock")
+  process = _start(path)
+  try:
+    second = subprocess.run([sys.executable, MAIN, "--serve", "--socket", path], capture_output=True, timeout=10)
+    assert second.returncode == 1
+    assert b"another service is listening" in second.stderr
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+      client.connect(path)
+      client.sendall(b'{"op": "rgb", "color": 137}\n')
+      assert json.loads(client.makefile("rb").readline())["result"]["hex"] == "#af875f"
+  finally:
+    process.send_signal(signal.SIGTERM)
+    process.wait(10)
+  assert not os.path.exists(path) # removed on SIGTERM
+
+
+def test_stale_socket_is_replaced(tmp_path):
+  path = str(tmp_path / "service.sock")
+  with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as old:
+    old.bind(path) # nothing listens on it
+  process = _start(path)
+  process.send_signal(signal.SIGTERM)
+  assert process.wait(10) == 0
+
+
+def test_other_file_is_left_alone(tmp_path):
+  path = tmp_path / "service.sock"
+  path.write_text("data")
+  with pytest.raises(FileExistsError):
+    service.serve_socket(str(path))
+  assert path.read_text() == "data"
+
+
+def test_gradient_steps_are_limited():
+  response = json.loads(service.handle_line(json.dumps({"op": "gradient", "from": "#ff0000", "to": 21, "steps": service.MAX_STEPS})))
+  assert len(response["result"]["colors"]) == service.MAX_STEPS
+  for steps in (1, service.MAX_STEPS + 1, 100000000):
+    response = json.loads(service.handle_line(json.dumps({"op": "gradient", "from": "#ff0000", "to": 21, "steps": steps})))
+    assert response == {"id": None, "error": "steps has to be between 2 and %i" % service.MAX_STEPS}
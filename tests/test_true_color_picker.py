@@ -0,0 +1,88 @@
+""" Tests of the scrolling window of the TrueColorPicker.
+"""
+
+import random
+import re
+
+from fake_screen import FakeTerminal
+
+from calculations import ColorField
+from constants import CURSOR_CELL
+from terminal import KEY_UP, KEY_DOWN, KEY_LEFT, KEY_RIGHT, KEY_PPAGE, KEY_NPAGE, KEY_HOME, KEY_END
+from true_color_picker import TrueColorPicker, HEADER_HEIGHT, SCROLL_MARGIN
+
+
+_LINE = re.compile(r"\x1b\[(\d+);1H(?:\x1b\[J|(.*?)\x1b\[K)")
+_BACKGROUND = re.compile(r"\x1b\[48;2;(\d+);(\d+);(\d+)m")
+
+
+class LineTerminal(FakeTerminal):
+  # keeps the text of every line like a terminal would
+
+  def __init__(self, lines:int=30, columns:int=80):
+    super().__init__(lines, columns)
+    self.lines_text = {}
+
+  def write(self, data:str):
+    super().write(data)
+    for match in _LINE.finditer(data):
+      y = int(match.group(1))
+      if match.group(2) is None:
+        for line in [line for line in self.lines_text if line >= y]:
+          del self.lines_text[line]
+      else:
+        self.lines_text[y] = match.group(2)
+
+
+def _keys(seed:int, count:int) -> list[int]:
+  rng = random.Random(seed)
+  keys = [KEY_UP, KEY_DOWN, KEY_LEFT, KEY_RIGHT] * 6 + [KEY_PPAGE, KEY_NPAGE, KEY_HOME, KEY_END]
+  return [rng.choice(keys) for _ in range(count)]
+
+
+def test_cursor_stays_in_the_window():
+  terminal = LineTerminal()
+  picker = TrueColorPicker(terminal)
+  height, width = picker._window()
+  for key in _keys(1, 600):
+    picker.handle_input(key)
+    picker.draw()
+    assert 0 <= picker.top <= picker.row_count - height and 0 <= picker.left <= picker.col_count - width
+    assert picker.top <= picker.row < picker.top + height
+    assert picker.left <= picker.col < picker.left + width
+    if SCROLL_MARGIN <= picker.row < picker.row_count - SCROLL_MARGIN:
+      assert picker.top + SCROLL_MARGIN <= picker.row < picker.top + height - SCROLL_MARGIN
+
+
+def test_only_the_window_is_drawn():
+  terminal = LineTerminal()
+  picker = TrueColorPicker(terminal)
+  field = ColorField(256, yield_end=False)
+  for key in _keys(2, 300):
+    picker.handle_input(key)
+    picker.draw()
+    height, width = picker._window()
+    for y in range(height):
+      backgrounds = [tuple(map(int, match.groups())) for match in _BACKGROUND.finditer(terminal.lines_text[HEADER_HEIGHT + 1 + y])]
+      row = picker.top + y
+      expected = [field.rgb(row, col) for col in range(picker.left, picker.left + width)]
+      assert backgrounds == [rgb for i, rgb in enumerate(expected) if i == 0 or rgb != expected[i - 1]]
+    cursor_line = terminal.lines_text[HEADER_HEIGHT + 1 + picker.row - picker.top]
+    before_cursor = cursor_line[:cursor_line.index(CURSOR_CELL)]
+    assert tuple(map(int, list(_BACKGROUND.finditer(before_cursor))[-1].groups())) == picker.selected_rgb
+
+
+def test_incremental_lines_like_full_redraw():
+  incremental = LineTerminal()
+  picker = TrueColorPicker(incremental)
+  full_chars = 0
+  for key in _keys(3, 300):
+    picker.handle_input(key)
+    picker.draw()
+    full = LineTerminal()
+    other = TrueColorPicker(full)
+    other.row, other.col, other.top, other.left = picker.row, picker.col, picker.top, picker.left
+    other.draw()
+    assert incremental.lines_text == full.lines_text
+    full_chars += full.chars
+  assert incremental.chars < full_chars / 2
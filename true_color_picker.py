@@ -0,0 +1,209 @@
+""" This module contains a color picker for the full 24bit color range.
+
+The field of the 24bit color range has 509 rows and 1530 columns, which is far more than any terminal can show.
+The ColorField does not store any cells, so only the cells inside of the visible window are calculated for each frame. The window scrolls with the cursor, so memory and the work per frame
+only depend on the size of the terminal.
+
+The colors are written with the 24bit escape sequences (38;2;R;G;B and 48;2;R;G;B) directly to the terminal.
+
+Usage:
+  ncolorpicker truecolor
+"""
+
+
+import argparse
+
+from calculations import ColorField, color_at
+from constants import CURSOR_CELL
+from terminal import Terminal, KEY_UP, KEY_DOWN, KEY_LEFT, KEY_RIGHT, KEY_PPAGE, KEY_NPAGE, KEY_HOME, KEY_END, KEY_RESIZE
+
+
+HEADER_HEIGHT = 2 # title and an empty line
+FOOTER_HEIGHT = 3 # an empty line, the selected color and the help
+SCROLL_MARGIN = 3 # cells kept visible between the cursor and the edge of the window
+
+
+class TrueColorPicker(object):
+  """A color picker that shows a scrolling window of the 24bit color field.
+
+  Example:
+    with Terminal() as terminal:
+      picker = TrueColorPicker(terminal)
+      picker.run()
+      print(picker.selected_rgb)
+  """
+
+  terminal:Terminal
+  field:ColorField
+  row:int
+  col:int
+  top:int
+  left:int
+
+  def __init__(self, terminal:Terminal, full_color_range:int=256):
+    """
+    Args:
+      terminal: The terminal to draw to and read the keys from.
+      full_color_range: The number of values of each channel. 256 for the 24bit color range.
+    """
+    self.terminal = terminal
+    self.field = ColorField(full_color_range, yield_end=False)
+    self.max_value = self.field.max_value
+    self.row_count = self.field.height
+    self.col_count = self.field.width
+    self.row = self.row_count // 2
+    self.col = 0
+    self.top = 0
+    self.left = 0
+    self._lines = [] # the lines of the last frame
+
+  def cell_rgb(self, row:int, col:int) -> tuple[int,int,int]:
+    """Calculates the 24bit color of a cell.
+
+    Args:
+      row: The row of the cell.
+      col: The column of the cell.
+
+    Returns:
+      The RGB channels as tuple. (0-255)
+    """
+    return self.field.rgb(row, col)
+
+  @property
+  def selected_rgb(self) -> tuple[int,int,int]:
+    """The 24bit color of the selected cell.
+    """
+    return self.cell_rgb(self.row, self.col)
+
+  def _window(self) -> tuple[int,int]:
+    lines, columns = self.terminal.size()
+    return max(1, lines - HEADER_HEIGHT - FOOTER_HEIGHT), max(1, (columns - 2) // 2)
+
+  def _scroll(self, height:int, width:int):
+    # move the window only as far as needed to keep the cursor away from the edges
+    margin = min(SCROLL_MARGIN, (height - 1) // 2)
+    if self.row < self.top + margin:
+      self.top = self.row - margin
+    if self.row > self.top + height - 1 - margin:
+      self.top = self.row - height + 1 + margin
+    self.top = max(0, min(self.top, self.row_count - height))
+    margin = min(SCROLL_MARGIN, (width - 1) // 2)
+    if self.col < self.left + margin:
+      self.left = self.col - margin
+    if self.col > self.left + width - 1 - margin:
+      self.left = self.col - width + 1 + margin
+    self.left = max(0, min(self.left, self.col_count - width))
+
+  def _field_lines(self, height:int, width:int) -> list[str]:
+    max_value = self.max_value
+    columns = [color_at(col, max_value) for col in range(self.left, min(self.col_count, self.left + width))]
+    lines = []
+    for row in range(self.top, min(self.row_count, self.top + height)):
+      field_row = self.field[row]
+      dim, bright = field_row.dim_multiplier, field_row.bright_multiplier
+      parts = [" "]
+      last = None
+      for col, (r, g, b) in enumerate(columns, self.left):
+        color = (int(dim * r) + int(bright * (max_value - r)), int(dim * g) + int(bright * (max_value - g)), int(dim * b) + int(bright * (max_value - b)))
+        if color != last:
+          parts.append("\033[48;2;%d;%d;%dm" % color)
+          last = color
+        if row == self.row and col == self.col:
+          fg = 0 if sum(color) > 3 * 128 else 255
+          parts.append("\033[38;2;%d;%d;%dm%s" % (fg, fg, fg, CURSOR_CELL))
+        else:
+          parts.append("  ")
+      parts.append("\033[0m")
+      lines.append("".join(parts))
+    return lines
+
+  def draw(self):
+    """Draws the visible window of the field and the selected color.
+    Only the lines that differ from the last frame are written, all with a single write.
+    """
+    height, width = self._window()
+    self._scroll(height, width)
+    r, g, b = self.selected_rgb
+    lines = [
+      " True Color Picker  (row %i/%i, column %i/%i)" % (self.row + 1, self.row_count, self.col + 1, self.col_count),
+      ""
+    ]
+    lines += self._field_lines(height, width)
+    lines += [
+      "",
+      " \033[48;2;%d;%d;%dm      \033[0m  R: %3i  G: %3i  B: %3i  #%02x%02x%02x  \\033[38;2;%d;%d;%dm" % (r, g, b, r, g, b, r, g, b, r, g, b),
+      " Arrows: move  PgUp/PgDn: page up/down  Home/End: page left/right  q: quit"
+    ]
+    output = []
+    for y, line in enumerate(lines):
+      if y >= len(self._lines) or self._lines[y] != line:
+        output.append("\033[%d;1H%s\033[K" % (y + 1, line))
+    if len(self._lines) > len(lines):
+      output.append("\033[%d;1H\033[J" % (len(lines) + 1))
+    self._lines = lines
+    if output:
+      self.terminal.write("".join(output))
+
+  def invalidate(self):
+    """Forces the next call of draw() to write every line.
+    """
+    self._lines = []
+    self.terminal.write("\033[H\033[2J")
+
+  def handle_input(self, user_input:int):
+    """Moves the cursor for a key.
+
+    Args:
+      user_input: The key code returned by Terminal.getch().
+    """
+    height, width = self._window()
+    if user_input == KEY_UP:
+      self.row -= 1
+    elif user_input == KEY_DOWN:
+      self.row += 1
+    elif user_input == KEY_LEFT:
+      self.col -= 1
+    elif user_input == KEY_RIGHT:
+      self.col += 1
+    elif user_input == KEY_PPAGE:
+      self.row -= height
+    elif user_input == KEY_NPAGE:
+      self.row += height
+    elif user_input == KEY_HOME:
+      self.col -= width
+    elif user_input == KEY_END:
+      self.col += width
+    elif user_input == KEY_RESIZE:
+      self.invalidate()
+    self.row = max(0, min(self.row, self.row_count - 1))
+    self.col = max(0, min(self.col, self.col_count - 1))
+
+  def run(self, exit_key:int=ord('q')):
+    """Run the color picker until the exit key is pressed.
+
+    Args:
+      exit_key: The key code that will exit the color picker. default: ord('q')
+    """
+    action = 0
+    while action != exit_key:
+      self.draw()
+      action = self.terminal.getch()
+      self.handle_input(action)
+
+
+def main(argv:list[str]|None=None) -> int:
+  """Command line interface of the true color picker. The selected color is printed as hex color on exit.
+
+  Args:
+    argv: The arguments after "truecolor".
+
+  Returns:
+    The exit code.
+  """
+  parser = argparse.ArgumentParser(prog="ncolorpicker truecolor", description="Pick a color of the 24bit color range.")
+  parser.parse_args(argv)
+  with Terminal() as terminal:
+    picker = TrueColorPicker(terminal)
+    picker.run()
+  print("#%02x%02x%02x" % picker.selected_rgb)
+  return 0